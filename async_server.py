@@ -0,0 +1,371 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: async_server.py
+Descriere: Acest fișier conține serverul asyncio care servește mai mulți clienți în același timp
+-----------------------------------------------------------------------
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import protocol
+import server
+
+
+class RobotBusy(Exception):
+    """
+    Class name: RobotBusy
+    Objective: Raised when the robot command queue is full
+    """
+
+
+class ClientSession:
+    """
+    Class name: ClientSession
+    Objective: The state of one connected client
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Function name: __init__
+        Objective: Initialize the session of a client
+        Input: reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        Output: None
+        """
+        self.id = next(self._ids)
+        self.reader = reader
+        self.writer = writer
+        self.addr = writer.get_extra_info("peername")
+        self.commands = 0
+        self.connected_at = time.time()
+        self.framer = protocol.LineFramer(commands=server.COMMANDS)
+        self.in_flight = None
+        self.tasks = set()
+        self.wire_format = protocol.JSON
+        self.subscription = None
+
+    async def send(self, reply: dict):
+        """
+        Function name: send
+        Objective: Send an answer to the client, in the format it chose
+        Input: reply: dict
+        Output: None
+        """
+        self.writer.write(protocol.encode_reply(reply, self.wire_format))
+        await self.writer.drain()
+
+
+class AsyncRobotServer:
+    """
+    Class name: AsyncRobotServer
+    Objective: Serve many clients at once; the robot is used by one command at a time
+    """
+
+    def __init__(self, robot_socket: server.RobotSocket, workers: int = 4, robot_queue_size: int = 8, max_in_flight: int = 8, pool: ThreadPoolExecutor | None = None):
+        """
+        Function name: __init__
+        Objective: Initialize the server
+        Input: robot_socket: server.RobotSocket (robot, grid and command handling),
+               workers: int (threads for detection and search), robot_queue_size: int,
+               max_in_flight: int (commands with an id run at the same time for one client),
+               pool: ThreadPoolExecutor | None (detection and search threads shared with other servers, None = its own)
+        Output: None
+        """
+        self.robot_socket = robot_socket
+        self.host = robot_socket.host
+        self.port = robot_socket.port
+        self.robot_queue_size = robot_queue_size
+        self.max_in_flight = max_in_flight
+        # Detection and search run in parallel, RoboDK calls run on a single thread
+        self.own_pool = pool is None
+        self.pool = pool if pool is not None else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="work")
+        self.robot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="robot")
+        self.sessions = {}
+        self.last_joints = [0.0] * 6
+        # The commands of this server only (metrics.METRICS has the whole process)
+        self.metrics = metrics.Metrics()
+        # Created in serve, inside the event loop
+        self.robot_queue = None
+
+    async def run_robot(self, function, *args):
+        """
+        Function name: run_robot
+        Objective: Queue a RoboDK call and wait for its result
+        Input: function: callable, args: its arguments
+        Output: the result of the call
+        """
+        if self.robot_queue.full():
+            raise RobotBusy()
+        future = asyncio.get_running_loop().create_future()
+        await self.robot_queue.put((function, args, future))
+        return await future
+
+    async def _robot_worker(self):
+        """
+        Function name: _robot_worker
+        Objective: Run the queued RoboDK calls one by one and keep the last known joints
+        Input: None
+        Output: None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            function, args, future = await self.robot_queue.get()
+            try:
+                result = await loop.run_in_executor(self.robot_executor, function, *args)
+                self.last_joints = await loop.run_in_executor(self.robot_executor, self._read_joints)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.robot_queue.task_done()
+
+    def _read_joints(self) -> list[float]:
+        """
+        Function name: _read_joints
+        Objective: Read the robot joints (runs on the robot thread)
+        Input: None
+        Output: list[float]
+        """
+        metrics.count("robodk.Joints")
+        with self.robot_socket.robot_lock:
+            return self.robot_socket.extractJoints(self.robot_socket.robot.Joints())
+
+    async def handle_request(self, session: ClientSession, request: protocol.Request, started: float) -> dict:
+        """
+        Function name: handle_request
+        Objective: Run one command and return the answer for the client
+        Input: session: ClientSession, request: protocol.Request,
+               started: float (time.perf_counter() when the command arrived)
+        Output: dict (see RobotSocket.prepare_reply)
+        """
+        command = request.command
+        loop = asyncio.get_running_loop()
+        piece = 1
+        c = -1
+        winner = 0
+        motion_job = None
+        try:
+            if command == "readGrid":
+                if self.robot_socket.motion.full():
+                    raise RobotBusy()
+                # Detection and search do not use the robot
+                m, piece, c, message, winner = await loop.run_in_executor(
+                    self.pool, self.robot_socket.read_grid, started
+                )
+                if c is not None:
+                    # The motion thread draws it, the events are sent to every client
+                    job = self.robot_socket.queue_move(c, piece)
+                    if job is None:
+                        raise RobotBusy()
+                    motion_job = job.id
+                    message += "\nMotion " + str(job.id)
+            elif command == "format":
+                session.wire_format, message = self.robot_socket.select_format(session.wire_format, request.arg(1))
+            elif command == "subscribe":
+                # subscribe;joints;<samples per second>
+                await self.subscribe(session, self.robot_socket.parse_rate(request.arg(2)))
+                message = "Subscribed to joints."
+            elif command == "unsubscribe":
+                self.unsubscribe(session)
+                message = "Unsubscribed from joints."
+            elif command == "stats":
+                message = self.stats(request.arg(1))
+            elif command in ("reset", "undo"):
+                # Off the event loop: they wait for the game lock and cancel the drawings
+                message = await loop.run_in_executor(self.pool, self.robot_socket.game_command, command, request.arg(1))
+            elif command == "cancel":
+                message = await loop.run_in_executor(self.pool, self.robot_socket.cancel_motion, request.arg(1))
+            else:
+                message = await self.run_robot(self.robot_socket.run_command, command, request.arg(1))
+        except RobotBusy:
+            return self.robot_socket.prepare_reply("busy", "Robot is busy, try again.", piece, -1, 0, self.last_joints, request.id)
+        except Exception as e:
+            # A failed command (no image, no board found, unreachable target...) is answered, not dropped
+            print(f"Command {command} failed: {e!r}")
+            return self.robot_socket.prepare_reply("error", str(e), piece, -1, 0, self.last_joints, request.id)
+
+        if c is None:
+            c = -1
+        # The joints were read by the robot worker after the last RoboDK call
+        reply = self.robot_socket.prepare_reply("done", message, piece, c, winner, self.last_joints, request.id)
+        if motion_job is not None:
+            reply["motion"] = motion_job
+        return reply
+
+    def stats(self, action: str) -> str:
+        """
+        Function name: stats
+        Objective: The stats command (see RobotSocket.stats) with the queues of this server
+        Input: action: str
+        Output: str
+        """
+        message = self.robot_socket.stats(action)
+        if action:
+            return message
+        snapshot = json.loads(message)
+        snapshot["server"] = {
+            "clients": len(self.sessions),
+            "robot_queue": self.robot_queue.qsize() if self.robot_queue is not None else 0,
+        }
+        return json.dumps(snapshot)
+
+    def broadcast_motion_event(self, loop: asyncio.AbstractEventLoop, event: dict):
+        """
+        Function name: broadcast_motion_event
+        Objective: Send an event of the motion queue to every client (called on the motion thread)
+        Input: loop: asyncio.AbstractEventLoop, event: dict (see motion.MotionExecutor._emit)
+        Output: None
+        """
+        reply = self.robot_socket.prepare_motion_event(event)
+        self.last_joints = reply["joints"]
+
+        def send_all():
+            for session in list(self.sessions.values()):
+                task = asyncio.create_task(session.send(reply))
+                session.tasks.add(task)
+                task.add_done_callback(session.tasks.discard)
+
+        loop.call_soon_threadsafe(send_all)
+
+    async def subscribe(self, session: ClientSession, rate: float | None):
+        """
+        Function name: subscribe
+        Objective: Send the joint samples to a client, without waiting for the commands
+        Input: session: ClientSession, rate: float | None (samples per second, None = the telemetry rate)
+        Output: None
+        """
+        self.unsubscribe(session)
+        loop = asyncio.get_running_loop()
+        # The telemetry opens its own RoboDK connection the first time
+        joint_telemetry = await loop.run_in_executor(self.pool, self.robot_socket.get_telemetry)
+        ready = asyncio.Event()
+        subscription = joint_telemetry.subscribe(rate, lambda: loop.call_soon_threadsafe(ready.set))
+        session.subscription = subscription
+
+        async def forward():
+            while not subscription.closed:
+                await ready.wait()
+                ready.clear()
+                sample = subscription.take()
+                if sample is not None and not subscription.closed:
+                    await session.send(self.robot_socket.prepare_telemetry(sample))
+
+        task = asyncio.create_task(forward())
+        session.tasks.add(task)
+        task.add_done_callback(session.tasks.discard)
+
+    def unsubscribe(self, session: ClientSession):
+        """
+        Function name: unsubscribe
+        Objective: Stop sending the joint samples to a client
+        Input: session: ClientSession
+        Output: None
+        """
+        if session.subscription is not None:
+            session.subscription.close()
+            session.subscription = None
+
+    async def _run_request(self, session: ClientSession, request: protocol.Request, started: float):
+        """
+        Function name: _run_request
+        Objective: Run a command and send the answer
+        Input: session: ClientSession, request: protocol.Request, started: float
+        Output: None
+        """
+        try:
+            reply = await self.handle_request(session, request, started)
+            with metrics.span("send"):
+                await session.send(reply)
+            # From the arrival of the data to the answer sent
+            name = self.robot_socket.command_metric(request.command)
+            elapsed = time.perf_counter() - started
+            metrics.observe(name, elapsed)
+            self.metrics.observe(name, elapsed)
+        except ConnectionError:
+            pass
+        finally:
+            session.in_flight.release()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Function name: _handle_client
+        Objective: Serve the commands of one client until it disconnects
+        Input: reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        Output: None
+        """
+        session = ClientSession(reader, writer)
+        self.sessions[session.id] = session
+        print(f"Client {session.id} connected from {session.addr}.")
+        try:
+            await session.send(self.robot_socket.prepare_reply("done", "Connection established.", 1, -1, 0, self.last_joints))
+            session.in_flight = asyncio.Semaphore(self.max_in_flight)
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                started = time.perf_counter()
+                for frame in session.framer.feed(data):
+                    try:
+                        request = protocol.parse_request(frame)
+                    except protocol.InvalidRequest as e:
+                        await session.send(self.robot_socket.prepare_reply("error", str(e), 1, -1, 0, self.last_joints))
+                        continue
+                    session.commands += 1
+                    await session.in_flight.acquire()
+                    if request.id is None:
+                        # Without an id the answers must come back in order
+                        await self._run_request(session, request, started)
+                    else:
+                        # With an id the answer is matched by the client, run it in parallel
+                        task = asyncio.create_task(self._run_request(session, request, started))
+                        session.tasks.add(task)
+                        task.add_done_callback(session.tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError, protocol.FrameTooLarge, UnicodeDecodeError) as e:
+            print(f"Client {session.id} connection error: {e}")
+        finally:
+            self.unsubscribe(session)
+            for task in list(session.tasks):
+                task.cancel()
+            del self.sessions[session.id]
+            writer.close()
+            print(f"Client {session.id} disconnected.")
+
+    async def serve(self):
+        """
+        Function name: serve
+        Objective: Create the grid and serve the clients forever
+        Input: None
+        Output: None
+        """
+        self.robot_queue = asyncio.Queue(maxsize=self.robot_queue_size)
+        worker = asyncio.create_task(self._robot_worker())
+        loop = asyncio.get_running_loop()
+        listener = lambda event: self.broadcast_motion_event(loop, event)
+        self.robot_socket.motion.add_listener(listener)
+        await self.run_robot(self.robot_socket.creategrid, 50)
+
+        tcp_server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        print(f"Serving on {self.host}:{self.port}...")
+        try:
+            async with tcp_server:
+                await tcp_server.serve_forever()
+        finally:
+            self.robot_socket.motion.remove_listener(listener)
+            worker.cancel()
+            if self.own_pool:
+                self.pool.shutdown(wait=False)
+            self.robot_executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(AsyncRobotServer(server.RobotSocket()).serve())
@@ -0,0 +1,202 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: batch_detect.py
+Descriere: Acest fișier rulează detecția pe un director de imagini în paralel și raportează
+           acuratețea (dacă există etichete) și viteza
+-----------------------------------------------------------------------
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+import detect
+import metrics
+
+# Image files read from a directory
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Names of the cell values in the report
+CELL_NAMES = ("empty", "X", "O")
+
+
+def list_images(source: str) -> list[str]:
+    """
+    Function name: list_images
+    Objective: Return the images of a directory or of a glob pattern, sorted
+    Input: source: str (directory or pattern like "shots/*.png")
+    Output: list[str]
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+        return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(glob.glob(source, recursive=True))
+
+def load_labels(path: str) -> dict[str, list[int]]:
+    """
+    Function name: load_labels
+    Objective: Read the expected boards: a JSON object {image: board} or JSONL lines {"image": ..., "board": [...]},
+               the images are paths relative to the directory of the labels file
+    Input: path: str
+    Output: dict[str, list[int]] (absolute image path -> board, row by row like detect.convert_matrix)
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        labels = json.loads(text)
+    except json.JSONDecodeError:
+        labels = None
+    if not isinstance(labels, dict):
+        labels = {}
+        for line in text.splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                labels[entry["image"]] = entry["board"]
+    # Two images with the same name in different directories keep their own labels
+    base = os.path.dirname(os.path.abspath(path))
+    return {os.path.normpath(os.path.join(base, name)): board for name, board in labels.items()}
+
+def detect_file(path: str, grid_size: int = 3, method: str = "process_image") -> dict:
+    """
+    Function name: detect_file
+    Objective: Decode and detect one image (runs in a worker process)
+    Input: path: str, grid_size: int, method: str ("process_image" or "read_board")
+    Output: dict (image, board, seconds, error; confidence of every cell for process_image)
+    """
+    started = time.perf_counter()
+    result = {"image": path, "board": None, "error": None}
+    try:
+        img = cv2.imread(path)
+        if img is None:
+            raise ValueError("Could not read the image")
+        if method == "read_board":
+            matrix = detect.read_board(img, grid_size)
+        else:
+            # Same detection as process_image, without drawing the debug image
+            detection = detect.analyze(img, grid_size, zero_copy=True)
+            matrix = detection.board
+            result["confidence"] = detect.convert_matrix(detection.confidence)
+        result["board"] = detect.convert_matrix(matrix)
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+def score(results: list[dict], labels: dict[str, list[int]], grid_size: int = 3) -> dict:
+    """
+    Function name: score
+    Objective: Compare the detected boards with the labels
+    Input: results: list[dict] (from detect_file), labels: dict[str, list[int]], grid_size: int
+    Output: dict (board and cell accuracy, accuracy of every cell position, confusion[expected][detected])
+    """
+    cells = grid_size * grid_size
+    confusion = [[0] * len(CELL_NAMES) for _ in CELL_NAMES]
+    position_correct = [0] * cells
+    boards = boards_correct = 0
+    for result in results:
+        expected = labels.get(os.path.abspath(result["image"]))
+        if expected is None:
+            continue
+        boards += 1
+        # A failed detection counts as an empty board
+        detected = result["board"] or [0] * cells
+        boards_correct += detected == expected
+        for i, (e, d) in enumerate(zip(expected, detected)):
+            confusion[e][d] += 1
+            position_correct[i] += e == d
+
+    return {
+        "labeled": boards,
+        "board_accuracy": boards_correct / boards if boards else None,
+        "cell_accuracy": sum(position_correct) / (boards * cells) if boards else None,
+        "position_accuracy": [c / boards for c in position_correct] if boards else [],
+        "confusion": confusion,
+    }
+
+def print_report(results: list[dict], elapsed: float, accuracy: dict | None, file=None):
+    """
+    Function name: print_report
+    Objective: Print the speed and (if there are labels) the accuracy
+    Input: results: list[dict], elapsed: float (seconds for the whole batch), accuracy: dict | None,
+           file: text file | None (None = standard output)
+    Output: None
+    """
+    file = file or sys.stdout
+    latencies = [r["seconds"] for r in results]
+    errors = sum(r["error"] is not None for r in results)
+    print(f"images={len(results)} errors={errors} time={elapsed:.2f}s", file=file)
+    if results:
+        print(f"throughput: {len(results) / elapsed:.1f} images/s", file=file)
+        print(
+            "latency ms: "
+            f"p50={metrics.percentile(latencies, 50) * 1e3:.1f} "
+            f"p95={metrics.percentile(latencies, 95) * 1e3:.1f} "
+            f"p99={metrics.percentile(latencies, 99) * 1e3:.1f} "
+            f"max={max(latencies) * 1e3:.1f}",
+            file=file,
+        )
+    if accuracy is None or not accuracy["labeled"]:
+        return
+
+    print(f"labeled={accuracy['labeled']} board accuracy={accuracy['board_accuracy']:.4f} "
+          f"cell accuracy={accuracy['cell_accuracy']:.4f}", file=file)
+    print("position accuracy: " + " ".join(f"{a:.3f}" for a in accuracy["position_accuracy"]), file=file)
+    print("confusion (rows expected, columns detected):", file=file)
+    print(" " * 8 + "".join(f"{name:>8}" for name in CELL_NAMES), file=file)
+    for name, row in zip(CELL_NAMES, accuracy["confusion"]):
+        print(f"{name:>8}" + "".join(f"{count:>8}" for count in row), file=file)
+
+
+def main():
+    """
+    Function name: main
+    Objective: Detect every image of the batch in a process pool and write the results as JSONL
+    Input: None
+    Output: None
+    """
+    parser = argparse.ArgumentParser(description="Run the board detection over many images")
+    parser.add_argument("source", help="directory or glob pattern of images")
+    parser.add_argument("--labels", help="expected boards (JSON object or JSONL, image paths relative to the labels file)")
+    parser.add_argument("--output", default="-", help="JSONL results file (- = standard output)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--grid-size", type=int, default=3)
+    parser.add_argument("--method", choices=("process_image", "read_board"), default="process_image")
+    parser.add_argument("--chunksize", type=int, default=4, help="images sent to a worker at a time")
+    args = parser.parse_args()
+
+    paths = list_images(args.source)
+    if not paths:
+        parser.error(f"No images found in {args.source}")
+    labels = load_labels(args.labels) if args.labels else None
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    # With JSONL on standard output the report goes to standard error
+    report = sys.stderr if output is sys.stdout else sys.stdout
+    results = []
+    started = time.perf_counter()
+    try:
+        # Only the paths are sent to the workers, every worker decodes its own images
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            jobs = pool.map(detect_file, paths, [args.grid_size] * len(paths), [args.method] * len(paths),
+                            chunksize=args.chunksize)
+            for result in jobs:
+                results.append(result)
+                output.write(json.dumps(result) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+
+    accuracy = score(results, labels, args.grid_size) if labels is not None else None
+    print_report(results, elapsed, accuracy, report)
+
+
+if __name__ == "__main__":
+    main()
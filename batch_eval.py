@@ -0,0 +1,110 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: batch_eval.py
+Descriere: Acest fișier conține evaluarea vectorizată (NumPy) a mai multor table de joc
+-----------------------------------------------------------------------
+"""
+
+import numpy as np
+import player
+
+# The 8 winning lines as cell indices (same cells as player.check_winner)
+LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
+    [0, 4, 8], [2, 4, 6],             # diagonals
+])
+
+# Weights of player.position_index
+INDEX_WEIGHTS = 3 ** np.arange(9)
+
+# Winner flags, same codes as the "winner" field sent by the server
+ONGOING, X_WINS, O_WINS, DRAW = 0, 1, 2, 3
+
+# State index tables: [player - 1, position index] -> best move / score / known
+_best_move = None
+_score = None
+_known = None
+
+
+def _build_tables():
+    """
+    Function name: _build_tables
+    Objective: Fill the state index tables from player.solution_table (once)
+    Input: None
+    Output: None
+    """
+    global _best_move, _score, _known
+    if _known is not None:
+        return
+    best_move = np.full((2, 3 ** 9), -1, dtype=np.int8)
+    score = np.zeros((2, 3 ** 9), dtype=np.int8)
+    known = np.zeros((2, 3 ** 9), dtype=bool)
+    for (p, position), (move, value, _) in player.solution_table().items():
+        index = player.position_index(position)
+        best_move[p - 1, index] = -1 if move is None else move
+        score[p - 1, index] = value
+        known[p - 1, index] = True
+    _best_move, _score, _known = best_move, score, known
+
+def from_matrices(matrices: np.ndarray) -> np.ndarray:
+    """
+    Function name: from_matrices
+    Objective: Convert the matrices of detect.process_image to boards (vectorized detect.convert_matrix)
+    Input: matrices: np.ndarray (N, 3, 3)
+    Output: np.ndarray (N, 9)
+    """
+    matrices = np.asarray(matrices, dtype=np.int8)
+    return matrices.transpose(0, 2, 1).reshape(len(matrices), 9)
+
+def winners(boards: np.ndarray) -> np.ndarray:
+    """
+    Function name: winners
+    Objective: Detect the winner of every board at once
+    Input: boards: np.ndarray (N, 9)
+    Output: np.ndarray (N,) of ONGOING, X_WINS, O_WINS or DRAW
+    """
+    boards = np.asarray(boards)
+    lines = boards[:, LINES]  # (N, 8, 3)
+    x_wins = (lines == 1).all(axis=2).any(axis=1)
+    o_wins = (lines == 2).all(axis=2).any(axis=1)
+    full = (boards != 0).all(axis=1)
+
+    result = np.full(len(boards), ONGOING, dtype=np.int8)
+    result[full] = DRAW
+    # Same order as player.minimax: a won board is never a draw and X is checked first
+    result[o_wins] = O_WINS
+    result[x_wins] = X_WINS
+    return result
+
+def evaluate(boards, to_move=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Function name: evaluate
+    Objective: Evaluate many boards at once (same results as player.minimax for every board)
+    Input: boards: array like (N, 9) in the detect.convert_matrix encoding,
+           to_move: int | array like (N,) | None (None = X if the X and O counts are equal, like the server)
+    Output: tuple[np.ndarray, np.ndarray, np.ndarray] (best moves with -1 for none, scores, winner flags)
+    """
+    _build_tables()
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 9)
+    n = len(boards)
+
+    if to_move is None:
+        x_count = (boards == 1).sum(axis=1)
+        o_count = (boards == 2).sum(axis=1)
+        to_move = np.where(x_count == o_count, 1, 2)
+    to_move = np.broadcast_to(np.asarray(to_move, dtype=np.int8), (n,))
+
+    index = boards.astype(np.int64) @ INDEX_WEIGHTS
+    side = to_move - 1
+    moves = _best_move[side, index].astype(np.int8)
+    scores = _score[side, index].astype(np.int8)
+
+    # Positions that can not be reached in a normal game are searched one by one
+    for i in np.flatnonzero(~_known[side, index]):
+        move, value = player.minimax(int(to_move[i]), boards[i].tolist())
+        moves[i] = -1 if move is None else move
+        scores[i] = value
+
+    return moves, scores, winners(boards)
@@ -0,0 +1,59 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: bench_detect.py
+Descriere: Acest fișier compară process_image cu read_board pe imagini sintetice
+-----------------------------------------------------------------------
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import detect
+import synthetic
+from suite import bench
+
+# Resolutions of the screenshots
+RESOLUTIONS = ((640, 480), (1280, 960), (1920, 1080))
+
+# A board with every kind of cell
+BOARD = [1, 0, 2, 0, 1, 2, 2, 0, 1]
+
+# Drawings the paths must read alike: thin and hollow strokes, scattered colored pixels in the empty cells
+VARIANTS = ({"stroke": 2}, {"stroke": 1}, {"noise": 150}, {"stroke": 2, "noise": 150})
+
+
+def check(img, name: str):
+    """
+    Function name: check
+    Objective: Check that process_image and read_board read the same board
+    Input: img: np.ndarray, name: str
+    Output: None (AssertionError when they disagree)
+    """
+    _, slow = detect.process_image(img.copy())
+    fast = detect.read_board(img)
+    assert slow == fast, f"The detection paths disagree at {name}: {slow} {fast}"
+
+
+def main():
+    """
+    Function name: main
+    Objective: Time the detection paths at every resolution and check that they agree
+    Input: None
+    Output: None
+    """
+    for width, height in RESOLUTIONS:
+        for variant in VARIANTS:
+            check(synthetic.render_board(BOARD, width, height, **variant), f"{width}x{height} {variant}")
+        img = synthetic.render_board(BOARD, width, height)
+        check(img, f"{width}x{height}")
+
+        slow_ms = bench(f"process_image {width}x{height}", lambda: detect.process_image(img), 50)
+        fast_ms = bench(f"read_board {width}x{height}", lambda: detect.read_board(img), 50)
+        print(f"{'speedup':<36} {slow_ms / fast_ms:8.2f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: bench_protocol.py
+Descriere: Acest fișier compară codarea JSON cu codarea binară a răspunsurilor
+-----------------------------------------------------------------------
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protocol
+from suite import REPLY, bench
+
+
+def main():
+    """
+    Function name: main
+    Objective: Run the encode and decode benchmarks for every wire format
+    Input: None
+    Output: None
+    """
+    for wire_format in protocol.WIRE_FORMATS:
+        size = len(protocol.encode_reply(REPLY, wire_format))
+        print(f"{wire_format:<32} {size:8d} bytes")
+
+    json_line = protocol.encode_reply(REPLY, protocol.JSON)
+    binary = protocol.encode_binary(REPLY)
+    binary_no_message = protocol.encode_binary(REPLY, False)
+
+    bench("encode json", lambda: protocol.encode_reply(REPLY, protocol.JSON), 100_000, "us")
+    bench("encode binary", lambda: protocol.encode_reply(REPLY, protocol.BINARY), 100_000, "us")
+    bench("encode binary (no message)", lambda: protocol.encode_reply(REPLY, protocol.BINARY_NO_MESSAGE), 100_000, "us")
+    bench("decode json", lambda: json.loads(json_line), 100_000, "us")
+    bench("decode binary", lambda: protocol.decode_binary(binary), 100_000, "us")
+    bench("decode binary (no message)", lambda: protocol.decode_binary(binary_no_message), 100_000, "us")
+
+
+if __name__ == "__main__":
+    main()
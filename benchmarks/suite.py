@@ -0,0 +1,345 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: suite.py
+Descriere: Acest fișier rulează toate benchmark-urile (motor, detecție, protocol, traiectorii) fără RoboDK,
+           salvează rezultatele și semnalează regresiile semnificative față de o rulare anterioară
+-----------------------------------------------------------------------
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import detect
+import engine
+import player
+import protocol
+import robot_backend
+import server
+import synthetic
+import trajectory
+
+# Version of the results file
+RESULTS_VERSION = 1
+
+# Boards of the engine benchmarks
+EMPTY = [0] * 9
+OPENING = [1, 0, 0, 0, 2, 0, 0, 0, 0]
+MIDGAME = [1, 0, 2, 0, 1, 0, 0, 0, 2]
+
+# Frames of the detection benchmarks
+RESOLUTIONS = ((640, 480), (1280, 960), (1920, 1080))
+FRAME_BOARD = [1, 0, 2, 0, 1, 2, 2, 0, 1]
+
+# A typical readGrid answer (the dict of RobotSocket.prepare_reply)
+REPLY = {
+    "status": "done",
+    "joints": [12.35, -45.1, 98.76, 0.0, 33.33, -179.99],
+    "message": "Grid read: [1, 0, 0, 0, 2, 0, 0, 0, 1] Choice: 2",
+    "piece": 2,
+    "choice": 2,
+    "winner": 0,
+    "id": "17",
+}
+
+
+def with_engine(name: str, board: list[int], cold: bool = False):
+    """
+    Function name: with_engine
+    Objective: Return a call of player.minimax with one of its engines
+    Input: name: str (player.ENGINE value), board: list[int], cold: bool (empty the bitboard table before every call)
+    Output: callable
+    """
+    def run():
+        previous = player.ENGINE
+        player.ENGINE = name
+        try:
+            if cold:
+                engine.transposition_table.clear()
+            return player.minimax(1 if board.count(1) == board.count(2) else 2, board)
+        finally:
+            player.ENGINE = previous
+    return run
+
+def sim_socket() -> server.RobotSocket:
+    """
+    Function name: sim_socket
+    Objective: Return a RobotSocket on the simulated robot without latency (no RoboDK needed)
+    Input: None
+    Output: server.RobotSocket
+    """
+    backend = robot_backend.create_backend("sim", move_latency=0.0, call_latency=0.0)
+    return server.RobotSocket(port=0, backend=backend)
+
+def engine_benchmarks() -> dict:
+    """
+    Function name: engine_benchmarks
+    Objective: player.minimax on empty and partial boards, with every engine
+    Input: None
+    Output: dict (name -> callable)
+    """
+    player.solution_table()
+    return {
+        "engine.table.empty": with_engine("table", EMPTY),
+        "engine.table.midgame": with_engine("table", MIDGAME),
+        "engine.bitboard.empty": with_engine("bitboard", EMPTY),
+        "engine.bitboard.empty_cold": with_engine("bitboard", EMPTY, cold=True),
+        "engine.bitboard.opening_cold": with_engine("bitboard", OPENING, cold=True),
+        "engine.search.opening": with_engine("search", OPENING),
+        "engine.search.midgame": with_engine("search", MIDGAME),
+    }
+
+def detection_benchmarks() -> dict:
+    """
+    Function name: detection_benchmarks
+    Objective: process_image and read_board on synthetic frames of several resolutions
+    Input: None
+    Output: dict
+    """
+    benchmarks = {}
+    for width, height in RESOLUTIONS:
+        img = synthetic.render_board(FRAME_BOARD, width, height)
+        benchmarks[f"detect.process_image.{width}x{height}"] = lambda img=img: detect.process_image(img)
+        benchmarks[f"detect.read_board.{width}x{height}"] = lambda img=img: detect.read_board(img)
+    return benchmarks
+
+def protocol_benchmarks() -> dict:
+    """
+    Function name: protocol_benchmarks
+    Objective: prepare_data (JSON answer, joints read from the simulated robot) and the reply encoders
+    Input: None
+    Output: dict
+    """
+    robot_socket = sim_socket()
+    return {
+        "protocol.prepare_data": lambda: robot_socket.prepare_data("done", REPLY["message"], 2, 2, 0),
+        "protocol.prepare_data.joints": lambda: robot_socket.prepare_data("done", REPLY["message"], 2, 2, 0, REPLY["joints"]),
+        "protocol.encode.json": lambda: protocol.encode_reply(REPLY, protocol.JSON),
+        "protocol.encode.binary": lambda: protocol.encode_reply(REPLY, protocol.BINARY),
+    }
+
+def motion_benchmarks() -> dict:
+    """
+    Function name: motion_benchmarks
+    Objective: The trajectories of X and O: the legacy point by point moves and the compiled segments
+    Input: None
+    Output: dict
+    """
+    robot_socket = sim_socket()
+    robot = robot_socket.robot
+    center = robot.Pose()
+    transl = robot_socket.rdk.transl
+
+    def circle():
+        robot_socket.moveRobotInCircle(server.O_RADIUS)
+        # The circle ends away from the center, start every call from the same pose
+        robot.MoveJ(center)
+
+    return {
+        "motion.moveRobotInXShape": lambda: robot_socket.moveRobotInXShape(server.X_SIZE),
+        "motion.moveRobotInCircle": circle,
+        "motion.compile.x": lambda: trajectory.compile_segments(center, trajectory.x_shape(server.X_SIZE), transl),
+        "motion.compile.circle": lambda: trajectory.compile_segments(center, trajectory.circle_shape(server.O_RADIUS), transl),
+    }
+
+# Groups of benchmarks, created only when selected
+GROUPS = {
+    "engine": engine_benchmarks,
+    "detect": detection_benchmarks,
+    "protocol": protocol_benchmarks,
+    "motion": motion_benchmarks,
+}
+
+
+def calibrate(function, min_time: float = 0.02) -> int:
+    """
+    Function name: calibrate
+    Objective: Find the number of calls of one sample: doubled until a sample lasts min_time
+    Input: function: callable, min_time: float (seconds)
+    Output: int
+    """
+    function()  # warm up (lazy tables, caches)
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - started >= min_time or number >= 1 << 20:
+            return number
+        number *= 2
+
+def sample(function, number: int) -> float:
+    """
+    Function name: sample
+    Objective: Time number calls (without the garbage collector, like timeit)
+    Input: function: callable, number: int
+    Output: float (seconds per call)
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        return (time.perf_counter() - started) / number
+    finally:
+        if enabled:
+            gc.enable()
+
+def bench(name: str, function, number: int, unit: str = "ms") -> float:
+    """
+    Function name: bench
+    Objective: Time a function (best of 5 samples, see sample) and print the time per call
+    Input: name: str, function: callable, number: int (calls per sample), unit: str ("ms" or "us")
+    Output: float (time per call in unit)
+    """
+    scale = {"ms": 1e3, "us": 1e6}[unit]
+    best = min(sample(function, number) for _ in range(5)) * scale
+    print(f"{name:<36} {best:8.3f} {unit}")
+    return best
+
+def mann_whitney(a: list[float], b: list[float]) -> float:
+    """
+    Function name: mann_whitney
+    Objective: Two sided Mann-Whitney U test (normal approximation with tie correction)
+    Input: a: list[float], b: list[float]
+    Output: float (p value: small when the two samples come from different distributions)
+    """
+    n1, n2 = len(a), len(b)
+    values = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    n = n1 + n2
+
+    # Average rank of the tied values
+    rank_a = 0.0
+    ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and values[j + 1][0] == values[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_a += rank * sum(1 for k in range(i, j + 1) if values[k][1] == 0)
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+
+    u = rank_a - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+def compare(baseline: dict, current: dict, alpha: float = 0.01, threshold: float = 0.10) -> list[dict]:
+    """
+    Function name: compare
+    Objective: Compare every benchmark with the baseline
+    Input: baseline: dict, current: dict (results files), alpha: float (significance level),
+           threshold: float (smallest relative change of the median reported)
+    Output: list[dict] (name, ratio of the medians, p value, verdict: "regression", "improvement" or "same")
+    """
+    rows = []
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"]
+        p = mann_whitney(result["samples"], old["samples"])
+        verdict = "same"
+        if p < alpha and ratio > 1 + threshold:
+            verdict = "regression"
+        elif p < alpha and ratio < 1 - threshold:
+            verdict = "improvement"
+        rows.append({"name": name, "ratio": ratio, "p": p, "verdict": verdict})
+    return rows
+
+def run(groups: list[str], pattern: str | None, samples: int, min_time: float) -> dict:
+    """
+    Function name: run
+    Objective: Run the selected benchmarks and return the results file
+    Input: groups: list[str], pattern: str | None (only names containing it), samples: int, min_time: float
+    Output: dict
+    """
+    benchmarks = {}
+    # The server prints every RoboDK lookup, keep only the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        for group in groups:
+            benchmarks.update(GROUPS[group]())
+
+    benchmarks = {name: function for name, function in benchmarks.items() if not pattern or pattern in name}
+    numbers = {name: calibrate(function, min_time) for name, function in benchmarks.items()}
+
+    # One sample of every benchmark per round: a slower period of the machine affects all of them,
+    # not only the benchmark that happened to run at that time
+    times = {name: [] for name in benchmarks}
+    for _ in range(samples):
+        for name, function in benchmarks.items():
+            times[name].append(sample(function, numbers[name]))
+
+    results = {}
+    for name, values in times.items():
+        results[name] = {"median": statistics.median(values), "min": min(values), "number": numbers[name], "samples": values}
+        print(f"{name:<40} median {results[name]['median'] * 1e6:12.2f} us   min {results[name]['min'] * 1e6:12.2f} us")
+    return {
+        "version": RESULTS_VERSION,
+        "t": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+
+
+def main():
+    """
+    Function name: main
+    Objective: Run the suite, save the results and compare them with a baseline
+    Input: None
+    Output: None (exit code 1 when a regression is found)
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the engine, detection, protocol and motion paths")
+    parser.add_argument("--group", action="append", choices=sorted(GROUPS), help="groups to run (default all)")
+    parser.add_argument("--filter", help="run only the benchmarks whose name contains this text")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=0.02, help="seconds per sample")
+    parser.add_argument("--save", help="write the results (JSON) to this file, to use as a baseline later")
+    parser.add_argument("--compare", help="baseline results file to compare with")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--threshold", type=float, default=0.10, help="smallest slowdown of the median reported")
+    args = parser.parse_args()
+
+    current = run(args.group or list(GROUPS), args.filter, args.samples, args.min_time)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1)
+
+    if not args.compare:
+        return
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != RESULTS_VERSION:
+        sys.exit(f"{args.compare} has results version {baseline.get('version')}, expected {RESULTS_VERSION}")
+
+    rows = compare(baseline, current, args.alpha, args.threshold)
+    print()
+    for row in rows:
+        print(f"{row['name']:<40} {row['ratio']:6.3f} x   p={row['p']:.4f}   {row['verdict']}")
+    regressions = [row["name"] for row in rows if row["verdict"] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: camera.py
+Descriere: Acest fișier citește continuu imagini de la o cameră sau dintr-un fișier video și
+           publică ultima tablă stabilă (detectată la fel în mai multe imagini la rând)
+-----------------------------------------------------------------------
+"""
+
+import queue
+import threading
+import time
+
+import cv2
+
+import frame_cache
+
+
+class CameraPipeline:
+    """
+    Class name: CameraPipeline
+    Objective: One thread captures the frames, the detection workers read the boards; the board
+               is published once enough consecutive frames agree
+    """
+
+    def __init__(
+        self,
+        source,
+        grid_size: int = 3,
+        workers: int = 1,
+        debounce: int = 3,
+        queue_size: int = 2,
+        realtime: bool = True,
+        loop: bool = False,
+        tolerance: int = 16,
+    ):
+        """
+        Function name: __init__
+        Objective: Initialize the pipeline (nothing runs before start)
+        Input: source: str | int (video file or camera index, "0" is a camera too), grid_size: int,
+               workers: int (detection threads), debounce: int (consecutive frames that must agree),
+               queue_size: int (frames waiting for detection, older ones are dropped),
+               realtime: bool (read a video file at its own frame rate, like a camera),
+               loop: bool (start a video file again at its end),
+               tolerance: int (pixel noise ignored when comparing frames, see frame_cache.DetectionCache)
+        Output: None
+        """
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        self.source = source
+        self.grid_size = grid_size
+        self.workers = workers
+        self.debounce = debounce
+        self.realtime = realtime
+        self.loop = loop
+        self.tolerance = tolerance
+
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.running = False
+        self.condition = threading.Condition()
+
+        # Debounce state: the last frame whose board was counted, the candidate and its votes
+        self.last_seq = 0
+        self.candidate = None
+        self.votes = 0
+        # The published board (indexed [column][row] like detect.process_image)
+        self.stable = None
+        self.stable_seq = 0
+        self.stable_time = 0.0
+
+        self.captured = 0
+        self.dropped = 0
+        self.detected = 0
+        self.stale = 0
+        self.errors = 0
+        self.finished = False
+
+    def start(self):
+        """
+        Function name: start
+        Objective: Start the capture thread and the detection workers
+        Input: None
+        Output: None
+        """
+        if self.running:
+            return
+        self.running = True
+        self.finished = False
+        self.threads = [threading.Thread(target=self._capture, name="camera-capture", daemon=True)]
+        for i in range(self.workers):
+            self.threads.append(threading.Thread(target=self._detect, name=f"camera-detect-{i}", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Function name: stop
+        Objective: Stop all the threads
+        Input: None
+        Output: None
+        """
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def board(self) -> list[list[int]] | None:
+        """
+        Function name: board
+        Objective: Return the last stable board at once
+        Input: None
+        Output: list[list[int]] | None (None until the first board is stable)
+        """
+        return self.stable
+
+    def wait_board(self, timeout: float | None = None) -> list[list[int]] | None:
+        """
+        Function name: wait_board
+        Objective: Return the last stable board, waiting for the first one if needed
+        Input: timeout: float | None (seconds)
+        Output: list[list[int]] | None (None if no board became stable in time)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.stable is not None or self.finished, timeout)
+            return self.stable
+
+    def _put(self, seq: int | None, frame):
+        """
+        Function name: _put
+        Objective: Queue a frame, dropping the oldest one when the detection is behind
+        Input: seq: int | None, frame: np.ndarray | None (None marks the end of the video)
+        Output: None
+        """
+        while True:
+            try:
+                self.frames.put_nowait((seq, frame))
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _capture(self):
+        """
+        Function name: _capture
+        Objective: Read frames until stopped or until the video ends
+        Input: None
+        Output: None
+        """
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            print(f"Could not open the video source {self.source}")
+        is_file = isinstance(self.source, str)
+        fps = capture.get(cv2.CAP_PROP_FPS) if is_file else 0
+        period = 1.0 / fps if self.realtime and fps > 0 else 0.0
+        next_time = time.perf_counter()
+        try:
+            while self.running and capture.isOpened():
+                ok, frame = capture.read()
+                if not ok:
+                    if is_file and self.loop and self.captured:
+                        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    break
+                self.captured += 1
+                self._put(self.captured, frame)
+
+                if period:
+                    next_time += period
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_time = time.perf_counter()
+        finally:
+            capture.release()
+            # Tells the workers that the video ended
+            self._put(None, None)
+
+    def _detect(self):
+        """
+        Function name: _detect
+        Objective: Detect the board of every queued frame (every worker has its own cache)
+        Input: None
+        Output: None
+        """
+        cache = frame_cache.DetectionCache(self.grid_size, tolerance=self.tolerance)
+        while self.running:
+            try:
+                seq, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if frame is None:
+                # End of the video, let the other workers see it too
+                self._put(None, None)
+                with self.condition:
+                    self.finished = True
+                    self.condition.notify_all()
+                return
+            try:
+                board = cache.detect(frame)
+            except Exception as e:
+                self.errors += 1
+                print(f"Camera detection error: {e}")
+                continue
+            self._vote(seq, board)
+
+    def _vote(self, seq: int, board: list[list[int]]):
+        """
+        Function name: _vote
+        Objective: Count the board of a frame; publish it after debounce consecutive frames agree
+        Input: seq: int (capture order), board: list[list[int]]
+        Output: None
+        """
+        with self.condition:
+            self.detected += 1
+            if seq < self.last_seq:
+                # A newer frame was already counted by another worker
+                self.stale += 1
+                return
+            self.last_seq = seq
+            if board == self.candidate:
+                self.votes += 1
+            else:
+                self.candidate = board
+                self.votes = 1
+            if self.votes >= self.debounce and board != self.stable:
+                self.stable = board
+                self.stable_seq = seq
+                self.stable_time = time.time()
+                self.condition.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Function name: stats
+        Objective: Return the pipeline counters
+        Input: None
+        Output: dict
+        """
+        return {
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "detected": self.detected,
+            "stale": self.stale,
+            "errors": self.errors,
+            "stable_seq": self.stable_seq,
+        }
@@ -20,6 +20,9 @@ UPPER_RED = np.array([10, 255, 255])
 LOWER_GREEN = np.array([50, 70, 50])
 UPPER_GREEN = np.array([70, 255, 255])
 
+# Smallest red/green area (pixels of the half size image) that counts as a piece
+MIN_AREA = 100
+
 # Path to the image
 PATH_TO_UNITY_IMG = "C:/Users/Bogdan/Desktop/licenta/unity/Paint3D/ScreenShot.png"
 
@@ -66,91 +69,261 @@ def convert_matrix(m: list[list[int]]) -> list[int]:
     return l
 
 
-def process_image(img: np.ndarray) -> tuple[cv2.Mat | np.ndarray, list[list[int]]]:
+class DetectionResult:
     """
-    Function name: process_image
-    Objective: Process the image to detect the Tic-Tac-Toe grid and the shapes inside it
-    Input: m: np.ndarray (image)
-    Output: tuple[cv2.Mat | np.ndarray, list[list[int]]]
+    Class name: DetectionResult
+    Objective: The result of analyze: the board, where the grid, the cells and the pieces are, and how
+               sure the detection is of every cell; the debug overlay is drawn only when asked for
     """
-    h, w = img.shape[:2]
-    img = cv2.resize(img, (w//2, h//2))
 
-    tictactoe = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+    def __init__(self, source: np.ndarray, grid_size: int, board: list[list[int]], grid_box: tuple[int, int, int, int],
+                 contour_boxes: list[tuple[int, int, int, tuple[int, int, int, int]]], confidence: list[list[float]]):
+        """
+        Function name: __init__
+        Objective: Initialize the result (see analyze)
+        Input: source: np.ndarray (read only full size image), grid_size: int,
+               board: list[list[int]] (indexed [column][row]), grid_box: tuple[int, int, int, int] (x, y, w, h),
+               contour_boxes: list (column, row, piece, (x, y, w, h)) of every accepted red/green contour,
+               confidence: list[list[float]] (0 .. 1, indexed [column][row])
+        Output: None
+        """
+        self.source = source
+        self.grid_size = grid_size
+        self.board = board
+        self.grid_box = grid_box
+        self.contour_boxes = contour_boxes
+        self.confidence = confidence
+        self._overlay = None
+
+    @property
+    def cell_boxes(self) -> list[list[tuple[int, int, int, int]]]:
+        """
+        Function name: cell_boxes
+        Objective: Return the rectangle of every cell (half size image coordinates)
+        Input: None
+        Output: list[list[tuple[int, int, int, int]]] ((x, y, w, h), indexed [column][row])
+        """
+        x_main, y_main, w_main, _ = self.grid_box
+        square_size = w_main // self.grid_size
+        return [
+            [(x_main + i * square_size, y_main + j * square_size, square_size, square_size) for j in range(self.grid_size)]
+            for i in range(self.grid_size)
+        ]
+
+    def render_overlay(self) -> np.ndarray:
+        """
+        Function name: render_overlay
+        Objective: Draw the debug image (the half size image with the piece, cell and label
+                   drawings of process_image); drawn once, on a new image
+        Input: None
+        Output: np.ndarray
+        """
+        if self._overlay is not None:
+            return self._overlay
+
+        h, w = self.source.shape[:2]
+        img = cv2.resize(self.source, (w//2, h//2))
+        for _, _, piece, (x, y, w, h) in self.contour_boxes:
+            color = (0, 0, 255) if piece == 1 else (0, 255, 0)
+            cv2.rectangle(img, (x, y), (x + w, y + h), color, 2)
+
+        for i, column in enumerate(self.cell_boxes):
+            for j, (x1, y1, square_size, _) in enumerate(column):
+                # Draw the square
+                cv2.rectangle(img, (x1, y1), (x1 + square_size, y1 + square_size), (0, 255, 0), 2)
+                # Label the square
+                label_position = (x1 + 5, y1 + 25)  # Adjust as needed
+                cv2.putText(img, f'{i},{j}', label_position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 2)
+        self._overlay = img
+        return img
 
-    # Convert the image to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-    # Threshold the image to binary so that only black areas are left
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+def cell_confidence(piece: int, red_area: float, green_area: float, min_area: int = MIN_AREA) -> float:
+    """
+    Function name: cell_confidence
+    Objective: How far the deciding contour area is from min_area (0 = on the limit, 1 = far from it)
+    Input: piece: int (the detected value), red_area: float, green_area: float (largest contour of
+           every color), min_area: int
+    Output: float
+    """
+    area = {0: max(red_area, green_area), 1: red_area, 2: green_area}[piece]
+    return abs(area - min_area) / max(area, min_area)
 
-    # Find contours in the binary image
-    contours, _ = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+def analyze(img: np.ndarray, grid_size: int = 3, min_area: int = MIN_AREA, zero_copy: bool = False) -> DetectionResult:
+    """
+    Function name: analyze
+    Objective: Detect the Tic-Tac-Toe grid and the shapes inside it like process_image, without drawing anything
+    Input: img: np.ndarray (image), grid_size: int, min_area: int,
+           zero_copy: bool (keep a read only view of img for the overlay instead of a copy;
+           the caller must not change img while the result is used)
+    Output: DetectionResult
+    """
+    if zero_copy:
+        source = img.view()
+        source.flags.writeable = False
+    else:
+        source = img.copy()
 
-    if contours:
-        # Assume the grid is the largest contour
-        grid_contour = max(contours, key=cv2.contourArea)
-        x_main, y_main, w_main, h_main = cv2.boundingRect(grid_contour)
+    h, w = img.shape[:2]
+    small = cv2.resize(img, (w//2, h//2))
+    grid_box = locate_grid(small)
+    x_main, y_main, w_main, _ = grid_box
+
+    # Calculate the size of each square
+    square_size = w_main // grid_size
+
+    board = [[0] * grid_size for _ in range(grid_size)]
+    confidence = [[1.0] * grid_size for _ in range(grid_size)]
+    contour_boxes = []
+    for i in range(grid_size):
+        for j in range(grid_size):
+            # Calculate the position of the square
+            x1 = x_main + i * square_size
+            y1 = y_main + j * square_size
+
+            # only convert the square to hsv
+            hsv = cv2.cvtColor(small[y1:y1 + square_size, x1:x1 + square_size], cv2.COLOR_BGR2HSV)
+
+            areas = {}
+            for piece, lower, upper in ((1, LOWER_RED, UPPER_RED), (2, LOWER_GREEN, UPPER_GREEN)):
+                contours, _ = cv2.findContours(cv2.inRange(hsv, lower, upper), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                areas[piece] = 0.0
+                for cnt in contours:
+                    area = cv2.contourArea(cnt)
+                    areas[piece] = max(areas[piece], area)
+                    if area > min_area:
+                        x, y, w, h = cv2.boundingRect(cnt)
+                        contour_boxes.append((i, j, piece, (x + x1, y + y1, w, h)))
+                        # Green is checked last, it wins over red
+                        board[i][j] = piece
+            confidence[i][j] = cell_confidence(board[i][j], areas[1], areas[2], min_area)
 
-        # Assume the grid is a 9x9 grid
-        grid_size = 3
+    return DetectionResult(source, grid_size, board, grid_box, contour_boxes, confidence)
 
-        # Calculate the size of each square
-        square_size = w_main// grid_size
+def process_image(img: np.ndarray, grid_size: int = 3) -> tuple[cv2.Mat | np.ndarray, list[list[int]]]:
+    """
+    Function name: process_image
+    Objective: Process the image to detect the Tic-Tac-Toe grid and the shapes inside it
+    Input: m: np.ndarray (image), grid_size: int (number of cells on each side)
+    Output: tuple[cv2.Mat | np.ndarray, list[list[int]]] (the debug image, see DetectionResult.render_overlay)
+    """
+    try:
+        result = analyze(img, grid_size, zero_copy=True)
+    except ValueError:
+        print("No contours found")
+        raise
+    return result.render_overlay(), result.board
 
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Calculate the position of the square
-                x1 = x_main + i * square_size
-                y1 = y_main + j * square_size
-                x2 = x1 + square_size
-                y2 = y1 + square_size
 
-                # only convert the square to hsv
-                square = img[y1:y2, x1:x2]
+def find_grid(img: np.ndarray) -> tuple[tuple[int, int, int, int], float]:
+    """
+    Function name: find_grid
+    Objective: Find the bounding box of the grid (the largest dark contour), like process_image
+    Input: img: np.ndarray (half size image)
+    Output: tuple[tuple[int, int, int, int], float] ((x, y, w, h), the Otsu threshold)
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    threshold, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        raise ValueError("No contours found")
+    grid_contour = max(contours, key=cv2.contourArea)
+    return cv2.boundingRect(grid_contour), threshold
 
-                hsv = cv2.cvtColor(square, cv2.COLOR_BGR2HSV)
+def locate_grid(img: np.ndarray) -> tuple[int, int, int, int]:
+    """
+    Function name: locate_grid
+    Objective: Find the bounding box of the grid (see find_grid)
+    Input: img: np.ndarray (half size image)
+    Output: tuple[int, int, int, int] (x, y, w, h)
+    """
+    return find_grid(img)[0]
 
-                # Threshold the HSV image to get only red and green colors
-                mask_red = cv2.inRange(hsv, LOWER_RED, UPPER_RED)
-                mask_green = cv2.inRange(hsv, LOWER_GREEN, UPPER_GREEN)
+def grid_region(img: np.ndarray, x: int, y: int, square_size: int, grid_size: int) -> np.ndarray:
+    """
+    Function name: grid_region
+    Objective: Return the grid_size x grid_size cells of the grid as one image (padded with black
+               where the cells go past the image border)
+    Input: img: np.ndarray, x: int, y: int, square_size: int, grid_size: int
+    Output: np.ndarray
+    """
+    size = square_size * grid_size
+    region = img[y:y + size, x:x + size]
+    if region.shape[0] != size or region.shape[1] != size:
+        padded = np.zeros((size, size) + img.shape[2:], dtype=img.dtype)
+        padded[:region.shape[0], :region.shape[1]] = region
+        region = padded
+    return region
+
+def shape_areas(mask: np.ndarray, grid_size: int) -> np.ndarray:
+    """
+    Function name: shape_areas
+    Objective: Return the largest contour area of one color in every cell (the area compared with min_area
+               by process_image) with one findContours for the whole grid: the areas of all the contours
+               are computed together and binned by the cell of the first point of every contour
+    Input: mask: np.ndarray (inRange mask of the grid region), grid_size: int
+    Output: np.ndarray (areas, indexed [column][row] like process_image)
+    """
+    square_size = mask.shape[0] // grid_size
+    areas = np.zeros((grid_size, grid_size))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return areas
+
+    points = np.concatenate(contours).reshape(-1, 2).astype(np.float64)
+    lengths = np.array([len(cnt) for cnt in contours])
+    starts = np.cumsum(lengths) - lengths
+    # Shoelace formula (same as cv2.contourArea): the last point of every contour is joined to its first
+    following = np.arange(1, len(points) + 1)
+    following[starts + lengths - 1] = starts
+    cross = points[:, 0] * points[following, 1] - points[following, 0] * points[:, 1]
+    contour_areas = np.abs(np.add.reduceat(cross, starts)) / 2
+
+    cells = np.minimum(points[starts] // square_size, grid_size - 1).astype(np.intp)
+    np.maximum.at(areas, (cells[:, 0], cells[:, 1]), contour_areas)
+    return areas
+
+def cell_color_areas(region: np.ndarray, grid_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Function name: cell_color_areas
+    Objective: Return the largest red and green contour area of every cell (see shape_areas), with one
+               HSV conversion for the whole grid
+    Input: region: np.ndarray (the cells of the grid, see grid_region), grid_size: int
+    Output: tuple[np.ndarray, np.ndarray] (red and green areas, indexed [column][row] like process_image)
+    """
+    hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
+    red = shape_areas(cv2.inRange(hsv, LOWER_RED, UPPER_RED), grid_size)
+    green = shape_areas(cv2.inRange(hsv, LOWER_GREEN, UPPER_GREEN), grid_size)
+    return red, green
 
-                # Find contours in the red and green masks
-                contours_red, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                contours_green, _ = cv2.findContours(mask_green, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                # Process the red contours
-                for cnt in contours_red:
-                    area = cv2.contourArea(cnt)
-                    if area > 100:
-                        x, y, w, h = cv2.boundingRect(cnt)
-                        cv2.rectangle(img, (x + x1, y + y1), (x + x1 +w, y + y1+h), (0, 0, 255), 2)  # Draw a red rectangle
-                        tictactoe[i][j] = 1
+def classify_areas(red: np.ndarray, green: np.ndarray, min_area: int = MIN_AREA) -> list[list[int]]:
+    """
+    Function name: classify_areas
+    Objective: Turn the contour areas into the board (green wins over red, like process_image)
+    Input: red: np.ndarray, green: np.ndarray, min_area: int
+    Output: list[list[int]] (indexed [column][row] like process_image)
+    """
+    board = np.where(green > min_area, 2, np.where(red > min_area, 1, 0))
+    return board.tolist()
 
-                # Process the green contours
-                for cnt in contours_green:
-                    area = cv2.contourArea(cnt)
-                    if area > 100:
-                        x, y, w, h = cv2.boundingRect(cnt)
-                        cv2.rectangle(img, (x + x1, y + y1), (x + x1+ w, y + y1+h), (0, 255, 0), 2)  # Draw a green rectangle
-                        tictactoe[i][j] = 2
-
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Calculate the position of the square
-                x1 = x_main + i * square_size
-                y1 = y_main + j * square_size
-                x2 = x1 + square_size
-                y2 = y1 + square_size
-                # Draw the square
-                cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                # Label the square
-                label_position = (x1 + 5, y1 + 25)  # Adjust as needed
-                cv2.putText(img, f'{i},{j}', label_position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 2)
-    else:
-        print("No contours found")
-        raise ValueError("No contours found")
+def read_board(img: np.ndarray, grid_size: int = 3, min_area: int = MIN_AREA, locator=None) -> list[list[int]]:
+    """
+    Function name: read_board
+    Objective: Fast detection of the board (no drawing): one color classification and one findContours
+               per color for the whole grid instead of both for every cell
+    Input: img: np.ndarray (image), grid_size: int, min_area: int,
+           locator: grid_locator.GridLocator | None (None = search the whole image with locate_grid)
+    Output: list[list[int]] (same matrix as process_image)
+    """
+    h, w = img.shape[:2]
+    img = cv2.resize(img, (w//2, h//2))
+
+    x_main, y_main, w_main, _ = locator.locate(img) if locator is not None else locate_grid(img)
+    square_size = w_main // grid_size
 
-    return img, tictactoe
+    region = grid_region(img, x_main, y_main, square_size, grid_size)
+    red, green = cell_color_areas(region, grid_size)
+    return classify_areas(red, green, min_area)
 
 
 # Main function
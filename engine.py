@@ -0,0 +1,233 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: engine.py
+Descriere: Acest fișier conține un motor Tic-Tac-Toe pe biți (negamax cu alpha-beta)
+-----------------------------------------------------------------------
+"""
+
+# A position is stored as two 9-bit masks, one for X (1) and one for O (2).
+# Bit i is cell i of the board list used by player.py (row by row).
+FULL = 0b111111111
+
+# The 8 winning lines as bit masks
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# Static move order: center, corners, edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Cell permutations for the 8 symmetries of the board (rotations and reflections)
+_PERMUTATIONS = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identity
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # rotate 90
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # rotate 180
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # rotate 270
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # mirror vertical axis
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # mirror horizontal axis
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # main diagonal
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),  # anti diagonal
+)
+
+def _build_symmetry_tables() -> tuple[tuple[int, ...], ...]:
+    """
+    Function name: _build_symmetry_tables
+    Objective: Precompute the image of every 9-bit mask under every symmetry
+    Input: None
+    Output: tuple[tuple[int, ...], ...] (8 tables of 512 masks)
+    """
+    tables = []
+    for perm in _PERMUTATIONS:
+        table = []
+        for mask in range(FULL + 1):
+            image = 0
+            for cell in range(9):
+                if mask >> perm[cell] & 1:
+                    image |= 1 << cell
+            table.append(image)
+        tables.append(tuple(table))
+    return tuple(tables)
+
+SYMMETRY_TABLES = _build_symmetry_tables()
+
+# Transposition table: canonical key -> (flag, value)
+EXACT, LOWER, UPPER = 0, 1, 2
+transposition_table = {}
+
+# Number of nodes searched by the last call of search/minimax
+last_nodes = 0
+_nodes = 0
+
+
+def from_board(board: list[int]) -> tuple[int, int]:
+    """
+    Function name: from_board
+    Objective: Convert a board list to the X and O bit masks
+    Input: board: list[int]
+    Output: tuple[int, int]
+    """
+    x = o = 0
+    for i, cell in enumerate(board):
+        if cell == 1:
+            x |= 1 << i
+        elif cell == 2:
+            o |= 1 << i
+    return x, o
+
+def is_win(mask: int) -> bool:
+    """
+    Function name: is_win
+    Objective: Check if a mask contains a winning line
+    Input: mask: int
+    Output: bool
+    """
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+def canonical_key(x: int, o: int, player: int) -> int:
+    """
+    Function name: canonical_key
+    Objective: Return the same key for all the symmetric versions of a position
+    Input: x: int, o: int, player: int
+    Output: int
+    """
+    return min((table[x] << 10) | (table[o] << 1) for table in SYMMETRY_TABLES) | (player - 1)
+
+def _terminal(x: int, o: int) -> int | None:
+    """
+    Function name: _terminal
+    Objective: Return the score of a finished game (O wins = 1), None if the game is not over
+    Input: x: int, o: int
+    Output: int | None
+    """
+    # Same order as player.minimax: X win, O win, full board
+    if is_win(x):
+        return -1
+    if is_win(o):
+        return 1
+    if (x | o) == FULL:
+        return 0
+    return None
+
+def _ordered_moves(own: int, other: int) -> list[int]:
+    """
+    Function name: _ordered_moves
+    Objective: Return the empty cells, winning moves first, then blocking moves, then the static order
+    Input: own: int, other: int
+    Output: list[int]
+    """
+    empty = FULL & ~(own | other)
+    wins, blocks, rest = [], [], []
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if not empty & bit:
+            continue
+        if is_win(own | bit):
+            wins.append(cell)
+        elif is_win(other | bit):
+            blocks.append(cell)
+        else:
+            rest.append(cell)
+    return wins + blocks + rest
+
+def _negamax(x: int, o: int, player: int, alpha: int, beta: int) -> int:
+    """
+    Function name: _negamax
+    Objective: Negamax with alpha-beta pruning and a transposition table
+    Input: x: int, o: int, player: int (side to move), alpha: int, beta: int
+    Output: int (score for the side to move)
+    """
+    global _nodes
+    _nodes += 1
+
+    score = _terminal(x, o)
+    if score is not None:
+        return score if player == 2 else -score
+
+    key = canonical_key(x, o, player)
+    entry = transposition_table.get(key)
+    if entry is not None:
+        flag, value = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    alpha_start = alpha
+    best = -2
+    own, other = (x, o) if player == 1 else (o, x)
+    for cell in _ordered_moves(own, other):
+        bit = 1 << cell
+        if player == 1:
+            value = -_negamax(x | bit, o, 2, -beta, -alpha)
+        else:
+            value = -_negamax(x, o | bit, 1, -beta, -alpha)
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+
+    if best <= alpha_start:
+        transposition_table[key] = (UPPER, best)
+    elif best >= beta:
+        transposition_table[key] = (LOWER, best)
+    else:
+        transposition_table[key] = (EXACT, best)
+    return best
+
+def search(player: int, board: list[int]) -> tuple[int | None, int, int]:
+    """
+    Function name: search
+    Objective: Find the best move, its score (O wins = 1) and the number of nodes searched
+    Input: player: int, board: list[int]
+    Output: tuple[int | None, int, int]
+    """
+    global _nodes, last_nodes
+    _nodes = 0
+    x, o = from_board(board)
+
+    score = _terminal(x, o)
+    if score is not None:
+        last_nodes = 1
+        return None, score, 1
+
+    value = _negamax(x, o, player, -2, 2)
+
+    # Return the first cell (like player.minimax) that keeps the value,
+    # each check is a null window search around the value
+    move = None
+    for cell in range(9):
+        bit = 1 << cell
+        if (x | o) & bit:
+            continue
+        if player == 1:
+            child = _negamax(x | bit, o, 2, -value, -value + 1)
+        else:
+            child = _negamax(x, o | bit, 1, -value, -value + 1)
+        if child <= -value:
+            move = cell
+            break
+
+    last_nodes = _nodes
+    return move, value if player == 2 else -value, _nodes
+
+def minimax(player: int, board: list[int]) -> tuple[int | None, float | None]:
+    """
+    Function name: minimax
+    Objective: Same contract as player.minimax, using the bit board engine
+    Input: player: int, board: list[int]
+    Output: tuple[int | None, float | None]
+    """
+    move, score, _ = search(player, board)
+    return move, score
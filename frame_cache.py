@@ -0,0 +1,179 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: frame_cache.py
+Descriere: Acest fișier conține memoria detecției: o imagine neschimbată nu mai este analizată,
+           iar la o imagine schimbată se reclasifică doar celulele modificate
+-----------------------------------------------------------------------
+"""
+
+import os
+import threading
+import zlib
+
+import cv2
+import numpy as np
+
+import detect
+import grid_locator
+
+
+class DetectionCache:
+    """
+    Class name: DetectionCache
+    Objective: Remember the last frame and board; detect only what changed since the last readGrid
+    """
+
+    def __init__(self, grid_size: int = 3, min_area: int = detect.MIN_AREA, tolerance: int = 0):
+        """
+        Function name: __init__
+        Objective: Initialize the cache
+        Input: grid_size: int, min_area: int,
+               tolerance: int (largest pixel difference of a cell that still counts as unchanged,
+               0 for screenshots, a few levels for a camera)
+        Output: None
+        """
+        self.grid_size = grid_size
+        self.min_area = min_area
+        self.tolerance = tolerance
+        self.lock = threading.Lock()
+        # The grid is searched in the whole frame only when it moved
+        self.locator = grid_locator.GridLocator(grid_size)
+
+        # Last file read: (path, mtime_ns, size)
+        self.file_key = None
+        # Last frame: content hash, grid geometry (x, y, square_size), grid pixels and color areas
+        self.frame_hash = None
+        self.geometry = None
+        self.region = None
+        self.red = None
+        self.green = None
+        self.board = None
+
+        self.file_hits = 0
+        self.hash_hits = 0
+        self.partial = 0
+        self.full = 0
+        self.cells_classified = 0
+
+    def read(self, path: str) -> list[list[int]]:
+        """
+        Function name: read
+        Objective: Return the board of an image file; the file is not even decoded if its
+                   modification time and size did not change
+        Input: path: str
+        Output: list[list[int]] (indexed [column][row] like detect.process_image)
+        """
+        stat = os.stat(path)
+        file_key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if file_key == self.file_key and self.board is not None:
+                self.file_hits += 1
+                return self.board
+
+        img = cv2.imread(path)
+        if img is None:
+            raise ValueError(f"Could not read the image {path}")
+        board = self.detect(img)
+        with self.lock:
+            self.file_key = file_key
+        return board
+
+    def detect(self, img: np.ndarray) -> list[list[int]]:
+        """
+        Function name: detect
+        Objective: Return the board of a decoded frame (same steps as detect.read_board), reusing
+                   the last board when the frame is identical and the areas of the unchanged cells
+        Input: img: np.ndarray (full size BGR image)
+        Output: list[list[int]]
+        """
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (w//2, h//2))
+        frame_hash = (small.shape, zlib.crc32(small.data))
+
+        with self.lock:
+            if frame_hash == self.frame_hash and self.board is not None:
+                self.hash_hits += 1
+                return self.board
+
+            x, y, width, _ = self.locator.locate(small)
+            square_size = width // self.grid_size
+            geometry = (x, y, square_size)
+            region = detect.grid_region(small, x, y, square_size, self.grid_size)
+
+            if geometry == self.geometry and self.region is not None:
+                red, green = self.update_changed_cells(region)
+                self.partial += 1
+            else:
+                red, green = detect.cell_color_areas(region, self.grid_size)
+                self.cells_classified += self.grid_size * self.grid_size
+                self.full += 1
+
+            self.frame_hash = frame_hash
+            self.geometry = geometry
+            self.region = region
+            self.red, self.green = red, green
+            self.board = detect.classify_areas(red, green, self.min_area)
+            return self.board
+
+    def changed_cells(self, region: np.ndarray) -> np.ndarray:
+        """
+        Function name: changed_cells
+        Objective: Compare the grid with the last one, cell by cell
+        Input: region: np.ndarray (same geometry as self.region)
+        Output: np.ndarray (bool, indexed [column][row])
+        """
+        n = self.grid_size
+        square_size = region.shape[0] // n
+        diff = cv2.absdiff(region, self.region)
+        # (row, y, column, x, channel) -> largest difference per cell, then [column][row]
+        cells = diff.reshape(n, square_size, n, square_size, -1).max(axis=(1, 3, 4))
+        return (cells > self.tolerance).T
+
+    def update_changed_cells(self, region: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Function name: update_changed_cells
+        Objective: Measure the color areas again only in the cells whose pixels changed
+        Input: region: np.ndarray
+        Output: tuple[np.ndarray, np.ndarray] (red and green areas, indexed [column][row])
+        """
+        square_size = region.shape[0] // self.grid_size
+        red, green = self.red.copy(), self.green.copy()
+        for column, row in zip(*np.nonzero(self.changed_cells(region))):
+            cell = region[row * square_size:(row + 1) * square_size, column * square_size:(column + 1) * square_size]
+            cell_red, cell_green = detect.cell_color_areas(cell, 1)
+            red[column, row] = cell_red[0, 0]
+            green[column, row] = cell_green[0, 0]
+            self.cells_classified += 1
+        return red, green
+
+    def invalidate(self):
+        """
+        Function name: invalidate
+        Objective: Forget the last frame (the next one is detected from scratch)
+        Input: None
+        Output: None
+        """
+        with self.lock:
+            self.file_key = None
+            self.frame_hash = None
+            self.geometry = None
+            self.region = None
+            self.board = None
+            self.locator.invalidate()
+
+    def stats(self) -> dict:
+        """
+        Function name: stats
+        Objective: Return the cache counters
+        Input: None
+        Output: dict
+        """
+        return {
+            "file_hits": self.file_hits,
+            "hash_hits": self.hash_hits,
+            "partial": self.partial,
+            "full": self.full,
+            "cells_classified": self.cells_classified,
+            "grid": self.locator.stats(),
+        }
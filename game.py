@@ -0,0 +1,259 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: game.py
+Descriere: Acest fișier păstrează starea jocului pe server: tabla, mutările și cine urmează;
+           răspunsurile la mutările posibile ale omului sunt calculate dinainte
+-----------------------------------------------------------------------
+"""
+
+import threading
+import time
+
+# Answers kept at most (the 3x3 game has 5478 positions)
+MAX_ANSWERS = 100_000
+
+# Result of GameSession.observe
+SYNCED = "synced"        # first board of the game, taken as it is
+MOVED = "moved"          # the human made one legal move, the robot moves next
+UNCHANGED = "unchanged"  # no new move since the last one
+
+
+class IllegalBoard(Exception):
+    """
+    Class name: IllegalBoard
+    Objective: Raised when the detected board can not follow the board of the session
+    """
+
+
+class GameSession:
+    """
+    Class name: GameSession
+    Objective: The authoritative board of the game, its moves and the side to move; the robot
+               replies to the possible human moves are searched while the human thinks
+    """
+
+    def __init__(self, grid_size: int = 3, search=None, ponder_budget: float = 1.0, ponder_search=None,
+                 ponder_total: float = 4.0):
+        """
+        Function name: __init__
+        Objective: Initialize the session
+        Input: grid_size: int, search: callable (piece, board, time_budget) -> (move, score),
+               ponder_budget: float (seconds of search for every possible human move, 0 = no pondering),
+               ponder_search: callable | None ((piece, board, time_budget, stop) -> (move, score), used while
+               pondering so the pondering never holds the engine of the real moves; stop is a threading.Event
+               set by stop_pondering that must end the search at once; None = search, stopped between moves),
+               ponder_total: float (seconds of pondering for all the moves of one human turn)
+        Output: None
+        """
+        self.grid_size = grid_size
+        self.search = search
+        self.ponder_search = ponder_search
+        if ponder_search is None:
+            self.ponder_search = lambda piece, board, time_budget, stop: search(piece, board, time_budget)
+        self.ponder_budget = ponder_budget
+        self.ponder_total = ponder_total
+        self.lock = threading.RLock()
+
+        # Answers already searched: (piece, board) -> (move, score)
+        self.answers = {}
+        # Stop flag of the running pondering (a new one for every pondering)
+        self.ponder_stop = threading.Event()
+        self.ponder_thread = None
+
+        self.answer_hits = 0
+        self.searches = 0
+        self.illegal = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Function name: reset
+        Objective: Start a new game (the next board read is taken as it is)
+        Input: None
+        Output: None
+        """
+        with self.lock:
+            self.board = [0] * (self.grid_size * self.grid_size)
+            # (cell, piece) of every move, in order
+            self.history = []
+            self.turn = 1
+            self.synced = False
+            # The side of the robot, known after its first move
+            self.robot_piece = None
+            self.stop_pondering()
+
+    def observe(self, detected: list[int]) -> str:
+        """
+        Function name: observe
+        Objective: Check the detected board against the session board and apply the human move
+        Input: detected: list[int] (row by row, like detect.convert_matrix)
+        Output: str (SYNCED, MOVED or UNCHANGED), raises IllegalBoard
+        """
+        with self.lock:
+            if not self.synced:
+                num_x, num_o = detected.count(1), detected.count(2)
+                if num_x - num_o not in (0, 1):
+                    self.illegal += 1
+                    raise IllegalBoard(f"{num_x} X and {num_o} O is not a position of a game")
+                self.board = list(detected)
+                self.history = []
+                self.turn = 1 if num_x == num_o else 2
+                self.synced = True
+                return SYNCED
+
+            # The last robot move may not be visible yet
+            pending = self.history[-1][0] if self.history and self.history[-1][1] != self.turn else None
+            added = []
+            for cell, (old, new) in enumerate(zip(self.board, detected)):
+                if old == new or (cell == pending and new == 0):
+                    continue
+                if old != 0:
+                    self.illegal += 1
+                    raise IllegalBoard(f"Cell {cell} changed from {old} to {new}")
+                added.append((cell, new))
+
+            if not added:
+                return UNCHANGED
+            if len(added) > 1 or added[0][1] != self.turn:
+                self.illegal += 1
+                raise IllegalBoard(f"Expected one move of {self.turn}, found {added}")
+
+            # The human moved: the answers to the other moves are no longer needed
+            self.stop_pondering()
+            self.play(*added[0])
+            return MOVED
+
+    def play(self, cell: int, piece: int, robot: bool = False):
+        """
+        Function name: play
+        Objective: Apply a move (of the human or of the robot) and pass the turn
+        Input: cell: int, piece: int, robot: bool (the move was chosen by the server)
+        Output: None
+        """
+        with self.lock:
+            if robot:
+                self.robot_piece = piece
+            self.board[cell] = piece
+            self.history.append((cell, piece))
+            self.turn = 3 - piece
+            self.synced = True
+
+    def waiting_for_human(self) -> bool:
+        """
+        Function name: waiting_for_human
+        Objective: Check if the human has to move before the robot can
+        Input: None
+        Output: bool
+        """
+        return self.robot_piece is not None and self.turn != self.robot_piece
+
+    def undo(self, count: int = 2) -> int:
+        """
+        Function name: undo
+        Objective: Take back the last moves (by default the robot move and the human move before it)
+        Input: count: int
+        Output: int (moves taken back)
+        """
+        with self.lock:
+            self.stop_pondering()
+            undone = 0
+            while undone < count and self.history:
+                cell, piece = self.history.pop()
+                self.board[cell] = 0
+                self.turn = piece
+                undone += 1
+            return undone
+
+    def best_move(self, piece: int, time_budget: float) -> tuple[int | None, float | None]:
+        """
+        Function name: best_move
+        Objective: Return the move for the session board, searched while the human thought if possible
+        Input: piece: int, time_budget: float (seconds, if it has to be searched now)
+        Output: tuple[int | None, float | None] (move, score)
+        """
+        key = (piece, tuple(self.board))
+        answer = self.answers.get(key)
+        if answer is not None:
+            self.answer_hits += 1
+            return answer
+        self.searches += 1
+        answer = self.search(piece, list(self.board), time_budget)
+        self.remember(key, answer)
+        return answer
+
+    def remember(self, key: tuple, answer: tuple):
+        """
+        Function name: remember
+        Objective: Keep an answer (all of them are forgotten when there are too many)
+        Input: key: tuple (piece, board), answer: tuple (move, score)
+        Output: None
+        """
+        if len(self.answers) >= MAX_ANSWERS:
+            self.answers = {}
+        self.answers[key] = answer
+
+    def ponder(self):
+        """
+        Function name: ponder
+        Objective: Search the robot answer to every possible human move, on a separate thread
+        Input: None
+        Output: None
+        """
+        if self.ponder_budget <= 0 or self.search is None:
+            return
+        with self.lock:
+            self.stop_pondering()
+            stop = self.ponder_stop = threading.Event()
+            board = list(self.board)
+            human = self.turn
+
+        def run():
+            deadline = time.perf_counter() + self.ponder_total
+            for cell in [i for i, value in enumerate(board) if value == 0]:
+                budget = min(self.ponder_budget, deadline - time.perf_counter())
+                if stop.is_set() or budget <= 0:
+                    return
+                reply = list(board)
+                reply[cell] = human
+                key = (3 - human, tuple(reply))
+                if key in self.answers or 0 not in reply:
+                    continue
+                started = time.perf_counter()
+                answer = self.ponder_search(3 - human, reply, budget, stop)
+                if stop.is_set():
+                    # Stopped in the middle of the search, the answer is not searched enough
+                    return
+                self.remember(key, answer)
+                if time.perf_counter() - started > budget * 2:
+                    # The engine is busy with the real commands, stop competing with them
+                    return
+
+        self.ponder_thread = threading.Thread(target=run, name="ponder", daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        """
+        Function name: stop_pondering
+        Objective: Stop the pondering now (the search in progress ends at its next clock check)
+        Input: None
+        Output: None
+        """
+        self.ponder_stop.set()
+
+    def stats(self) -> dict:
+        """
+        Function name: stats
+        Objective: Return the session state and counters
+        Input: None
+        Output: dict
+        """
+        return {
+            "board": list(self.board),
+            "history": [list(move) for move in self.history],
+            "turn": self.turn,
+            "answers": len(self.answers),
+            "answer_hits": self.answer_hits,
+            "searches": self.searches,
+            "illegal": self.illegal,
+        }
@@ -0,0 +1,142 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: grid_locator.py
+Descriere: Acest fișier păstrează poziția grilei între imagini și o caută din nou doar dacă s-a mișcat
+-----------------------------------------------------------------------
+"""
+
+import cv2
+import numpy as np
+
+import detect
+
+
+def measure_edges(img: np.ndarray, box: tuple[int, int, int, int], threshold: float, band: int) -> tuple[int, int, int, int] | None:
+    """
+    Function name: measure_edges
+    Objective: Find the outermost dark pixels of the grid, looking only in a band around every side of the box
+    Input: img: np.ndarray (half size image), box: tuple[int, int, int, int] (x, y, w, h),
+           threshold: float (gray levels up to it are dark, like the Otsu threshold of the grid),
+           band: int (pixels searched on both sides of every edge)
+    Output: tuple[int, int, int, int] | None (left, top, right, bottom; None if a side has no dark pixel)
+    """
+    x, y, w, h = box
+    height, width = img.shape[:2]
+
+    def dark(top: int, bottom: int, left: int, right: int) -> np.ndarray:
+        strip = img[max(0, top):min(height, bottom), max(0, left):min(width, right)]
+        if strip.size == 0:
+            return np.zeros((0, 0), dtype=bool)
+        return cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY) <= threshold
+
+    columns = dark(y, y + h, x - band, x + band + 1).any(axis=0)
+    rows = dark(y - band, y + band + 1, x, x + w).any(axis=1)
+    right_columns = dark(y, y + h, x + w - 1 - band, x + w + band).any(axis=0)
+    bottom_rows = dark(y + h - 1 - band, y + h + band, x, x + w).any(axis=1)
+    if not (columns.any() and rows.any() and right_columns.any() and bottom_rows.any()):
+        return None
+
+    left = max(0, x - band) + int(np.argmax(columns))
+    top = max(0, y - band) + int(np.argmax(rows))
+    right = max(0, x + w - 1 - band) + len(right_columns) - 1 - int(np.argmax(right_columns[::-1]))
+    bottom = max(0, y + h - 1 - band) + len(bottom_rows) - 1 - int(np.argmax(bottom_rows[::-1]))
+    return left, top, right, bottom
+
+
+class GridLocator:
+    """
+    Class name: GridLocator
+    Objective: Remember where the grid is; later frames only check the edges of the grid
+    """
+
+    def __init__(self, grid_size: int = 3, band: int = 8, tolerance: int = 2):
+        """
+        Function name: __init__
+        Objective: Initialize the locator
+        Input: grid_size: int, band: int (pixels around every edge checked on every frame),
+               tolerance: int (largest edge drift in pixels that keeps the cached grid)
+        Output: None
+        """
+        self.grid_size = grid_size
+        self.band = band
+        self.tolerance = tolerance
+
+        self.box = None
+        self.threshold = None
+        self.edges = None
+        self.shape = None
+
+        self.hits = 0
+        self.relocalizations = 0
+        self.last_drift = 0
+
+    def locate(self, img: np.ndarray) -> tuple[int, int, int, int]:
+        """
+        Function name: locate
+        Objective: Return the bounding box of the grid, searching the whole image only when
+                   the grid is not cached or its edges moved more than the tolerance
+        Input: img: np.ndarray (half size image)
+        Output: tuple[int, int, int, int] (x, y, w, h)
+        """
+        if self.box is not None and img.shape == self.shape:
+            edges = measure_edges(img, self.box, self.threshold, self.band)
+            if edges is not None:
+                self.last_drift = max(abs(a - b) for a, b in zip(edges, self.edges))
+                if self.last_drift <= self.tolerance:
+                    self.hits += 1
+                    return self.box
+        return self.relocalize(img)
+
+    def relocalize(self, img: np.ndarray) -> tuple[int, int, int, int]:
+        """
+        Function name: relocalize
+        Objective: Search the whole image for the grid (detect.find_grid) and cache it
+        Input: img: np.ndarray (half size image)
+        Output: tuple[int, int, int, int]
+        """
+        self.relocalizations += 1
+        box, threshold = detect.find_grid(img)
+        self.box = box
+        self.threshold = threshold
+        self.shape = img.shape
+        self.edges = measure_edges(img, box, threshold, self.band)
+        self.last_drift = 0
+        if self.edges is None:
+            # The grid touches nothing dark at its own edges, it can not be checked later
+            self.box = None
+        return box
+
+    def cells(self) -> list[list[tuple[int, int, int, int]]]:
+        """
+        Function name: cells
+        Objective: Return the rectangle of every cell of the cached grid
+        Input: None
+        Output: list[list[tuple[int, int, int, int]]] ((x, y, w, h), indexed [column][row] like detect.process_image)
+        """
+        if self.box is None:
+            return []
+        x, y, w, _ = self.box
+        square_size = w // self.grid_size
+        return [
+            [(x + i * square_size, y + j * square_size, square_size, square_size) for j in range(self.grid_size)]
+            for i in range(self.grid_size)
+        ]
+
+    def invalidate(self):
+        """
+        Function name: invalidate
+        Objective: Forget the grid (the next frame searches the whole image)
+        Input: None
+        Output: None
+        """
+        self.box = None
+
+    def stats(self) -> dict:
+        """
+        Function name: stats
+        Objective: Return the cache counters
+        Input: None
+        Output: dict
+        """
+        return {"hits": self.hits, "relocalizations": self.relocalizations, "last_drift": self.last_drift}
@@ -0,0 +1,153 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: loadtest.py
+Descriere: Acest fișier rulează serverul cu robotul simulat și măsoară performanța sub încărcare
+-----------------------------------------------------------------------
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import cv2
+
+import async_server
+import metrics
+import robot_backend
+import server
+import synthetic
+
+# Commands sent by every client, in a loop
+COMMANDS = ("readGrid;;", "move;Start;", "test;;")
+
+
+def free_port() -> int:
+    """
+    Function name: free_port
+    Objective: Return a free TCP port on localhost
+    Input: None
+    Output: int
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def run_client(port: int, commands: int, pipeline: int) -> list[float]:
+    """
+    Function name: run_client
+    Objective: Send commands (up to pipeline at a time, with request ids) and measure the answer times
+    Input: port: int, commands: int, pipeline: int
+    Output: list[float] (seconds per command)
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await reader.readline()  # Connection established.
+
+    latencies = []
+    sent = {}
+    next_id = 0
+    while next_id < commands or sent:
+        while next_id < commands and len(sent) < pipeline:
+            command = COMMANDS[next_id % len(COMMANDS)]
+            sent[str(next_id)] = time.perf_counter()
+            writer.write(f"@{next_id};{command}\n".encode())
+            next_id += 1
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            break
+        request_id = json.loads(line).get("id")
+        if request_id in sent:
+            latencies.append(time.perf_counter() - sent.pop(request_id))
+
+    writer.close()
+    return latencies
+
+async def run_load(port: int, clients: int, commands: int, pipeline: int) -> list[float]:
+    """
+    Function name: run_load
+    Objective: Run all the clients at the same time
+    Input: port: int, clients: int, commands: int (per client), pipeline: int
+    Output: list[float]
+    """
+    results = await asyncio.gather(*(run_client(port, commands, pipeline) for _ in range(clients)))
+    return [latency for result in results for latency in result]
+
+async def run_async_server(robot_socket: server.RobotSocket, clients: int, commands: int, pipeline: int) -> list[float]:
+    """
+    Function name: run_async_server
+    Objective: Start the asyncio server and the clients in the same event loop
+    Input: robot_socket: server.RobotSocket, clients: int, commands: int, pipeline: int
+    Output: list[float]
+    """
+    server_task = asyncio.create_task(async_server.AsyncRobotServer(robot_socket).serve())
+    # Wait until the server accepts connections
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", robot_socket.port)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.05)
+    try:
+        return await run_load(robot_socket.port, clients, commands, pipeline)
+    finally:
+        server_task.cancel()
+
+
+def main():
+    """
+    Function name: main
+    Objective: Run the load test and print the results
+    Input: None
+    Output: None
+    """
+    parser = argparse.ArgumentParser(description="Load test the server with the simulated robot")
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--commands", type=int, default=60, help="commands per client")
+    parser.add_argument("--pipeline", type=int, default=1, help="commands in flight per client")
+    parser.add_argument("--move-latency", type=float, default=0.002, help="seconds per simulated move")
+    parser.add_argument("--call-latency", type=float, default=0.0002, help="seconds per simulated API call")
+    args = parser.parse_args()
+
+    image_path = os.path.join(tempfile.mkdtemp(), "board.png")
+    cv2.imwrite(image_path, synthetic.render_board([1, 0, 0, 0, 2, 0, 0, 0, 1]))
+
+    backend = robot_backend.create_backend("sim", move_latency=args.move_latency, call_latency=args.call_latency)
+    robot_socket = server.RobotSocket(port=free_port(), backend=backend, image_path=image_path)
+
+    started = time.perf_counter()
+    if args.mode == "async":
+        latencies = asyncio.run(run_async_server(robot_socket, args.clients, args.commands, args.pipeline))
+    else:
+        # The blocking server serves one client at a time
+        threading.Thread(target=robot_socket.connect, daemon=True).start()
+        time.sleep(0.2)
+        latencies = asyncio.run(run_load(robot_socket.port, 1, args.clients * args.commands, args.pipeline))
+    elapsed = time.perf_counter() - started
+
+    print(f"mode={args.mode} clients={args.clients} commands={len(latencies)} time={elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} commands/s")
+    print(
+        "latency ms: "
+        f"mean={statistics.mean(latencies) * 1e3:.1f} "
+        f"p50={metrics.percentile(latencies, 50) * 1e3:.1f} "
+        f"p95={metrics.percentile(latencies, 95) * 1e3:.1f} "
+        f"p99={metrics.percentile(latencies, 99) * 1e3:.1f} "
+        f"max={max(latencies) * 1e3:.1f}"
+    )
+    print(f"simulated RoboDK: {dict(backend.counters)}")
+    snapshot = json.loads(robot_socket.stats())
+    for name, summary in snapshot["spans"].items():
+        print(f"{name:<20} " + " ".join(f"{key}={value:.2f}" if key != "count" else f"{key}={value}" for key, value in summary.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,10 +11,36 @@ Ultima modificare: Ursan Bogdan-Gabriel 20/06/2024
 print("Project: Playing Tic-Tac-Toe with a robot using Computer Vision and RoboDK")
 print("Running main.py...")
 
+import sys
 import server
 
-s = server.RobotSocket()
+# Read the board from a camera (index) or a video file: --video <source>
+video_source = None
+if "--video" in sys.argv:
+    video_source = sys.argv[sys.argv.index("--video") + 1]
+
+# Append the timings and counters to a JSONL file: --metrics <path>
+metrics_path = None
+if "--metrics" in sys.argv:
+    metrics_path = sys.argv[sys.argv.index("--metrics") + 1]
+
+# Serve several robots from one process: --stations <config.json> (see stations.py)
+if "--stations" in sys.argv:
+    import asyncio
+    import stations
+    config = stations.load_stations(sys.argv[sys.argv.index("--stations") + 1])
+    manager = stations.StationManager(config["stations"], config.get("workers", 4), config.get("report_interval", 30.0))
+    asyncio.run(manager.serve())
+    sys.exit()
+
+s = server.RobotSocket(video_source=video_source, metrics_path=metrics_path)
 print("Initializing the server.")
 
-s.connect()
-print("Connecting to the Robot.")
+if "--async" in sys.argv:
+    # Serve many clients at once
+    import asyncio
+    import async_server
+    asyncio.run(async_server.AsyncRobotServer(s).serve())
+else:
+    s.connect()
+    print("Connecting to the Robot.")
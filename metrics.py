@@ -0,0 +1,310 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: metrics.py
+Descriere: Acest fișier măsoară cât durează fiecare etapă a unei comenzi și numără apelurile RoboDK
+-----------------------------------------------------------------------
+"""
+
+import collections
+import json
+import math
+import os
+import threading
+import time
+
+# Measuring can be switched off (TTT_METRICS=0 or enable(False)), a span then costs one call
+ENABLED = os.environ.get("TTT_METRICS", "1") != "0"
+
+# Latest durations kept per histogram for the percentiles
+SAMPLES = 2048
+
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    Function name: percentile
+    Objective: Return a percentile (nearest rank: the smallest value with at least p% of the values
+               smaller or equal)
+    Input: values: list[float], p: float (0 .. 100)
+    Output: float (0.0 for no values)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Histogram:
+    """
+    Class name: Histogram
+    Objective: The durations of one stage: count, total and max of all of them, percentiles of the latest
+    """
+
+    def __init__(self, samples: int = SAMPLES):
+        """
+        Function name: __init__
+        Objective: Initialize the histogram
+        Input: samples: int (latest durations kept)
+        Output: None
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=samples)
+
+    def add(self, seconds: float):
+        """
+        Function name: add
+        Objective: Add a duration
+        Input: seconds: float
+        Output: None
+        """
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        """
+        Function name: summary
+        Objective: Return the count and the times in milliseconds
+        Input: None
+        Output: dict (count, mean, p50, p95, p99, max)
+        """
+        samples = list(self.samples)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50": percentile(samples, 50) * 1e3,
+            "p95": percentile(samples, 95) * 1e3,
+            "p99": percentile(samples, 99) * 1e3,
+            "max": self.max * 1e3,
+        }
+
+
+class Span:
+    """
+    Class name: Span
+    Objective: Measure the time of a with block and add it to a histogram
+    """
+
+    def __init__(self, metrics, name: str):
+        """
+        Function name: __init__
+        Objective: Initialize the span
+        Input: metrics: Metrics, name: str
+        Output: None
+        """
+        self.metrics = metrics
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        """
+        Function name: __enter__
+        Objective: Start measuring
+        Input: None
+        Output: Span
+        """
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        """
+        Function name: __exit__
+        Objective: Stop measuring and add the time (also when the block raised)
+        Input: exc: the exception, if any
+        Output: bool (False, the exception is not handled)
+        """
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class NoSpan:
+    """
+    Class name: NoSpan
+    Objective: The span used when the measuring is off (does nothing)
+    """
+
+    def __enter__(self):
+        """
+        Function name: __enter__
+        Objective: Nothing to start
+        Input: None
+        Output: NoSpan
+        """
+        return self
+
+    def __exit__(self, *exc):
+        """
+        Function name: __exit__
+        Objective: Nothing to measure
+        Input: exc: the exception, if any
+        Output: bool (False)
+        """
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+class Metrics:
+    """
+    Class name: Metrics
+    Objective: The histograms and counters of the server, shared by all the threads
+    """
+
+    def __init__(self):
+        """
+        Function name: __init__
+        Objective: Initialize the metrics
+        Input: None
+        Output: None
+        """
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = collections.Counter()
+        self.since = time.time()
+        self.dump_thread = None
+        self.dump_stop = None
+
+    def span(self, name: str):
+        """
+        Function name: span
+        Objective: Return a context manager that measures a stage
+        Input: name: str (for example "detect" or "command.readGrid")
+        Output: Span | NoSpan
+        """
+        return Span(self, name) if ENABLED else NO_SPAN
+
+    def observe(self, name: str, seconds: float):
+        """
+        Function name: observe
+        Objective: Add a duration measured by the caller
+        Input: name: str, seconds: float
+        Output: None
+        """
+        if not ENABLED:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name: str, n: int = 1):
+        """
+        Function name: count
+        Objective: Increase a counter (for example "robodk.MoveJ")
+        Input: name: str, n: int
+        Output: None
+        """
+        if not ENABLED:
+            return
+        with self.lock:
+            self.counters[name] += n
+
+    def snapshot(self) -> dict:
+        """
+        Function name: snapshot
+        Objective: Return all the histograms (times in milliseconds) and counters
+        Input: None
+        Output: dict
+        """
+        with self.lock:
+            return {
+                "t": time.time(),
+                "since": self.since,
+                "enabled": ENABLED,
+                "spans": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def reset(self):
+        """
+        Function name: reset
+        Objective: Forget everything measured so far
+        Input: None
+        Output: None
+        """
+        with self.lock:
+            self.histograms = {}
+            self.counters = collections.Counter()
+            self.since = time.time()
+
+    def start_dump(self, path: str, interval: float = 10.0):
+        """
+        Function name: start_dump
+        Objective: Append a snapshot to a JSONL file every interval seconds, on its own thread
+        Input: path: str, interval: float
+        Output: None
+        """
+        self.stop_dump()
+        stop = threading.Event()
+        self.dump_stop = stop
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(self.snapshot()) + "\n")
+                except OSError as e:
+                    print(f"Could not write the metrics: {e}")
+
+        self.dump_thread = threading.Thread(target=run, name="metrics-dump", daemon=True)
+        self.dump_thread.start()
+
+    def stop_dump(self):
+        """
+        Function name: stop_dump
+        Objective: Stop writing the snapshots
+        Input: None
+        Output: None
+        """
+        if self.dump_stop is not None:
+            self.dump_stop.set()
+        self.dump_stop = None
+        self.dump_thread = None
+
+
+# The metrics of the process
+METRICS = Metrics()
+
+
+def enable(enabled: bool):
+    """
+    Function name: enable
+    Objective: Switch the measuring on or off
+    Input: enabled: bool
+    Output: None
+    """
+    global ENABLED
+    ENABLED = enabled
+
+def span(name: str):
+    """
+    Function name: span
+    Objective: Measure a stage in the process metrics (see Metrics.span)
+    Input: name: str
+    Output: Span | NoSpan
+    """
+    return METRICS.span(name)
+
+def observe(name: str, seconds: float):
+    """
+    Function name: observe
+    Objective: Add a duration to the process metrics
+    Input: name: str, seconds: float
+    Output: None
+    """
+    METRICS.observe(name, seconds)
+
+def count(name: str, n: int = 1):
+    """
+    Function name: count
+    Objective: Increase a counter of the process metrics
+    Input: name: str, n: int
+    Output: None
+    """
+    METRICS.count(name, n)
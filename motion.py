@@ -0,0 +1,306 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: motion.py
+Descriere: Acest fișier conține coada de mișcări ale robotului: desenele rulează pe un fir separat,
+           iar clienții primesc evenimente de început, progres și sfârșit
+-----------------------------------------------------------------------
+"""
+
+import collections
+import itertools
+import threading
+import time
+
+# Events sent to the listeners (also the status of the answer sent to the clients)
+MOTION_STARTED = "motion_started"
+MOTION_PROGRESS = "motion_progress"
+MOTION_DONE = "motion_done"
+MOTION_CANCELLED = "motion_cancelled"
+MOTION_FAILED = "motion_failed"
+
+# States of a job
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+
+
+class MotionQueueFull(Exception):
+    """
+    Class name: MotionQueueFull
+    Objective: Raised when too many motions are waiting
+    """
+
+
+class MotionCancelled(Exception):
+    """
+    Class name: MotionCancelled
+    Objective: Raised inside a running motion when its job was cancelled
+    """
+
+
+class MotionJob:
+    """
+    Class name: MotionJob
+    Objective: One drawing of the robot: a symbol in a cell
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, cell: int, symbol: int):
+        """
+        Function name: __init__
+        Objective: Initialize the job
+        Input: cell: int, symbol: int
+        Output: None
+        """
+        self.id = next(self._ids)
+        self.cell = cell
+        self.symbol = symbol
+        self.state = QUEUED
+        self.error = None
+        self.cancel_requested = threading.Event()
+        self.finished = threading.Event()
+        self.created = time.perf_counter()
+        self.started = None
+        self.ended = None
+
+    def cancelled(self) -> bool:
+        """
+        Function name: cancelled
+        Objective: Check if the job was cancelled (polled by the motion while it runs)
+        Input: None
+        Output: bool
+        """
+        return self.cancel_requested.is_set()
+
+
+class MotionExecutor:
+    """
+    Class name: MotionExecutor
+    Objective: Run the robot motions one at a time on a worker thread, with a bounded queue
+    """
+
+    def __init__(self, run, max_pending: int = 4):
+        """
+        Function name: __init__
+        Objective: Initialize the executor (the worker starts with the first job)
+        Input: run: callable (cell, symbol, progress, cancelled) that moves the robot; progress(done, total)
+               reports the finished steps and cancelled() tells when to stop (raise MotionCancelled;
+               a run that returns drew the whole symbol and ends DONE),
+               max_pending: int (jobs waiting to start)
+        Output: None
+        """
+        self.run = run
+        self.max_pending = max_pending
+        self.pending = collections.deque()
+        self.jobs = {}
+        self.current = None
+        self.listeners = []
+        self.condition = threading.Condition()
+        self.thread = None
+
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def add_listener(self, listener):
+        """
+        Function name: add_listener
+        Objective: Send the motion events to a function (called on the worker thread, or on the thread
+                   of cancel for a waiting job; never with the queue locked)
+        Input: listener: callable(dict)
+        Output: None
+        """
+        with self.condition:
+            self.listeners = self.listeners + [listener]
+
+    def remove_listener(self, listener):
+        """
+        Function name: remove_listener
+        Objective: Stop sending the events to a function
+        Input: listener: callable(dict)
+        Output: None
+        """
+        with self.condition:
+            self.listeners = [l for l in self.listeners if l is not listener]
+
+    def full(self) -> bool:
+        """
+        Function name: full
+        Objective: Check if a new job would be refused
+        Input: None
+        Output: bool
+        """
+        return len(self.pending) >= self.max_pending
+
+    def submit(self, cell: int, symbol: int) -> MotionJob:
+        """
+        Function name: submit
+        Objective: Queue a drawing
+        Input: cell: int, symbol: int
+        Output: MotionJob (raises MotionQueueFull)
+        """
+        with self.condition:
+            if self.full():
+                self.rejected += 1
+                raise MotionQueueFull(f"{len(self.pending)} motions are already waiting")
+            job = MotionJob(cell, symbol)
+            self.jobs[job.id] = job
+            self.pending.append(job)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._work, name="motion", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+            return job
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Function name: cancel
+        Objective: Cancel a job: a waiting one is removed, a running one is stopped by its motion
+                   (its end event says if it was stopped in time)
+        Input: job_id: int
+        Output: bool (False if the job is unknown or already finished)
+        """
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in (QUEUED, RUNNING):
+                return False
+            job.cancel_requested.set()
+            if job.state != QUEUED:
+                return True
+            self.pending.remove(job)
+            event = self._finish(job, CANCELLED)
+        self._announce(event, job)
+        return True
+
+    def cancel_all(self) -> list[MotionJob]:
+        """
+        Function name: cancel_all
+        Objective: Cancel the running job and all the waiting ones
+        Input: None
+        Output: list[MotionJob] (the jobs cancelled, oldest first)
+        """
+        with self.condition:
+            jobs = list(self.pending)
+            if self.current is not None:
+                jobs.insert(0, self.current)
+        # Newest first: the end events come in the reverse order of the moves (see RobotSocket.take_back)
+        cancelled = [job for job in reversed(jobs) if self.cancel(job.id)]
+        return cancelled[::-1]
+
+    def wait(self, job_id: int, timeout: float | None = None) -> str | None:
+        """
+        Function name: wait
+        Objective: Wait for a job to finish
+        Input: job_id: int, timeout: float | None
+        Output: str | None (the final state, None if unknown or still running)
+        """
+        job = self.jobs.get(job_id)
+        if job is None or not job.finished.wait(timeout):
+            return None
+        return job.state
+
+    def _emit(self, event: str, job: MotionJob, done: int = 0, total: int = 0):
+        """
+        Function name: _emit
+        Objective: Send an event to all the listeners
+        Input: event: str, job: MotionJob, done: int, total: int (steps)
+        Output: None
+        """
+        data = {"event": event, "job": job.id, "cell": job.cell, "symbol": job.symbol, "done": done, "total": total}
+        if job.error is not None:
+            data["error"] = job.error
+        for listener in self.listeners:
+            try:
+                listener(data)
+            except Exception as e:
+                print(f"Motion listener error: {e}")
+
+    def _finish(self, job: MotionJob, state: str) -> str:
+        """
+        Function name: _finish
+        Objective: Mark a job as finished (called with the queue locked, see _announce for its last event)
+        Input: job: MotionJob, state: str (DONE, CANCELLED or FAILED)
+        Output: str (the last event of the job)
+        """
+        job.state = state
+        job.ended = time.perf_counter()
+        if state == DONE:
+            self.completed += 1
+            event = MOTION_DONE
+        elif state == CANCELLED:
+            self.cancelled += 1
+            event = MOTION_CANCELLED
+        else:
+            self.failed += 1
+            event = MOTION_FAILED
+        # Forget the old jobs, keep the last ones for wait and cancel
+        while len(self.jobs) > 4 * self.max_pending + 16:
+            oldest = next(iter(self.jobs))
+            if self.jobs[oldest].state in (QUEUED, RUNNING):
+                break
+            del self.jobs[oldest]
+        return event
+
+    def _announce(self, event: str, job: MotionJob):
+        """
+        Function name: _announce
+        Objective: Send the last event of a finished job, then wake its waiters (called without the
+                   queue lock, a slow listener must not block submit and cancel)
+        Input: event: str, job: MotionJob
+        Output: None
+        """
+        self._emit(event, job)
+        job.finished.set()
+
+    def _work(self):
+        """
+        Function name: _work
+        Objective: Run the queued jobs one by one
+        Input: None
+        Output: None
+        """
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                job = self.pending.popleft()
+                job.state = RUNNING
+                job.started = time.perf_counter()
+                self.current = job
+            self._emit(MOTION_STARTED, job)
+
+            def progress(done: int, total: int, job=job):
+                self._emit(MOTION_PROGRESS, job, done, total)
+
+            try:
+                self.run(job.cell, job.symbol, progress, job.cancelled)
+            except MotionCancelled:
+                state = CANCELLED
+            except Exception as e:
+                job.error = str(e)
+                print(f"Motion {job.id} failed: {e}")
+                state = FAILED
+            else:
+                state = DONE
+            with self.condition:
+                self.current = None
+                event = self._finish(job, state)
+            self._announce(event, job)
+
+    def stats(self) -> dict:
+        """
+        Function name: stats
+        Objective: Return the queue state and counters
+        Input: None
+        Output: dict
+        """
+        current = self.current
+        return {
+            "running": current.id if current is not None else None,
+            "pending": [job.id for job in list(self.pending)],
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,353 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: nk_engine.py
+Descriere: Acest fișier conține un motor pentru table N×N cu K în linie (iterative deepening cu limită de timp)
+-----------------------------------------------------------------------
+"""
+
+import random
+import threading
+import time
+
+# Score of a won position (a win found earlier in the search scores higher)
+WIN = 1_000_000
+
+# Heuristic value of a window that holds only stones of one player, by stone count
+WINDOW_WEIGHTS = (0, 1, 10, 100, 1_000, 10_000, 100_000)
+
+# Nodes searched between two checks of the clock
+CLOCK_CHECK = 512
+
+# The transposition table is cleared when it grows past this size
+MAX_TABLE_SIZE = 1_000_000
+
+# Stop flag of the searches that are only ended by their time budget
+NEVER = threading.Event()
+
+
+class SearchTimeout(Exception):
+    """
+    Class name: SearchTimeout
+    Objective: Raised inside the search when the time budget is used up or the search was stopped
+    """
+
+
+class NKEngine:
+    """
+    Class name: NKEngine
+    Objective: Play K in a row on an N×N board (board encoding as in player.py: 0 empty, 1 X, 2 O)
+    """
+
+    def __init__(self, size: int = 3, win_length: int = 3, time_budget: float = 1.0, max_depth: int | None = None, radius: int = 2, seed: int = 2024):
+        """
+        Function name: __init__
+        Objective: Precompute the winning windows, the heuristic weights and the Zobrist keys
+        Input: size: int, win_length: int, time_budget: float (seconds per move),
+               max_depth: int | None, radius: int (candidate moves distance to a stone), seed: int
+        Output: None
+        """
+        if win_length > size:
+            raise ValueError("The win length can not be larger than the board")
+        self.size = size
+        self.win_length = win_length
+        self.cells = size * size
+        self.time_budget = time_budget
+        self.max_depth = max_depth if max_depth is not None else self.cells
+        self.radius = radius
+
+        weights = list(WINDOW_WEIGHTS) + [WINDOW_WEIGHTS[-1]] * max(0, win_length - len(WINDOW_WEIGHTS) + 1)
+        self.weights = weights[:win_length + 1]
+
+        # All the windows of win_length cells (rows, columns, both diagonals)
+        self.windows = []
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + d_row * (win_length - 1)
+                    end_col = col + d_col * (win_length - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        self.windows.append(tuple((row + d_row * k) * size + col + d_col * k for k in range(win_length)))
+        self.cell_windows = [[] for _ in range(self.cells)]
+        for index, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(index)
+
+        # Neighbour cells used to generate the candidate moves
+        self.neighbours = []
+        for cell in range(self.cells):
+            row, col = divmod(cell, size)
+            self.neighbours.append([
+                r * size + c
+                for r in range(max(0, row - radius), min(size, row + radius + 1))
+                for c in range(max(0, col - radius), min(size, col + radius + 1))
+                if (r, c) != (row, col)
+            ])
+
+        # Central cells first when the scores are equal
+        center = (size - 1) / 2
+        self.cell_order = sorted(range(self.cells), key=lambda c: abs(c // size - center) + abs(c % size - center))
+
+        rng = random.Random(seed)
+        self.zobrist = [[0, rng.getrandbits(64), rng.getrandbits(64)] for _ in range(self.cells)]
+        self.zobrist_side = rng.getrandbits(64)
+
+        self.transposition_table = {}
+        self.last_nodes = 0
+        self.last_depth = 0
+
+    # ----- position state -----
+
+    def _load(self, board: list[int], player: int):
+        """
+        Function name: _load
+        Objective: Set up the search state (window counts, evaluation, hash) for a board
+        Input: board: list[int], player: int (side to move)
+        Output: None
+        """
+        self.board = list(board)
+        self.counts = [[0, 0, 0] for _ in self.windows]
+        for index, window in enumerate(self.windows):
+            for cell in window:
+                self.counts[index][self.board[cell]] += 1
+        self.score = sum(self._window_value(counts) for counts in self.counts)
+        self.hash = 0
+        for cell, stone in enumerate(self.board):
+            if stone:
+                self.hash ^= self.zobrist[cell][stone]
+        if player == 2:
+            self.hash ^= self.zobrist_side
+        self.empty = self.board.count(0)
+
+    def _window_value(self, counts: list[int]) -> int:
+        """
+        Function name: _window_value
+        Objective: Heuristic value of a window for O (positive) and X (negative)
+        Input: counts: list[int] (empty, X, O stones in the window)
+        Output: int
+        """
+        if counts[1] and counts[2]:
+            return 0
+        if counts[2]:
+            return self.weights[counts[2]]
+        return -self.weights[counts[1]]
+
+    def _place(self, cell: int, stone: int) -> bool:
+        """
+        Function name: _place
+        Objective: Put a stone on the board and update the state
+        Input: cell: int, stone: int
+        Output: bool (True if the move completes a line)
+        """
+        won = False
+        for index in self.cell_windows[cell]:
+            counts = self.counts[index]
+            self.score -= self._window_value(counts)
+            counts[0] -= 1
+            counts[stone] += 1
+            self.score += self._window_value(counts)
+            if counts[stone] == self.win_length:
+                won = True
+        self.board[cell] = stone
+        self.hash ^= self.zobrist[cell][stone] ^ self.zobrist_side
+        self.empty -= 1
+        return won
+
+    def _remove(self, cell: int, stone: int):
+        """
+        Function name: _remove
+        Objective: Take back a stone placed with _place
+        Input: cell: int, stone: int
+        Output: None
+        """
+        for index in self.cell_windows[cell]:
+            counts = self.counts[index]
+            self.score -= self._window_value(counts)
+            counts[stone] -= 1
+            counts[0] += 1
+            self.score += self._window_value(counts)
+        self.board[cell] = 0
+        self.hash ^= self.zobrist[cell][stone] ^ self.zobrist_side
+        self.empty += 1
+
+    def winner(self, board: list[int]) -> int:
+        """
+        Function name: winner
+        Objective: Return the player with K in a row (0 if nobody)
+        Input: board: list[int]
+        Output: int
+        """
+        for window in self.windows:
+            stone = board[window[0]]
+            if stone and all(board[cell] == stone for cell in window):
+                return stone
+        return 0
+
+    # ----- search -----
+
+    def _candidates(self, best: int | None) -> list[int]:
+        """
+        Function name: _candidates
+        Objective: Return the moves to search, best move of the transposition table first
+        Input: best: int | None
+        Output: list[int]
+        """
+        board = self.board
+        if self.empty == self.cells:
+            return [self.cell_order[0]]
+        if self.cells <= 25:
+            moves = [cell for cell in self.cell_order if board[cell] == 0]
+        else:
+            moves = [cell for cell in self.cell_order if board[cell] == 0 and any(board[n] for n in self.neighbours[cell])]
+        # Cells that are part of many open windows first
+        moves.sort(key=lambda c: -sum(1 for i in self.cell_windows[c] if not (self.counts[i][1] and self.counts[i][2])))
+        if not moves:
+            # No empty cell within radius of a stone (radius 0): search every empty cell
+            moves = [cell for cell in self.cell_order if board[cell] == 0]
+        if best is not None and best in moves:
+            moves.remove(best)
+            moves.insert(0, best)
+        return moves
+
+    def _to_table(self, value: int, ply: int) -> int:
+        """
+        Function name: _to_table
+        Objective: Convert a score to the form kept in the transposition table: a win is counted
+                   from the stored node, not from the root, so it is valid at any ply
+        Input: value: int, ply: int
+        Output: int
+        """
+        if value >= WIN - self.cells:
+            return value + ply
+        if value <= -(WIN - self.cells):
+            return value - ply
+        return value
+
+    def _from_table(self, value: int, ply: int) -> int:
+        """
+        Function name: _from_table
+        Objective: Convert a transposition table score back to a score counted from the root
+        Input: value: int, ply: int
+        Output: int
+        """
+        if value >= WIN - self.cells:
+            return value - ply
+        if value <= -(WIN - self.cells):
+            return value + ply
+        return value
+
+    def _negamax(self, player: int, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """
+        Function name: _negamax
+        Objective: Depth limited negamax with alpha-beta pruning and a Zobrist transposition table
+        Input: player: int, depth: int, alpha: int, beta: int, ply: int
+        Output: int (score for the side to move)
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK == 0 and (time.perf_counter() > self.deadline or self.stop.is_set()):
+            raise SearchTimeout()
+
+        if self.empty == 0:
+            return 0
+        if depth == 0:
+            return self.score if player == 2 else -self.score
+
+        alpha_start = alpha
+        entry = self.transposition_table.get(self.hash)
+        best_move = None
+        if entry is not None:
+            entry_depth, flag, value, best_move = entry
+            value = self._from_table(value, ply)
+            if entry_depth >= depth:
+                if flag == 0:
+                    return value
+                if flag == 1:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best = -WIN - 1
+        for cell in self._candidates(best_move):
+            if self._place(cell, player):
+                value = WIN - ply
+            else:
+                value = -self._negamax(3 - player, depth - 1, -beta, -alpha, ply + 1)
+            self._remove(cell, player)
+            if value > best:
+                best = value
+                best_move = cell
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        flag = 2 if best <= alpha_start else 1 if best >= beta else 0
+        self.transposition_table[self.hash] = (depth, flag, self._to_table(best, ply), best_move)
+        return best
+
+    def search(self, player: int, board: list[int], time_budget: float | None = None,
+               stop: threading.Event | None = None) -> tuple[int | None, int, int, int]:
+        """
+        Function name: search
+        Objective: Iterative deepening search, returns the best move found when the time is up
+        Input: player: int, board: list[int], time_budget: float | None (seconds, default self.time_budget),
+               stop: threading.Event | None (polled with the clock: ends the search early when it is set,
+               from another thread)
+        Output: tuple[int | None, int, int, int] (move, score for the side to move, depth, nodes)
+        """
+        if len(board) != self.cells:
+            raise ValueError(f"Expected a board with {self.cells} cells, got {len(board)}")
+        budget = self.time_budget if time_budget is None else time_budget
+        if len(self.transposition_table) > MAX_TABLE_SIZE:
+            self.transposition_table.clear()
+        self.deadline = time.perf_counter() + budget
+        self.stop = stop if stop is not None else NEVER
+        self.nodes = 0
+        self._load(board, player)
+
+        if self.winner(board) or self.empty == 0:
+            self.last_nodes, self.last_depth = 0, 0
+            return None, 0, 0, 0
+
+        # Always have a legal move, even if the first iteration does not finish
+        move = self._candidates(None)[0]
+        score = 0
+        depth = 0
+        for current in range(1, min(self.max_depth, self.empty) + 1):
+            try:
+                value = self._negamax(player, current, -WIN - 1, WIN + 1, 1)
+            except SearchTimeout:
+                # The state was left in the middle of the search
+                self._load(board, player)
+                break
+            move = self.transposition_table[self.hash][3]
+            score = value
+            depth = current
+            # Stop when the game result is known
+            if abs(value) >= WIN - self.cells:
+                break
+
+        self.last_nodes, self.last_depth = self.nodes, depth
+        return move, score, depth, self.nodes
+
+    def minimax(self, player: int, board: list[int], time_budget: float | None = None,
+                stop: threading.Event | None = None) -> tuple[int | None, float | None]:
+        """
+        Function name: minimax
+        Objective: Same contract as player.minimax (score 1 O wins, -1 X wins, 0 otherwise)
+        Input: player: int, board: list[int], time_budget: float | None, stop: threading.Event | None (see search)
+        Output: tuple[int | None, float | None]
+        """
+        winner = self.winner(board)
+        if winner:
+            return None, 1 if winner == 2 else -1
+        if 0 not in board:
+            return None, 0
+
+        move, score, _, _ = self.search(player, board, time_budget, stop)
+        result = 0
+        if abs(score) >= WIN - self.cells:
+            result = 1 if (score > 0) == (player == 2) else -1
+        return move, result
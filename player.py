@@ -8,6 +8,13 @@ Ultima modificare: Ursan Bogdan-Gabriel 20/06/2024
 -----------------------------------------------------------------------
 """
 
+import mmap
+import os
+import struct
+import sys
+import zlib
+import engine
+
 board = [0 for _ in range(9)]  # 0 represents an empty space
 
 def is_board_full(board : list[int]):
@@ -41,10 +48,10 @@ def check_winner(player : int,board : list[int]):
         return True
     return False
 
-# Minimax function
-def minimax(player : int,board :list[int]) -> tuple[int | None,float | None]:
+# Minimax function (full recursive search, used to build and check the table)
+def search_minimax(player : int,board :list[int]) -> tuple[int | None,float | None]:
     """
-    Function name: minimax
+    Function name: search_minimax
     Objective: Implement the minimax algorithm
     Input: player: int, board: list[int]
     Output: tuple[int | None,float | None]
@@ -62,7 +69,7 @@ def minimax(player : int,board :list[int]) -> tuple[int | None,float | None]:
         for i in range(9):
             if board[i] == 0:
                 board[i] = player
-                _, score = minimax(1,board)
+                _, score = search_minimax(1,board)
                 board[i] = 0
                 if score is not None and (best_score is None or score > best_score):
                     best_score = score
@@ -72,7 +79,7 @@ def minimax(player : int,board :list[int]) -> tuple[int | None,float | None]:
         for i in range(9):
             if board[i] == 0:
                 board[i] = player
-                _, score = minimax(2,board)
+                _, score = search_minimax(2,board)
                 board[i] = 0
                 if score is not None and score < best_score:
                     best_score = score
@@ -80,6 +87,300 @@ def minimax(player : int,board :list[int]) -> tuple[int | None,float | None]:
 
     return best_move, best_score
 
+# Engine used by minimax: "table" (solution table, bit board engine for other
+# positions), "bitboard" (always the bit board engine) or "search" (recursive search)
+ENGINE = "table"
+
+# Solved game table: (player, board) -> (best move, score, all equally good moves)
+_solution_table = None
+
+def _solve(player : int, board : list[int], table : dict) -> int:
+    """
+    Function name: _solve
+    Objective: Fill the solution table for a position and all positions reachable from it
+    Input: player: int, board: list[int], table: dict
+    Output: int (the score of the position)
+    """
+    key = (player, tuple(board))
+    if key in table:
+        return table[key][1]
+
+    if check_winner(1, board):
+        table[key] = (None, -1, [])
+        return -1
+    if check_winner(2, board):
+        table[key] = (None, 1, [])
+        return 1
+    if is_board_full(board):
+        table[key] = (None, 0, [])
+        return 0
+
+    scores = {}
+    for i in range(9):
+        if board[i] == 0:
+            board[i] = player
+            scores[i] = _solve(3 - player, board, table)
+            board[i] = 0
+
+    # O (2) maximizes, X (1) minimizes, same as search_minimax
+    best_score = max(scores.values()) if player == 2 else min(scores.values())
+    best_moves = [i for i in scores if scores[i] == best_score]
+    # search_minimax keeps the first move that reaches the best score
+    table[key] = (best_moves[0], best_score, best_moves)
+    return best_score
+
+def solve_table() -> dict:
+    """
+    Function name: solve_table
+    Objective: Build the table with the solution of every legal position
+    Input: None
+    Output: dict[tuple[int, tuple[int, ...]], tuple[int | None, int, list[int]]]
+    """
+    table = {}
+    # X (1) always starts the game
+    _solve(1, [0] * 9, table)
+    return table
+
+def solution_table() -> dict:
+    """
+    Function name: solution_table
+    Objective: Return (once) the solution of every legal position, mapped from the book file
+               (see BOOK_PATH), or built in memory if there is no book
+    Input: None
+    Output: SolutionBook | dict (same keys and values as solve_table)
+    """
+    global _solution_table
+    if _solution_table is None:
+        _solution_table = load_book(BOOK_PATH) if BOOK_PATH else solve_table()
+    return _solution_table
+
+def position_index(board : list[int]) -> int:
+    """
+    Function name: position_index
+    Objective: Return the index of a position (the board read as a base 3 number, cell 0 first)
+    Input: board: list[int]
+    Output: int (0 .. 3**9 - 1)
+    """
+    index = 0
+    for cell in reversed(board):
+        index = index * 3 + cell
+    return index
+
+# Solution book: the solution table saved as a binary file, memory mapped by every process.
+# Header: magic, version, known positions, CRC32 of the records. Then one little endian
+# uint16 per (player, position index): bits 0-8 best moves mask, bits 9-10 score + 1, bit 11 known.
+BOOK_MAGIC = b"TTTB"
+BOOK_VERSION = 1
+BOOK_HEADER = struct.Struct("<4sHII")
+BOOK_RECORD = struct.Struct("<H")
+BOOK_POSITIONS = 3 ** 9
+BOOK_SIZE = BOOK_HEADER.size + 2 * BOOK_POSITIONS * BOOK_RECORD.size
+BOOK_KNOWN = 1 << 11
+
+# Where the book is saved (None = build the table in memory at every start)
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "solution_book.bin")
+
+
+class SolutionBook:
+    """
+    Class name: SolutionBook
+    Objective: Read only view of a memory mapped solution book, used like the dict of solve_table
+    """
+
+    def __init__(self, data):
+        """
+        Function name: __init__
+        Objective: Initialize the book (the data is checked by read_book)
+        Input: data: mmap.mmap | bytes
+        Output: None
+        """
+        self.data = data
+        _, _, self.known, _ = BOOK_HEADER.unpack_from(data)
+
+    def _record(self, key: tuple) -> int:
+        """
+        Function name: _record
+        Objective: Return the record of a (player, board) key, 0 if the book does not have it
+        Input: key: tuple[int, tuple[int, ...]]
+        Output: int
+        """
+        player, board = key
+        if player not in (1, 2) or len(board) != 9 or any(cell not in (0, 1, 2) for cell in board):
+            return 0
+        offset = BOOK_HEADER.size + ((player - 1) * BOOK_POSITIONS + position_index(board)) * BOOK_RECORD.size
+        return BOOK_RECORD.unpack_from(self.data, offset)[0]
+
+    @staticmethod
+    def _entry(record: int) -> tuple[int | None, int, list[int]]:
+        """
+        Function name: _entry
+        Objective: Decode a record to (best move, score, all equally good moves)
+        Input: record: int
+        Output: tuple[int | None, int, list[int]]
+        """
+        moves = [i for i in range(9) if record >> i & 1]
+        return (moves[0] if moves else None), (record >> 9 & 3) - 1, moves
+
+    def get(self, key: tuple, default=None):
+        """
+        Function name: get
+        Objective: Return the solution of a position, like dict.get
+        Input: key: tuple[int, tuple[int, ...]] (player, board), default: the value if the position is unknown
+        Output: tuple[int | None, int, list[int]] | default
+        """
+        record = self._record(key)
+        return self._entry(record) if record & BOOK_KNOWN else default
+
+    def __getitem__(self, key: tuple):
+        """
+        Function name: __getitem__
+        Objective: Return the solution of a position (KeyError if it is unknown)
+        Input: key: tuple[int, tuple[int, ...]]
+        Output: tuple[int | None, int, list[int]]
+        """
+        record = self._record(key)
+        if not record & BOOK_KNOWN:
+            raise KeyError(key)
+        return self._entry(record)
+
+    def __contains__(self, key: tuple) -> bool:
+        """
+        Function name: __contains__
+        Objective: Check if the book has a position
+        Input: key: tuple[int, tuple[int, ...]]
+        Output: bool
+        """
+        return bool(self._record(key) & BOOK_KNOWN)
+
+    def __len__(self) -> int:
+        """
+        Function name: __len__
+        Objective: Return the number of known positions
+        Input: None
+        Output: int
+        """
+        return self.known
+
+    def items(self):
+        """
+        Function name: items
+        Objective: Iterate over the known positions, like dict.items
+        Input: None
+        Output: iterator of ((player, board), (best move, score, moves))
+        """
+        for i in range(2 * BOOK_POSITIONS):
+            record = BOOK_RECORD.unpack_from(self.data, BOOK_HEADER.size + i * BOOK_RECORD.size)[0]
+            if record & BOOK_KNOWN:
+                player, index = divmod(i, BOOK_POSITIONS)
+                board = []
+                for _ in range(9):
+                    index, cell = divmod(index, 3)
+                    board.append(cell)
+                yield (player + 1, tuple(board)), self._entry(record)
+
+def write_book(path: str, table: dict | None = None):
+    """
+    Function name: write_book
+    Objective: Save the solution table as a book file (written to a temporary file first,
+               so other processes never map half a file)
+    Input: path: str, table: dict | None (None = solve_table())
+    Output: None
+    """
+    table = table if table is not None else solve_table()
+    records = [0] * (2 * BOOK_POSITIONS)
+    for (player, position), (_, score, moves) in table.items():
+        mask = sum(1 << move for move in moves)
+        records[(player - 1) * BOOK_POSITIONS + position_index(position)] = mask | (score + 1) << 9 | BOOK_KNOWN
+    body = struct.pack(f"<{len(records)}H", *records)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(table), zlib.crc32(body)))
+        f.write(body)
+    os.replace(temporary, path)
+
+def read_book(path: str) -> SolutionBook | None:
+    """
+    Function name: read_book
+    Objective: Memory map a book file and check its format version and checksum
+    Input: path: str
+    Output: SolutionBook | None (None if the file is missing or invalid)
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(data) == BOOK_SIZE:
+        magic, version, _, checksum = BOOK_HEADER.unpack_from(data)
+        if magic == BOOK_MAGIC and version == BOOK_VERSION and zlib.crc32(data[BOOK_HEADER.size:]) == checksum:
+            return SolutionBook(data)
+    print(f"Invalid solution book {path}")
+    data.close()
+    return None
+
+def load_book(path: str) -> SolutionBook | dict:
+    """
+    Function name: load_book
+    Objective: Memory map the book, solve the game and save the book first if it is missing or invalid
+    Input: path: str
+    Output: SolutionBook | dict (the table in memory if the book can not be saved)
+    """
+    book = read_book(path)
+    if book is not None:
+        return book
+    table = solve_table()
+    try:
+        write_book(path, table)
+    except OSError as e:
+        print(f"Could not save the solution book: {e}")
+        return table
+    return read_book(path) or table
+
+def best_moves(player : int, board : list[int]) -> list[int]:
+    """
+    Function name: best_moves
+    Objective: Return all the moves that are as good as the best one
+    Input: player: int, board: list[int]
+    Output: list[int]
+    """
+    entry = solution_table().get((player, tuple(board)))
+    if entry is None:
+        move, score = engine.minimax(player, list(board))
+        return [] if move is None else [move]
+    return list(entry[2])
+
+def minimax(player : int,board :list[int]) -> tuple[int | None,float | None]:
+    """
+    Function name: minimax
+    Objective: Return the best move and its score from the solution table
+               (positions that are not in the table are searched by the bit board engine)
+    Input: player: int, board: list[int]
+    Output: tuple[int | None,float | None]
+    """
+    if ENGINE == "search":
+        return search_minimax(player, board)
+    if ENGINE == "table":
+        entry = solution_table().get((player, tuple(board)))
+        if entry is not None:
+            return entry[0], entry[1]
+    return engine.minimax(player, board)
+
+def verify_table() -> int:
+    """
+    Function name: verify_table
+    Objective: Check the solution table against the recursive search for every position
+    Input: None
+    Output: int (the number of positions that do not match)
+    """
+    mismatches = 0
+    for (player, position), (move, score, moves) in solution_table().items():
+        expected = search_minimax(player, list(position))
+        if expected != (move, score) or (move is not None and move not in moves):
+            print(f"Mismatch for player {player} on {list(position)}: {(move, score)} != {expected}")
+            mismatches += 1
+    return mismatches
+
 # Function to draw the board
 def draw_board():
     """
@@ -128,4 +429,14 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "book":
+        # Write the book again (for example to a shared path given as the second argument)
+        path = sys.argv[2] if len(sys.argv) > 2 else BOOK_PATH
+        write_book(path)
+        print(f"Solution book written to {path}")
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "verify":
+        bad = verify_table()
+        print(f"{len(solution_table())} positions checked, {bad} mismatches")
+        sys.exit(1 if bad else 0)
     main()
@@ -0,0 +1,341 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: protocol.py
+Descriere: Acest fișier conține împărțirea fluxului TCP în mesaje și citirea comenzilor
+-----------------------------------------------------------------------
+"""
+
+import json
+import re
+import struct
+
+# Commands are "command;arg1;arg2", one per line. A first field starting with
+# "@" is a request id that is sent back in the answer: "@17;readGrid;;"
+REQUEST_ID_PREFIX = "@"
+
+# Separators in a command without a newline ("command;arg1;arg2"), before its last argument
+LEGACY_SEPARATORS = 2
+
+# The largest frame accepted from a client
+MAX_FRAME = 64 * 1024
+
+# Compact the buffer when this many consumed bytes are at its start
+COMPACT_AT = 4096
+
+
+class FrameTooLarge(Exception):
+    """
+    Class name: FrameTooLarge
+    Objective: Raised when a client sends a frame larger than the limit
+    """
+
+
+class InvalidRequest(ValueError):
+    """
+    Class name: InvalidRequest
+    Objective: Raised when a frame can not be a command (for example a request id that is not a number)
+    """
+
+
+def is_number(text: str) -> bool:
+    """
+    Function name: is_number
+    Objective: Check if a text is a non negative integer in ASCII digits (str.isdigit also accepts "²")
+    Input: text: str
+    Output: bool
+    """
+    return text.isascii() and text.isdigit()
+
+
+class Request:
+    """
+    Class name: Request
+    Objective: One command sent by a client
+    """
+
+    __slots__ = ("command", "args", "id")
+
+    def __init__(self, command: str, args: list[str], request_id: str | None = None):
+        """
+        Function name: __init__
+        Objective: Initialize the request
+        Input: command: str, args: list[str], request_id: str | None
+        Output: None
+        """
+        self.command = command
+        self.args = args
+        self.id = request_id
+
+    def arg(self, index: int) -> str:
+        """
+        Function name: arg
+        Objective: Return an argument, "" if the client did not send it
+        Input: index: int (1 for arg1)
+        Output: str
+        """
+        return self.args[index - 1] if index - 1 < len(self.args) else ""
+
+    def __repr__(self):
+        return f"Request({self.command!r}, {self.args!r}, id={self.id!r})"
+
+
+def parse_request(frame: str) -> Request:
+    """
+    Function name: parse_request
+    Objective: Split a frame into the command, the arguments and the request id
+    Input: frame: str
+    Output: Request (raises InvalidRequest if the request id does not fit the binary answers)
+    """
+    fields = frame.split(";")
+    request_id = None
+    if fields[0].startswith(REQUEST_ID_PREFIX):
+        request_id = fields.pop(0)[len(REQUEST_ID_PREFIX):]
+        if not is_number(request_id) or int(request_id) >= NO_REQUEST_ID:
+            raise InvalidRequest(f"Invalid request id {request_id!r}, expected 0 .. {NO_REQUEST_ID - 1}")
+        if not fields:
+            fields = [""]
+    return Request(fields[0].strip(), fields[1:], request_id)
+
+
+class LineFramer:
+    """
+    Class name: LineFramer
+    Objective: Split a TCP byte stream into newline terminated frames
+    """
+
+    def __init__(self, legacy: bool = True, max_frame: int = MAX_FRAME, commands: tuple[str, ...] = ()):
+        """
+        Function name: __init__
+        Objective: Initialize the framer
+        Input: legacy: bool (until the client sends a newline, every read holds whole commands,
+               like the Unity client that sends commands without a newline),
+               max_frame: int, commands: tuple[str, ...] (the command names, used to split the
+               commands a legacy client sent in one read; empty: every read is one frame)
+        Output: None
+        """
+        self.buffer = bytearray()
+        self.start = 0
+        self.legacy = legacy
+        self.max_frame = max_frame
+        self.boundary = None
+        if commands:
+            names = "|".join(re.escape(command) for command in commands)
+            self.boundary = re.compile(f"(?:{re.escape(REQUEST_ID_PREFIX)}[0-9]+;)?(?:{names});")
+
+    def feed(self, data: bytes) -> list[str]:
+        """
+        Function name: feed
+        Objective: Add the bytes of one read and return the complete frames
+        Input: data: bytes
+        Output: list[str]
+        """
+        self.buffer += data
+        frames = []
+        view = memoryview(self.buffer)
+        try:
+            while True:
+                end = self.buffer.find(b"\n", self.start)
+                if end < 0:
+                    break
+                # The client uses newlines, stop treating reads as frames
+                self.legacy = False
+                stop = end - 1 if end > self.start and self.buffer[end - 1] == 13 else end
+                if stop > self.start:
+                    frames.append(str(view[self.start:stop], "utf-8"))
+                self.start = end + 1
+
+            if self.legacy and self.start < len(self.buffer):
+                frames.extend(self._split_legacy(str(view[self.start:], "utf-8")))
+                self.start = len(self.buffer)
+        finally:
+            view.release()
+
+        if len(self.buffer) - self.start > self.max_frame:
+            raise FrameTooLarge(f"Frame larger than {self.max_frame} bytes")
+        self._compact()
+        return frames
+
+    def _split_legacy(self, text: str) -> list[str]:
+        """
+        Function name: _split_legacy
+        Objective: Split the commands a legacy client sent in one read ("readGrid;;readGrid;;"):
+                   the last argument of a command ends where the next command name starts
+        Input: text: str
+        Output: list[str]
+        """
+        if self.boundary is None:
+            return [text]
+        frames = []
+        start = 0
+        while True:
+            # Skip the command (and request id) fields, the boundary is searched in the last argument
+            position = start
+            separators = LEGACY_SEPARATORS + text.startswith(REQUEST_ID_PREFIX, start)
+            for _ in range(separators):
+                position = text.find(";", position) + 1
+                if position == 0:
+                    break
+            match = self.boundary.search(text, position) if position else None
+            if match is None:
+                break
+            frames.append(text[start:match.start()])
+            start = match.start()
+        frames.append(text[start:])
+        return [frame for frame in frames if frame]
+
+    def _compact(self):
+        """
+        Function name: _compact
+        Objective: Drop the consumed bytes from the start of the buffer (not after every frame)
+        Input: None
+        Output: None
+        """
+        if self.start == len(self.buffer):
+            self.buffer.clear()
+            self.start = 0
+        elif self.start >= COMPACT_AT:
+            del self.buffer[:self.start]
+            self.start = 0
+
+
+class LengthFramer:
+    """
+    Class name: LengthFramer
+    Objective: Split a TCP byte stream into frames prefixed by their length (4 bytes, big endian)
+    """
+
+    HEADER = struct.Struct(">I")
+
+    def __init__(self, max_frame: int = MAX_FRAME):
+        """
+        Function name: __init__
+        Objective: Initialize the framer
+        Input: max_frame: int
+        Output: None
+        """
+        self.buffer = bytearray()
+        self.start = 0
+        self.max_frame = max_frame
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """
+        Function name: feed
+        Objective: Add the bytes of one read and return the complete frames
+        Input: data: bytes
+        Output: list[bytes]
+        """
+        self.buffer += data
+        frames = []
+        header = self.HEADER.size
+        while len(self.buffer) - self.start >= header:
+            (length,) = self.HEADER.unpack_from(self.buffer, self.start)
+            if length > self.max_frame:
+                raise FrameTooLarge(f"Frame larger than {self.max_frame} bytes")
+            end = self.start + header + length
+            if end > len(self.buffer):
+                break
+            frames.append(bytes(self.buffer[self.start + header:end]))
+            self.start = end
+
+        if self.start == len(self.buffer):
+            self.buffer.clear()
+            self.start = 0
+        elif self.start >= COMPACT_AT:
+            del self.buffer[:self.start]
+            self.start = 0
+        return frames
+
+    @classmethod
+    def pack(cls, payload: bytes) -> bytes:
+        """
+        Function name: pack
+        Objective: Prefix a payload with its length
+        Input: payload: bytes
+        Output: bytes
+        """
+        return cls.HEADER.pack(len(payload)) + payload
+
+
+# ----- answers -----
+
+# Wire formats, chosen by the client with "format;json" or "format;binary" (or
+# "format;binary-nomsg" to leave out the message text), best as its first command
+JSON = "json"
+BINARY = "binary"
+BINARY_NO_MESSAGE = "binary-nomsg"
+WIRE_FORMATS = (JSON, BINARY, BINARY_NO_MESSAGE)
+
+# Binary answer, little endian (like BitConverter in Unity):
+# version, status, piece, choice (int16, -1 = none, so boards up to 181×181), winner,
+# request id, 6 joints, message length, then the UTF-8 message.
+# Every binary answer is sent with a LengthFramer header.
+BINARY_VERSION = 2
+BINARY_REPLY = struct.Struct("<BBBhBI6fH")
+NO_REQUEST_ID = 0xFFFFFFFF
+
+STATUS_CODES = {
+    "done": 0, "busy": 1, "error": 2, "telemetry": 3,
+    # Events of the motion queue (see motion.py), the job id is in the message
+    "motion_started": 4, "motion_progress": 5, "motion_done": 6, "motion_cancelled": 7, "motion_failed": 8,
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+UNKNOWN_STATUS = 255
+
+
+def encode_binary(reply: dict, with_message: bool = True) -> bytes:
+    """
+    Function name: encode_binary
+    Objective: Encode an answer (the dict of RobotSocket.prepare_reply) in the binary format
+    Input: reply: dict, with_message: bool
+    Output: bytes (without the length header)
+    """
+    request_id = reply.get("id")
+    # Cut long messages on a character boundary (the messages can have Romanian letters)
+    message = reply["message"].encode()[:0xFFFF].decode("utf-8", "ignore").encode() if with_message else b""
+    return BINARY_REPLY.pack(
+        BINARY_VERSION,
+        STATUS_CODES.get(reply["status"], UNKNOWN_STATUS),
+        reply["piece"],
+        reply["choice"],
+        reply["winner"],
+        # Binary clients use numeric request ids
+        int(request_id) if request_id is not None else NO_REQUEST_ID,
+        *reply["joints"],
+        len(message),
+    ) + message
+
+def decode_binary(payload: bytes) -> dict:
+    """
+    Function name: decode_binary
+    Objective: Decode a binary answer back to the dict of RobotSocket.prepare_reply
+    Input: payload: bytes (without the length header)
+    Output: dict
+    """
+    version, status, piece, choice, winner, request_id, *rest = BINARY_REPLY.unpack_from(payload)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unknown binary format version {version}")
+    joints, length = rest[:6], rest[6]
+    start = BINARY_REPLY.size
+    reply = {
+        "status": STATUS_NAMES.get(status, "unknown"),
+        "joints": [round(j, 2) for j in joints],
+        "message": str(payload[start:start + length], "utf-8"),
+        "piece": piece,
+        "choice": choice,
+        "winner": winner,
+    }
+    if request_id != NO_REQUEST_ID:
+        reply["id"] = str(request_id)
+    return reply
+
+def encode_reply(reply: dict, wire_format: str = JSON) -> bytes:
+    """
+    Function name: encode_reply
+    Objective: Encode an answer ready to be sent in the format chosen by the client
+    Input: reply: dict, wire_format: str
+    Output: bytes
+    """
+    if wire_format == JSON:
+        return (json.dumps(reply) + "\n").encode()
+    return LengthFramer.pack(encode_binary(reply, wire_format == BINARY))
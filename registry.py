@@ -0,0 +1,122 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: registry.py
+Descriere: Acest fișier conține registrul cu obiectele RoboDK (ținte, programe, repere) căutate o singură dată
+-----------------------------------------------------------------------
+"""
+
+import metrics
+
+# Any item type (same value as robolink.ITEM_TYPE_ANY)
+ANY = -1
+
+
+def is_invalid_item_error(error: Exception) -> bool:
+    """
+    Function name: is_invalid_item_error
+    Objective: Check if RoboDK refused a call because the item no longer exists
+    Input: error: Exception
+    Output: bool
+    """
+    return "Invalid item" in str(error)
+
+
+class ItemRegistry:
+    """
+    Class name: ItemRegistry
+    Objective: Look up every RoboDK item once by name and reuse the handle
+    """
+
+    def __init__(self, rdk):
+        """
+        Function name: __init__
+        Objective: Initialize the registry
+        Input: rdk: robolink.Robolink
+        Output: None
+        """
+        self.rdk = rdk
+        self.items = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, name: str, item_type: int = ANY):
+        """
+        Function name: get
+        Objective: Return the item with this name (looked up in RoboDK only the first time)
+        Input: name: str, item_type: int (robolink.ITEM_TYPE_*)
+        Output: robolink.Item | None (None if RoboDK has no such item)
+        """
+        key = (name, item_type)
+        item = self.items.get(key)
+        if item is not None:
+            self.hits += 1
+            return item
+
+        self.misses += 1
+        metrics.count("robodk.Item")
+        item = self.rdk.Item(name, item_type)
+        if not item.Valid():
+            return None
+        self.items[key] = item
+        return item
+
+    def put(self, name: str, item, item_type: int = ANY):
+        """
+        Function name: put
+        Objective: Add an item created by this program (for example with AddTarget)
+        Input: name: str, item: robolink.Item, item_type: int
+        Output: None
+        """
+        self.items[(name, item_type)] = item
+
+    def invalidate(self, name: str | None = None):
+        """
+        Function name: invalidate
+        Objective: Forget one item (all the types with this name) or all of them
+        Input: name: str | None
+        Output: None
+        """
+        if name is None:
+            self.invalidations += len(self.items)
+            self.items.clear()
+            return
+        for key in [key for key in self.items if key[0] == name]:
+            del self.items[key]
+            self.invalidations += 1
+
+    def revalidate(self):
+        """
+        Function name: revalidate
+        Objective: Ask RoboDK which items were deleted and forget them
+        Input: None
+        Output: None
+        """
+        for key, item in list(self.items.items()):
+            if not item.Valid(True):
+                del self.items[key]
+                self.invalidations += 1
+
+    def with_item(self, name: str, item_type: int, action):
+        """
+        Function name: with_item
+        Objective: Run an action on an item; if RoboDK says the item is no longer valid,
+                   look it up again and retry once
+        Input: name: str, item_type: int, action: callable taking the item
+        Output: the result of the action, None if the item does not exist
+        """
+        item = self.get(name, item_type)
+        if item is None:
+            return None
+        try:
+            return action(item)
+        except Exception as e:
+            if not is_invalid_item_error(e):
+                raise
+            self.invalidate(name)
+
+        item = self.get(name, item_type)
+        if item is None:
+            return None
+        return action(item)
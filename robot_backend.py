@@ -0,0 +1,78 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: robot_backend.py
+Descriere: Acest fișier conține interfața cu robotul: RoboDK sau simulatorul local
+-----------------------------------------------------------------------
+"""
+
+import os
+
+# Item types, same values as robolink.ITEM_TYPE_*
+ITEM_TYPE_ANY = -1
+ITEM_TYPE_FRAME = 3
+ITEM_TYPE_ROBOT = 2
+ITEM_TYPE_TARGET = 6
+ITEM_TYPE_PROGRAM = 8
+
+# Backend used when none is given: "robodk" or "sim"
+DEFAULT_BACKEND = os.environ.get("TTT_ROBOT_BACKEND", "robodk")
+
+
+class RoboDKBackend:
+    """
+    Class name: RoboDKBackend
+    Objective: The RoboDK API (robolink.Robolink) together with the pose functions the server needs.
+
+    A backend has the Robolink calls used by the server (Item, AddTarget, AddProgram) and:
+    transl(x, y, z), KUKA_2_Pose(xyzabc), TargetReachError and connect_again().
+    """
+
+    def __init__(self):
+        """
+        Function name: __init__
+        Objective: Connect to RoboDK
+        Input: None
+        Output: None
+        """
+        import robodk
+        import robodk.robolink as robolink
+
+        self.link = robolink.Robolink()
+        self.transl = robodk.transl
+        self.KUKA_2_Pose = robodk.KUKA_2_Pose
+        self.TargetReachError = robolink.TargetReachError
+
+    def __getattr__(self, name: str):
+        """
+        Function name: __getattr__
+        Objective: Forward the other calls to robolink.Robolink
+        Input: name: str
+        Output: the Robolink attribute
+        """
+        return getattr(self.link, name)
+
+    def connect_again(self):
+        """
+        Function name: connect_again
+        Objective: Open a second connection to the same station (for another thread)
+        Input: None
+        Output: RoboDKBackend
+        """
+        return RoboDKBackend()
+
+
+def create_backend(name: str | None = None, **options):
+    """
+    Function name: create_backend
+    Objective: Create the robot backend
+    Input: name: str | None ("robodk" or "sim", None = DEFAULT_BACKEND), options: for the simulator
+    Output: RoboDKBackend | sim_robodk.SimRobolink
+    """
+    name = name or DEFAULT_BACKEND
+    if name == "robodk":
+        return RoboDKBackend()
+    if name == "sim":
+        import sim_robodk
+        return sim_robodk.SimRobolink(**options)
+    raise ValueError(f"Unknown robot backend {name}")
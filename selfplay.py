@@ -0,0 +1,254 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: selfplay.py
+Descriere: Acest fișier joacă multe partide fără interfață, în paralel (motor contra motor, contra
+           mutări aleatoare sau contra deschiderilor fixe), măsoară viteza și verifică că motorul nu pierde
+-----------------------------------------------------------------------
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import metrics
+import nk_engine
+import player
+
+# Engines that can be tested: the player.ENGINE values and the N×N engine on the 3x3 board
+ENGINES = ("table", "bitboard", "search", "nk")
+
+# Opponents of the engine
+OPPONENTS = ("engine", "random", "opening")
+
+# Outcomes of a game for the engine side (engine vs engine games are always "draw" or a loss of one side)
+WIN, DRAW, LOSS = "win", "draw", "loss"
+
+# The engine of the worker process (set by _init_worker)
+_engine_name = None
+_nk = None
+
+
+def _init_worker(engine_name: str):
+    """
+    Function name: _init_worker
+    Objective: Select the engine of a worker process and build its tables before the first game
+    Input: engine_name: str
+    Output: None
+    """
+    global _engine_name, _nk
+    _engine_name = engine_name
+    if engine_name == "nk":
+        _nk = nk_engine.NKEngine(3, 3, time_budget=10.0)
+    else:
+        player.ENGINE = engine_name
+        player.solution_table()
+
+def engine_move(piece: int, board: list[int]) -> tuple[int | None, int]:
+    """
+    Function name: engine_move
+    Objective: Ask the worker engine for a move
+    Input: piece: int, board: list[int]
+    Output: tuple[int | None, int] (move, nodes searched; 0 for a table lookup, -1 if the engine does not count them)
+    """
+    if _engine_name == "nk":
+        move, _ = _nk.minimax(piece, list(board))
+        return move, _nk.last_nodes
+    if _engine_name == "table" and (piece, tuple(board)) in player.solution_table():
+        move, _ = player.minimax(piece, list(board))
+        return move, 0
+    if _engine_name == "search":
+        move, _ = player.minimax(piece, list(board))
+        return move, -1
+    move, _, nodes = engine.search(piece, list(board))
+    return move, nodes
+
+def winner(board: list[int]) -> int:
+    """
+    Function name: winner
+    Objective: Return the winner of a board, same codes as the server (0 none, 1 X, 2 O, 3 draw)
+    Input: board: list[int]
+    Output: int
+    """
+    for piece in (1, 2):
+        if player.check_winner(piece, board):
+            return piece
+    return 3 if player.is_board_full(board) else 0
+
+def play_game(game: dict) -> dict:
+    """
+    Function name: play_game
+    Objective: Play one game of the engine against an opponent (runs in a worker process)
+    Input: game: dict (id, opponent, engine_piece, seed, opening: the first cells of the opponent)
+    Output: dict (the game, moves, winner, outcome for the engine, times and nodes of the engine moves,
+            mismatches: engine moves that are not one of player.best_moves)
+    """
+    rng = random.Random(game["seed"])
+    opening = list(game.get("opening", []))
+    board = [0] * 9
+    moves, times, nodes = [], [], []
+    mismatches = 0
+    piece = 1
+    while winner(board) == 0:
+        if game["opponent"] == "engine" or piece == game["engine_piece"]:
+            best = player.best_moves(piece, board)
+            started = time.perf_counter()
+            move, searched = engine_move(piece, board)
+            times.append(time.perf_counter() - started)
+            nodes.append(searched)
+            mismatches += move not in best
+        elif opening and board[opening[0]] == 0:
+            move = opening.pop(0)
+        else:
+            opening = []
+            move = rng.choice([i for i, value in enumerate(board) if value == 0])
+        board[move] = piece
+        moves.append(move)
+        piece = 3 - piece
+
+    result = winner(board)
+    if result == 3:
+        outcome = DRAW
+    elif game["opponent"] == "engine":
+        # Both sides are the engine: a won game is a loss of the other side
+        outcome = LOSS
+    else:
+        outcome = WIN if result == game["engine_piece"] else LOSS
+    return {**game, "moves": moves, "winner": result, "outcome": outcome,
+            "times": times, "nodes": nodes, "mismatches": mismatches}
+
+def play_chunk(games: list[dict]) -> list[dict]:
+    """
+    Function name: play_chunk
+    Objective: Play several games in a worker process (one pickle round trip for all of them)
+    Input: games: list[dict]
+    Output: list[dict]
+    """
+    return [play_game(game) for game in games]
+
+def make_games(opponent: str, count: int, seed: int = 0, opening_moves: int = 2) -> list[dict]:
+    """
+    Function name: make_games
+    Objective: Create the games of a match, the engine plays X in half of them and O in the other half
+    Input: opponent: str, count: int (engine and random games),
+           seed: int, opening_moves: int (scripted first moves of the opponent)
+    Output: list[dict] (for "opening" every opening is played once with each side)
+    """
+    if opponent == "opening":
+        openings = list(itertools.permutations(range(9), opening_moves))
+        return [
+            {"opponent": opponent, "engine_piece": engine_piece, "seed": seed + i, "opening": list(opening)}
+            for i, (engine_piece, opening) in enumerate(itertools.product((1, 2), openings))
+        ]
+    return [{"opponent": opponent, "engine_piece": 1 + i % 2, "seed": seed + i} for i in range(count)]
+
+def run_match(engine_name: str, games: list[dict], workers: int, chunksize: int = 64) -> tuple[list[dict], float]:
+    """
+    Function name: run_match
+    Objective: Play the games in a process pool
+    Input: engine_name: str, games: list[dict], workers: int, chunksize: int (games per task)
+    Output: tuple[list[dict], float] (results, seconds)
+    """
+    chunks = [games[i:i + chunksize] for i in range(0, len(games), chunksize)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine_name,)) as pool:
+        results = [result for chunk in pool.map(play_chunk, chunks) for result in chunk]
+    return results, time.perf_counter() - started
+
+def summarize(results: list[dict], elapsed: float) -> dict:
+    """
+    Function name: summarize
+    Objective: Return the speed, the move times, the nodes and the outcomes of a match
+    Input: results: list[dict], elapsed: float (seconds for the whole match, with the worker start)
+    Output: dict
+    """
+    times = [t for result in results for t in result["times"]]
+    nodes = [n for result in results for n in result["nodes"] if n >= 0]
+    outcomes = {outcome: 0 for outcome in (WIN, DRAW, LOSS)}
+    for result in results:
+        outcomes[result["outcome"]] += 1
+    summary = {
+        "games": len(results),
+        "seconds": round(elapsed, 3),
+        "games_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+        "engine_moves": len(times),
+        "outcomes": outcomes,
+        "x_wins": sum(result["winner"] == 1 for result in results),
+        "o_wins": sum(result["winner"] == 2 for result in results),
+        "mismatches": sum(result["mismatches"] for result in results),
+        "nodes_per_move": round(statistics.mean(nodes), 1) if nodes else None,
+    }
+    if times:
+        summary["move_ms"] = {
+            "mean": round(statistics.mean(times) * 1e3, 4),
+            "p50": round(metrics.percentile(times, 50) * 1e3, 4),
+            "p95": round(metrics.percentile(times, 95) * 1e3, 4),
+            "p99": round(metrics.percentile(times, 99) * 1e3, 4),
+            "max": round(max(times) * 1e3, 4),
+        }
+    return summary
+
+def perfect_play_failures(results: list[dict]) -> list[dict]:
+    """
+    Function name: perfect_play_failures
+    Objective: Return the games that perfect play can not produce: a lost game or a move
+               that is not one of player.best_moves
+    Input: results: list[dict]
+    Output: list[dict]
+    """
+    return [result for result in results if result["outcome"] == LOSS or result["mismatches"]]
+
+
+def main():
+    """
+    Function name: main
+    Objective: Play the matches, print the report as JSON and fail if the engine lost a game
+    Input: None
+    Output: None
+    """
+    parser = argparse.ArgumentParser(description="Play many games between the engine and other players")
+    parser.add_argument("--engine", choices=ENGINES, default="table")
+    parser.add_argument("--opponents", nargs="+", choices=OPPONENTS, default=list(OPPONENTS))
+    parser.add_argument("--games", type=int, default=10000, help="games per engine and random match")
+    parser.add_argument("--opening-moves", type=int, default=2, help="scripted first moves of the opening opponent")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=64, help="games sent to a worker at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSONL file with every game")
+    args = parser.parse_args()
+
+    report = {"engine": args.engine, "workers": args.workers, "matches": {}}
+    failures = []
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for opponent in args.opponents:
+            # Two engines always play the same game, a few are enough
+            count = 2 if opponent == "engine" else args.games
+            games = make_games(opponent, count, args.seed, args.opening_moves)
+            results, elapsed = run_match(args.engine, games, args.workers, args.chunksize)
+            report["matches"][opponent] = summarize(results, elapsed)
+            failures += perfect_play_failures(results)
+            if output is not None:
+                for result in results:
+                    output.write(json.dumps(result) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+
+    print(json.dumps(report, indent=2))
+    for failure in failures[:10]:
+        print(f"Not perfect play: {json.dumps(failure)}", file=sys.stderr)
+    if failures:
+        print(f"{len(failures)} games are not perfect play", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
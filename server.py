@@ -9,16 +9,50 @@ Ultima modificare: Ursan Bogdan-Gabriel 20/06/2024
 """
 
 import socket
+import camera
 import detect
+import frame_cache
+import game
+import metrics
+import motion
 import player
-import cv2
 import json
-import robodk.robolink as robolink
-import robodk
 import math
+import time
+import threading
+import nk_engine
+import protocol
+import telemetry
+import trajectory
+import registry
+import robot_backend
+from robot_backend import ITEM_TYPE_FRAME, ITEM_TYPE_PROGRAM, ITEM_TYPE_ROBOT, ITEM_TYPE_TARGET
 
-# initialize the RoboDK API
-RDK = robolink.Robolink()
+# The RoboDK API (or the simulator), connected by the first RobotSocket without a backend
+RDK = None
+
+
+def default_backend():
+    """
+    Function name: default_backend
+    Objective: Return the shared robot backend (robot_backend.DEFAULT_BACKEND), created the first time
+    Input: None
+    Output: robot_backend.RoboDKBackend | sim_robodk.SimRobolink
+    """
+    global RDK
+    if RDK is None:
+        RDK = robot_backend.create_backend()
+    return RDK
+
+# Size of the X and radius of the O drawn by the robot (mm)
+X_SIZE = 50
+O_RADIUS = 20
+
+# Commands measured one by one in the metrics (the others are counted as "other")
+COMMANDS = ("readGrid", "format", "subscribe", "unsubscribe", "stats", "reset", "undo", "cancel", "Prog1", "test", "move")
+
+# Seconds between two checks of a running drawing program
+PROGRAM_POLL = 0.02
 
 # Path to the image that will be used for the simulation
 PATH_TO_UNITY_IMG = "C:/Users/Bogdan/Desktop/licenta/unity/Paint3D_RO/ScreenShot.png"
@@ -37,34 +71,104 @@ class RobotSocket:
         robot="Doosan Robotics A0509",
         mid="MID",
         start="Start",
+        board="Board",
+        target_prefix="",
+        grid_size=3,
+        win_length=3,
+        move_deadline=2.0,
+        telemetry_rate=100.0,
+        motion_mode="program",
+        max_pending_motions=4,
+        backend=None,
+        image_path=PATH_TO_UNITY_IMG,
+        video_source=None,
+        metrics_path=None,
+        metrics_interval=10.0,
     ):
         """
         Function name: __init__
         Objective: Initialize the RobotSocket class
-        Input: host: str, port: int, robot: str, mid: str, start: str
+        Input: host: str, port: int, robot: str, mid: str, start: str, board: str (the frame of the grid),
+               target_prefix: str (added to the names of the cell targets and drawing programs, so several
+               robots of one RoboDK station do not share them),
+               grid_size: int, win_length: int, move_deadline: float (seconds to answer readGrid),
+               telemetry_rate: float (joint samples per second for the telemetry subscribers),
+               motion_mode: str ("program" draws with one RoboDK program per symbol and cell,
+               "moves" sends the linear/circular moves one by one),
+               max_pending_motions: int (drawings waiting behind the current one, readGrid answers "busy" above it),
+               backend: robot_backend.RoboDKBackend | sim_robodk.SimRobolink | None (None = default_backend()),
+               image_path: str (the screenshot read by readGrid),
+               video_source: str | int | None (camera index or video file; readGrid then returns the
+               last stable board of the camera instead of reading image_path),
+               metrics_path: str | None (JSONL file where the metrics are appended every metrics_interval seconds)
         Output: None
         """
+        self.rdk = backend if backend is not None else default_backend()
+        self.image_path = image_path
         self.host = host
         self.port = port
-        self.robot = RDK.Item(robot)
+        self.robot_name = robot
+        self.target_prefix = target_prefix
+        self.telemetry_rate = telemetry_rate
+        self.telemetry = None
+        self.last_joints = [0.0] * 6
+        self.subscription = None
+        self.send_lock = threading.Lock()
+        self.motion_mode = motion_mode
+        self.trajectories = trajectory.TrajectoryCache()
+        # The drawings run on the motion thread, the RoboDK calls of the other threads wait for the current step
+        self.robot_lock = threading.RLock()
+        self.motion = motion.MotionExecutor(self.make_move, max_pending_motions)
+        # Jobs cancelled by a client: their moves are taken back when they end before the symbol is drawn
+        self.cancel_requests = set()
+        self.motion.add_listener(self.take_back)
+        # RoboDK handles are looked up once
+        self.items = registry.ItemRegistry(self.rdk)
+        self.grid_size = grid_size
+        self.win_length = win_length
+        self.move_deadline = move_deadline
+        # readGrid detects only what changed since the last screenshot
+        self.detection_cache = frame_cache.DetectionCache(grid_size)
+        if metrics_path is not None:
+            metrics.METRICS.start_dump(metrics_path, metrics_interval)
+        self.camera = None
+        if video_source is not None:
+            self.camera = camera.CameraPipeline(video_source, grid_size)
+            self.camera.start()
+
+        # The 3x3 game is solved by player.minimax, other boards use the N×N engine
+        self.nk_engine = None
+        self.ponder_engine = None
+        self.engine_lock = threading.Lock()
+        self.ponder_lock = threading.Lock()
+        if (grid_size, win_length) != (3, 3):
+            self.nk_engine = nk_engine.NKEngine(grid_size, win_length, move_deadline)
+            # The pondering searches with its own engine, readGrid never waits for it
+            self.ponder_engine = nk_engine.NKEngine(grid_size, win_length, move_deadline)
+        # The game on the board: moves, turn and the answers searched while the human thinks
+        # (half a deadline per possible human move, two deadlines in all for one human turn)
+        self.game = game.GameSession(grid_size, self.search_move, move_deadline / 2, self.ponder_move, 2 * move_deadline)
+
+        self.robot = self.items.get(robot, ITEM_TYPE_ROBOT)
 
-        if not self.robot.Valid():
+        if self.robot is None:
             print("Robot does not exist.")
             return
         print("Robot #{robot} found..")
 
-        self.robot.setPoseFrame(RDK.Item("Board"))
+        self.board_frame = self.items.get(board, ITEM_TYPE_FRAME)
+        self.robot.setPoseFrame(self.board_frame)
 
-        self.mid = RDK.Item(mid)
+        self.mid = self.items.get(mid)
 
-        if not self.mid.Valid():
+        if self.mid is None:
             print("Mid does not exist.")
             return
         print("Mid position valid..")
 
-        self.start = RDK.Item(start)
+        self.start = self.items.get(start)
 
-        if not self.start.Valid():
+        if self.start is None:
             print("Start does not exist.")
             return
         print("Start position valid..")
@@ -81,30 +185,66 @@ class RobotSocket:
         print(f"Connecting to {self.host}:{self.port}...")
         self.sock.bind((self.host, self.port))
         self.sock.listen()
-        self.conn, self.addr = self.sock.accept()
-        self.start_server()
+        self.creategrid(50)
+        # Serve one client at a time, wait for a new one when it disconnects
+        while True:
+            self.conn, self.addr = self.sock.accept()
+            print(f"Client connected from {self.addr}.")
+            self.start_server()
 
-    def prepare_data(self, status: str, message: str, piece: int, choice: int, winner: int):
+    def prepare_data(self, status: str, message: str, piece: int, choice: int, winner: int, joints: list[float] | None = None, request_id: str | None = None):
         """
         Function name: prepare_data
-        Objective: Prepare the data to be sent
-        Input: status: str, message: str, piece: int, choice: int, winner: int
+        Objective: Prepare the data to be sent (as JSON)
+        Input: status: str, message: str, piece: int, choice: int, winner: int,
+               joints: list[float] | None (None = read the joints from the robot),
+               request_id: str | None (the id sent by the client with the command)
         Output: str
         """
+        return json.dumps(self.prepare_reply(status, message, piece, choice, winner, joints, request_id))
+
+    def prepare_reply(self, status: str, message: str, piece: int, choice: int, winner: int, joints: list[float] | None = None, request_id: str | None = None) -> dict:
+        """
+        Function name: prepare_reply
+        Objective: Prepare the data to be sent, before it is encoded (see protocol.encode_reply)
+        Input: status: str, message: str, piece: int, choice: int, winner: int,
+               joints: list[float] | None (None = read the joints from the robot),
+               request_id: str | None (the id sent by the client with the command)
+        Output: dict
+        """
+        if joints is None:
+            joints = self.read_joints()
+
         data_to_send = {
             "status": status,
-            "joints": self.extractJoints(self.robot.Joints()),
+            "joints": joints,
             "message": message,
             "piece": piece,
             "choice": choice,
             "winner" : winner
         }
+        if request_id is not None:
+            data_to_send["id"] = request_id
 
-        data_string = json.dumps(data_to_send)
+        return data_to_send
 
-        return data_string
+    def read_joints(self, wait: bool = True) -> list[float]:
+        """
+        Function name: read_joints
+        Objective: Read the robot joints
+        Input: wait: bool (False = return the last joints read if another thread is moving the robot)
+        Output: list[float]
+        """
+        if not self.robot_lock.acquire(blocking=wait):
+            return self.last_joints
+        try:
+            metrics.count("robodk.Joints")
+            self.last_joints = self.extractJoints(self.robot.Joints())
+        finally:
+            self.robot_lock.release()
+        return self.last_joints
 
-    def extractJoints(self, joints : robodk.Mat):
+    def extractJoints(self, joints):
         """
         Function name: extractJoints
         Objective: Extract the joints from the robot
@@ -120,25 +260,204 @@ class RobotSocket:
             round(joints[5, 0], 2),
         ]
 
-    def make_move(self, cell: int, symbol: int):
+    def time_left(self, started: float) -> float:
+        """
+        Function name: time_left
+        Objective: Return the search time left until the move deadline
+        Input: started: float (time.perf_counter() when the command arrived)
+        Output: float (seconds)
+        """
+        # Keep a small margin for sending the answer
+        remaining = self.move_deadline - (time.perf_counter() - started)
+        return max(0.05, remaining * 0.9)
+
+    def search_move(self, piece: int, m: list[int], time_budget: float) -> tuple[int | None, float | None]:
+        """
+        Function name: search_move
+        Objective: Search the move for the board (player.minimax for 3x3, the N×N engine otherwise)
+        Input: piece: int, m: list[int], time_budget: float (seconds, used by the N×N engine)
+        Output: tuple[int | None, float | None]
+        """
+        if self.nk_engine is None:
+            return player.minimax(piece, m)
+
+        # The engine keeps its search state, one search at a time; the wait is part of the budget
+        waiting = time.perf_counter()
+        with self.engine_lock:
+            time_budget = max(0.05, time_budget - (time.perf_counter() - waiting))
+            return self.nk_engine.minimax(piece, m, time_budget)
+
+    def ponder_move(self, piece: int, m: list[int], time_budget: float, stop: threading.Event) -> tuple[int | None, float | None]:
+        """
+        Function name: ponder_move
+        Objective: Search a move while the human thinks (search_move with the ponder engine)
+        Input: piece: int, m: list[int], time_budget: float (seconds, used by the N×N engine),
+               stop: threading.Event (set by GameSession.stop_pondering, ends the search at once)
+        Output: tuple[int | None, float | None]
+        """
+        if self.ponder_engine is None:
+            return player.minimax(piece, m)
+
+        with self.ponder_lock:
+            return self.ponder_engine.minimax(piece, m, time_budget, stop)
+
+    def make_move(self, cell: int, symbol: int, progress=None, cancelled=None):
         """
         Function name: make_move
-        Objective: Move the robot to a cell
-        Input: cell: int, symbol: int
+        Objective: Move the robot to a cell and draw the symbol (runs on the motion thread, see motion.MotionExecutor)
+        Input: cell: int, symbol: int,
+               progress: callable(done, total) | None (called after every step of the motion),
+               cancelled: callable | None (checked after every step but the last one and while the program runs,
+               raises motion.MotionCancelled when True; the symbol is then not complete)
         Output: None
         """
-        t = RDK.Item(str(cell))
-        if t.Valid() and symbol in [1, 2]:
-            self.robot.MoveJ(self.start)
-            self.robot.MoveJ(t)
-            if symbol == 1:
-                self.moveRobotInXShape(50)
-                return
-            if symbol == 2:
-                self.moveRobotInCircle(20, 20)
-                return
-        else:
+        if symbol not in [1, 2]:
             print("Target does not exist or symbol is invalid.")
+            return
+
+        shape = self.symbol_shape(symbol)
+        # Two joint moves, then one program or one step per segment
+        total = 2 + (1 if self.motion_mode == "program" else len(shape))
+        done = 0
+
+        def step():
+            nonlocal done
+            done += 1
+            if progress is not None:
+                progress(done, total)
+            # After the last step the symbol is drawn, a late cancel changes nothing
+            if done < total and cancelled is not None and cancelled():
+                raise motion.MotionCancelled()
+
+        def move_to(t):
+            metrics.count("robodk.MoveJ", 2)
+            with self.robot_lock:
+                self.robot.MoveJ(self.start)
+            step()
+            with self.robot_lock:
+                self.robot.MoveJ(t)
+            step()
+            return True
+
+        with metrics.span("motion"):
+            if self.items.with_item(self.cell_target(cell), ITEM_TYPE_TARGET, move_to):
+                self.draw_symbol(cell, symbol, step, cancelled)
+            else:
+                print("Target does not exist or symbol is invalid.")
+
+    def symbol_shape(self, symbol: int) -> list[tuple]:
+        """
+        Function name: symbol_shape
+        Objective: Return the segments drawn for a symbol (offsets from the cell center)
+        Input: symbol: int
+        Output: list[tuple]
+        """
+        if symbol == trajectory.X:
+            return trajectory.x_shape(X_SIZE)
+        return trajectory.circle_shape(O_RADIUS)
+
+    def draw_symbol(self, cell: int, symbol: int, step=None, cancelled=None):
+        """
+        Function name: draw_symbol
+        Objective: Draw a symbol in a cell with the cached trajectory (the robot is at the cell center)
+        Input: cell: int, symbol: int, step: callable | None (called after every step, see make_move),
+               cancelled: callable | None (stops the program, see run_program)
+        Output: None
+        """
+        # The center pose of a cell is read once, after the first move to its target
+        center = self.trajectories.centers.get(cell)
+        if center is None:
+            metrics.count("robodk.Pose")
+            with self.robot_lock:
+                center = self.robot.Pose()
+            self.trajectories.centers[cell] = center
+
+        shape = self.symbol_shape(symbol)
+        key = (cell, symbol, self.motion_mode)
+        segments = self.trajectories.get(key, lambda: trajectory.compile_segments(center, shape, self.rdk.transl))
+
+        if self.motion_mode == "program":
+            self.run_program(key, segments, cancelled)
+            if step is not None:
+                step()
+        else:
+            self.run_segments(segments, step)
+
+    def run_program(self, key: tuple, segments: list[tuple], cancelled=None):
+        """
+        Function name: run_program
+        Objective: Run a trajectory as one RoboDK program (created the first time) and wait for it
+        Input: key: tuple (cell, symbol, mode), segments: list[tuple],
+               cancelled: callable | None (polled while the program runs: the program is stopped
+               and motion.MotionCancelled raised when True)
+        Output: None
+        """
+        with self.robot_lock:
+            program = self.start_program(key, segments)
+        # Other threads can read the joints while the program runs
+        while True:
+            with self.robot_lock:
+                if not program.Busy():
+                    break
+                if cancelled is not None and cancelled():
+                    metrics.count("robodk.Stop")
+                    program.Stop()
+                    raise motion.MotionCancelled()
+            time.sleep(PROGRAM_POLL)
+
+    def start_program(self, key: tuple, segments: list[tuple]):
+        """
+        Function name: start_program
+        Objective: Start the RoboDK program of a trajectory, created the first time
+        Input: key: tuple (cell, symbol, mode), segments: list[tuple]
+        Output: robodk.Item (the running program)
+        """
+        program = self.trajectories.programs.get(key)
+        if program is None or not program.Valid():
+            cell, symbol, _ = key
+            name = f"{self.target_prefix}Draw_{'X' if symbol == trajectory.X else 'O'}_{cell}"
+            # A program left by an earlier run may have other poses
+            stale = self.items.get(name, ITEM_TYPE_PROGRAM)
+            if stale is not None:
+                stale.Delete()
+                self.items.invalidate(name)
+            metrics.count("robodk.AddProgram")
+            metrics.count("robodk.ProgramMove", len(segments))
+            program = self.rdk.AddProgram(name, self.robot)
+            program.setPoseFrame(self.board_frame)
+            program.setPoseTool(self.robot.PoseTool())
+            for kind, *poses in segments:
+                if kind == trajectory.LINEAR:
+                    program.MoveL(poses[0])
+                else:
+                    program.MoveC(poses[0], poses[1])
+            self.trajectories.programs[key] = program
+
+        metrics.count("robodk.RunProgram")
+        program.RunProgram()
+        return program
+
+    def run_segments(self, segments: list[tuple], step=None):
+        """
+        Function name: run_segments
+        Objective: Send the moves of a trajectory one by one
+        Input: segments: list[tuple], step: callable | None (called after every move, see make_move)
+        Output: None
+        """
+        for kind, *poses in segments:
+            try:
+                with self.robot_lock:
+                    if kind == trajectory.LINEAR:
+                        metrics.count("robodk.MoveL")
+                        self.robot.MoveL(poses[0])
+                    else:
+                        metrics.count("robodk.MoveC")
+                        self.robot.MoveC(poses[0], poses[1])
+            except self.rdk.TargetReachError:
+                print(f"Failed to move the robot to point {poses[-1]}.")
+                break
+            if step is not None:
+                step()
 
     def moveRobotInXShape(self, size: float):
         """
@@ -152,13 +471,13 @@ class RobotSocket:
 
         # Define the points of the X shape relative to the current position
         points = [
-            current_pose * robodk.transl(0, -size, -size),  # Bottom left
+            current_pose * self.rdk.transl(0, -size, -size),  # Bottom left
             current_pose,  # Center
-            current_pose * robodk.transl(0, size, size),  # Top right
+            current_pose * self.rdk.transl(0, size, size),  # Top right
             current_pose,  # Center
-            current_pose * robodk.transl(0, -size, size),  # Top left
+            current_pose * self.rdk.transl(0, -size, size),  # Top left
             current_pose,  # Center
-            current_pose * robodk.transl(0, size, -size),  # Bottom right
+            current_pose * self.rdk.transl(0, size, -size),  # Bottom right
             current_pose,  # Center
         ]
 
@@ -166,7 +485,7 @@ class RobotSocket:
         for point in points:
             try:
                 self.robot.MoveJ(point)
-            except robodk.TargetReachError:
+            except self.rdk.TargetReachError:
                 print(f"Failed to move the robot to point {point}.")
                 break
 
@@ -191,7 +510,7 @@ class RobotSocket:
             y = radius * math.sin(angle)
 
             # Calculate the point's pose relative to the current pose
-            point = current_pose * robodk.transl(x, y, 0)
+            point = current_pose * self.rdk.transl(x, y, 0)
 
             points.append(point)
 
@@ -199,11 +518,11 @@ class RobotSocket:
         for point in points:
             try:
                 self.robot.MoveJ(point)
-            except robodk.TargetReachError:
+            except self.rdk.TargetReachError:
                 print(f"Failed to move the robot to point {point}.")
                 break
 
-    def returnCoords(self, target: robolink.Item) -> tuple[float, float, float]:
+    def returnCoords(self, target) -> tuple[float, float, float]:
         """
         Function name: returnCoords
         Objective: Return the coordinates of a target
@@ -221,16 +540,51 @@ class RobotSocket:
         Input: name: str, x: float, y: float, z: float
         Output: robolink.Item
         """
-        new_target = RDK.AddTarget(name)
+        metrics.count("robodk.AddTarget")
+        new_target = self.rdk.AddTarget(name)
 
         o = [0.0, 90.0, 0.0]
 
-        target = robodk.KUKA_2_Pose([x, y, z] + o)
+        target = self.rdk.KUKA_2_Pose([x, y, z] + o)
 
         new_target.setPose(target)
 
+        self.items.put(name, new_target, ITEM_TYPE_TARGET)
+
         return new_target
 
+    def ensureTarget(self, name, x: float, y: float, z: float) -> tuple:
+        """
+        Function name: ensureTarget
+        Objective: Reuse the target with this name if it exists, move it only if its pose changed
+        Input: name: str, x: float, y: float, z: float
+        Output: tuple[robolink.Item, bool] (the target, True if it was created or moved)
+        """
+        existing = self.items.get(name, ITEM_TYPE_TARGET)
+        if existing is None:
+            return self.createTarget(name, x, y, z), True
+
+        target = self.rdk.KUKA_2_Pose([x, y, z] + [0.0, 90.0, 0.0])
+        current = existing.Pose()
+        if all(
+            abs(a - b) < 1e-6
+            for row_a, row_b in zip(current.rows, target.rows)
+            for a, b in zip(row_a, row_b)
+        ):
+            return existing, False
+
+        existing.setPose(target)
+        return existing, True
+
+    def cell_target(self, cell: int) -> str:
+        """
+        Function name: cell_target
+        Objective: Return the name of the target of a cell
+        Input: cell: int
+        Output: str
+        """
+        return self.target_prefix + str(cell)
+
     def creategrid(self, distance: int):
         """
         Function name: creategrid
@@ -242,136 +596,505 @@ class RobotSocket:
 
         x, y, z = self.returnCoords(self.mid)
 
-        targets = [
-            self.createTarget("0", x, y + distance, z + distance),
-            self.createTarget("1", x, y, z + distance),
-            self.createTarget("2", x, y - distance, z + distance),
-            self.createTarget("3", x, y + distance, z),
-            self.createTarget("4", x, y, z),
-            self.createTarget("5", x, y - distance, z),
-            self.createTarget("6", x, y + distance, z - distance),
-            self.createTarget("7", x, y, z - distance),
-            self.createTarget("8", x, y - distance, z - distance),
-        ]
+        # "MID" is the center of the board, cell 0 is the top left one
+        center = (self.grid_size - 1) / 2
+        changed = False
+        for cell in range(self.grid_size * self.grid_size):
+            row, col = divmod(cell, self.grid_size)
+            _, moved = self.ensureTarget(self.cell_target(cell), x, y + (center - col) * distance, z + (center - row) * distance)
+            changed = changed or moved
+
+        # The drawings were computed for the old targets
+        if changed:
+            print("Grid changed.")
+            self.trajectories.invalidate()
+
+    def read_grid(self, started: float) -> tuple[list[int], int, int | None, str, int]:
+        """
+        Function name: read_grid
+        Objective: Detect the board in the image and choose the move (without moving the robot)
+        Input: started: float (time.perf_counter() when the command arrived)
+        Output: tuple[list[int], int, int | None, str, int] (board, piece, choice, message, winner)
+        """
+        # on simulation just load the image
+        # on read case take a picture of the grid
+        # No overlay is drawn on the server (see detect.process_image for the debug image)
+        with metrics.span("detect"):
+            if self.camera is not None:
+                # The camera threads keep the board up to date, wait only for the first one
+                grid = self.camera.wait_board(self.move_deadline)
+                if grid is None:
+                    raise ValueError("No stable board from the camera")
+            else:
+                grid = self.detection_cache.read(self.image_path)
+
+        m = detect.convert_matrix(grid)
+
+        print(m)
+
+        # The session knows whose turn it is and checks that the board follows the last one
+        with self.game.lock:
+            try:
+                self.game.observe(m)
+            except game.IllegalBoard as e:
+                return m, self.game.turn, None, "Illegal board: " + str(e) + " Expected: " + str(self.game.board), 0
+
+            piece = self.game.turn
+            if self.game.waiting_for_human():
+                c, score = None, None
+                message = "Grid read: " + str(m) + " Waiting for the move of " + ("X" if piece == 1 else "O")
+            else:
+                with metrics.span("search"):
+                    c, score = self.game.best_move(piece, self.time_left(started))
+                if c is not None:
+                    self.game.play(c, piece, robot=True)
+                    # Search the answers to the human moves while the robot draws and the human thinks
+                    self.game.ponder()
+                message = "Grid read: " + str(m) + " Choice: " + str(c)
+        winner = 0
+
+        # check for winner
+        if score == -1:
+            print("Player X wins")
+            message += "\nX wins"
+            winner = 1
+
+        if score == 1:
+            print("Player O wins")
+            message += "\nO wins"
+            winner = 2
+
+        if player.is_board_full(m):
+            print("Draw")
+            message += "\nDraw"
+            winner = 3
+
+        return m, piece, c, message, winner
+
+    def run_command(self, command: str, arg1: str) -> str:
+        """
+        Function name: run_command
+        Objective: Run the robot commands (Prog1, test, move)
+        Input: command: str, arg1: str
+        Output: str (the message for the client)
+        """
+        message = ""
+
+        if command in ("Prog1", "test"):
+            metrics.count("robodk.RunProgram")
+            with self.robot_lock:
+                found = self.items.with_item(command, ITEM_TYPE_PROGRAM, lambda p: p.RunProgram() or True)
+            if found:
+                message = command + " executed."
+            else:
+                message = "Program does not exist"
+                print("Program does not exist")
+
+        if command == "move":
+            metrics.count("robodk.MoveJ")
+            with self.robot_lock:
+                found = self.items.with_item(arg1, registry.ANY, lambda t: self.robot.MoveJ(t) or True)
+            if found:
+                message = "Robot moved to " + arg1
+            else:
+                message = "Target does not exist"
+                print("Target does not exist")
+
+        return message
 
     def start_server(self):
         """
         Function name: start_server
-        Objective: Start the server
+        Objective: Serve the commands of the connected client until it disconnects
         Input: None
         Output: None
         """
         print("Starting server...")
-        self.creategrid(50)
         with self.conn:
             d = self.prepare_data("done", "Connection established.", 1, -1, 0)
             print(d)
             self.conn.sendall((d + "\n").encode())
             print("Connection established. Server is running...")
-            while True:
+            framer = protocol.LineFramer(commands=COMMANDS)
+            # JSON until the client asks for another format
+            self.wire_format = protocol.JSON
+            self.motion.add_listener(self.send_motion_event)
+            try:
+                self._serve_commands(framer)
+            finally:
+                self.motion.remove_listener(self.send_motion_event)
+                self.stop_telemetry_stream()
+
+    def _serve_commands(self, framer: protocol.LineFramer):
+        """
+        Function name: _serve_commands
+        Objective: Read the commands of the connected client and send the answers
+        Input: framer: protocol.LineFramer
+        Output: None
+        """
+        while True:
+            try:
+                data = self.conn.recv(4096)
+            except socket.error as e:
+                print(f"Socket error: {e}")
+                return
+
+            # An empty read means the client closed the connection
+            if not data:
+                print("Client disconnected.")
+                return
+
+            started = time.perf_counter()
+            try:
+                with metrics.span("decode"):
+                    frames = framer.feed(data)
+            except (protocol.FrameTooLarge, UnicodeDecodeError) as e:
+                print(f"Invalid data: {e}")
+                return
+
+            # A client can send several commands without waiting for the answers
+            for frame in frames:
                 try:
-                    data = self.conn.recv(1024)
-
-                    if data:
-
-                        dataPos = data.decode("utf-8").split(";")
-
-                        print(dataPos)
-
-                        command = dataPos[0]
-                        arg1 = dataPos[1]
-                        arg2 = dataPos[2]
-                        message = ""
-                        piece = 1
-                        c = -1
-                        winner = 0
-
-                        if command == "readGrid":
-                            # on simulation just load the image
-                            # on read case take a picture of the grid
-                            img = cv2.imread(PATH_TO_UNITY_IMG)
-
-                            detected, grid = detect.process_image(img)
-
-                            m = detect.convert_matrix(grid)
-
-                            print(m)
-                            # cv2.imshow('Detected Shapes', detected)
-
-                            num_X = m.count(1)
-                            num_O = m.count(2)
-
-                            if num_X == num_O:
-                                piece = 1
-                            else:
-                                piece = 2
-
-                            c, score = player.minimax(piece, m)
-                            message = "Grid read: " + str(m) + " Choice: " + str(c)
-
-                            # check for winner
-                            if score == -1:
-                                print("Player X wins")
-                                message = (
-                                    "Grid read: "
-                                    + str(m)
-                                    + " Choice: "
-                                    + str(c)
-                                    + "\nX wins"
-                                )
-                                winner = 1
-
-                            if score == 1:
-                                print("Player O wins")
-                                message = (
-                                    "Grid read: "
-                                    + str(m)
-                                    + " Choice: "
-                                    + str(c)
-                                    + "\nO wins"
-                                )
-                                winner = 2
-
-                            if player.is_board_full(m):
-                                print("Draw")
-                                message = (
-                                    "Grid read: "
-                                    + str(m)
-                                    + " Choice: "
-                                    + str(c)
-                                    + "\nDraw"
-                                )
-                                winner = 3
-
-                            if c is not None:
-                                self.make_move(c, piece)
-
-                        if command == "Prog1":
-                            RDK.Item(command).RunProgram()
-                            message = command + " executed."
-
-                        if command == "test":
-                            RDK.Item(command).RunProgram()
-                            message = command + " executed."
-
-                        if command == "move":
-                            t = RDK.Item(arg1)
-                            if t.Valid():
-                                self.robot.MoveJ(t)
-                                message = "Robot moved to " + arg1
-                            else:
-                                message = "Target does not exist"
-                                print("Target does not exist")
-
-                        if c is None:
-                            c = -1
-
-                        d = self.prepare_data("done", message, piece, c, winner)
-                        print("Sending data: " + d)
-
-                        self.conn.sendall((d + "\n").encode())
+                    request = protocol.parse_request(frame)
+                    reply = self.handle_request(request, started)
+                except protocol.InvalidRequest as e:
+                    print(f"Invalid request: {e}")
+                    request = protocol.Request("", [])
+                    reply = self.error_reply(request, e)
+                except Exception as e:
+                    # A failed command (no image, no board found, unreachable target...) is answered, not fatal
+                    print(f"Command {request.command} failed: {e!r}")
+                    reply = self.error_reply(request, e)
+                print(f"Sending data: {reply}")
+
+                try:
+                    self.send_reply(reply)
                 except socket.error as e:
                     print(f"Socket error: {e}")
+                    return
+                # From the arrival of the data to the answer sent
+                metrics.observe(self.command_metric(request.command), time.perf_counter() - started)
+
+    def error_reply(self, request: protocol.Request, error: Exception) -> dict:
+        """
+        Function name: error_reply
+        Objective: Prepare the answer of a command that failed
+        Input: request: protocol.Request, error: Exception
+        Output: dict (status "error", the error as the message)
+        """
+        try:
+            joints = self.read_joints()
+        except Exception:
+            # The robot itself may be the problem
+            joints = [0.0] * 6
+        return self.prepare_reply("error", str(error), self.game.turn, -1, 0, joints, request.id)
+
+    def send_reply(self, reply: dict):
+        """
+        Function name: send_reply
+        Objective: Send an answer to the connected client (commands and telemetry share the socket)
+        Input: reply: dict
+        Output: None
+        """
+        with metrics.span("encode"):
+            data = protocol.encode_reply(reply, self.wire_format)
+        with self.send_lock, metrics.span("send"):
+            self.conn.sendall(data)
+
+    def send_motion_event(self, event: dict):
+        """
+        Function name: send_motion_event
+        Objective: Send an event of the motion queue to the connected client (runs on the motion thread)
+        Input: event: dict (see motion.MotionExecutor._emit)
+        Output: None
+        """
+        try:
+            self.send_reply(self.prepare_motion_event(event))
+        except socket.error as e:
+            print(f"Socket error: {e}")
+
+    def prepare_motion_event(self, event: dict) -> dict:
+        """
+        Function name: prepare_motion_event
+        Objective: Prepare an event of the motion queue to be sent (same fields as a command answer,
+                   the status is the event, piece and choice are the symbol and the cell)
+        Input: event: dict
+        Output: dict
+        """
+        message = f"Motion {event['job']}"
+        if event["event"] == motion.MOTION_PROGRESS:
+            message += f" {event['done']}/{event['total']}"
+        if "error" in event:
+            message += ": " + event["error"]
+        # A cancel runs on the command thread, it must not wait for the current move
+        reply = self.prepare_reply(event["event"], message, event["symbol"], event["cell"], 0, self.read_joints(wait=False))
+        reply["motion"] = event["job"]
+        reply["done"] = event["done"]
+        reply["total"] = event["total"]
+        return reply
+
+    def queue_move(self, cell: int, piece: int) -> motion.MotionJob | None:
+        """
+        Function name: queue_move
+        Objective: Queue the drawing of the robot move; if the queue is full the move is taken back
+        Input: cell: int, piece: int
+        Output: motion.MotionJob | None (None = the robot is busy)
+        """
+        try:
+            return self.motion.submit(cell, piece)
+        except motion.MotionQueueFull as e:
+            print(f"Robot is busy: {e}")
+            self.game.undo(1)
+            return None
+
+    def cancel_motion(self, arg1: str) -> str:
+        """
+        Function name: cancel_motion
+        Objective: The cancel command: "cancel;<job>;" cancels one drawing, "cancel;;" all of them;
+                   the robot move of a drawing is taken back when it ends motion_cancelled (see take_back)
+        Input: arg1: str
+        Output: str (the message for the client)
+        """
+        if arg1:
+            job = self.motion.jobs.get(int(arg1)) if protocol.is_number(arg1) else None
+            jobs = [job] if job is not None else []
+        else:
+            jobs = list(self.motion.jobs.values())
+        jobs = [job for job in jobs if job.state in (motion.QUEUED, motion.RUNNING)]
+        with self.game.lock:
+            self.cancel_requests.update(job.id for job in jobs)
+
+        # Newest first: the moves are taken back in the reverse order they were played
+        cancelled = [job for job in reversed(jobs) if self.motion.cancel(job.id)]
+        with self.game.lock:
+            # A job that ended meanwhile sent its last event already
+            self.cancel_requests.difference_update(job.id for job in jobs if job not in cancelled)
+        if not arg1:
+            return f"Cancelled {len(cancelled)} motions."
+        if cancelled:
+            return "Motion " + arg1 + " cancelled."
+        return "Motion " + arg1 + " is not running or waiting."
+
+    def take_back(self, event: dict):
+        """
+        Function name: take_back
+        Objective: Take back the move of a drawing cancelled by a client once it really ended before the
+                   symbol was drawn, so the next board read without it is legal (listener of the motion
+                   queue, called before the event is sent; only the last move of the game can be taken back)
+        Input: event: dict (see motion.MotionExecutor._emit)
+        Output: None
+        """
+        if event["event"] not in (motion.MOTION_DONE, motion.MOTION_CANCELLED, motion.MOTION_FAILED):
+            return
+        with self.game.lock:
+            if event["job"] not in self.cancel_requests:
+                return
+            self.cancel_requests.discard(event["job"])
+            last = self.game.history[-1] if self.game.history else None
+            if event["event"] == motion.MOTION_CANCELLED and last == (event["cell"], event["symbol"]):
+                self.game.undo(1)
+
+    def telemetry_reader(self):
+        """
+        Function name: telemetry_reader
+        Objective: Return a function that reads the joints over its own RoboDK connection,
+                   so the samples keep coming while a command waits for a MoveJ
+        Input: None
+        Output: callable returning list[float]
+        """
+        link = self.rdk.connect_again()
+        robot = link.Item(self.robot_name, ITEM_TYPE_ROBOT)
+        return lambda: self.extractJoints(robot.Joints())
+
+    def get_telemetry(self) -> telemetry.JointTelemetry:
+        """
+        Function name: get_telemetry
+        Objective: Return the joint telemetry, created with the first subscriber
+        Input: None
+        Output: telemetry.JointTelemetry
+        """
+        if self.telemetry is None:
+            self.telemetry = telemetry.JointTelemetry(self.telemetry_reader(), self.telemetry_rate)
+        return self.telemetry
+
+    def prepare_telemetry(self, sample: dict) -> dict:
+        """
+        Function name: prepare_telemetry
+        Objective: Prepare a telemetry sample to be sent (same fields as a command answer)
+        Input: sample: dict
+        Output: dict
+        """
+        reply = self.prepare_reply("telemetry", "", 0, -1, 0, sample["joints"])
+        reply["t"] = sample["t"]
+        reply["seq"] = sample["seq"]
+        reply["dropped"] = sample["dropped"]
+        return reply
+
+    def start_telemetry_stream(self, rate: float | None):
+        """
+        Function name: start_telemetry_stream
+        Objective: Send the joint samples to the connected client from a separate thread
+        Input: rate: float | None (samples per second, None = the telemetry rate)
+        Output: None
+        """
+        self.stop_telemetry_stream()
+        subscription = self.get_telemetry().subscribe(rate)
+        self.subscription = subscription
+
+        def forward():
+            while not subscription.closed:
+                sample = subscription.get(timeout=1.0)
+                if sample is None:
+                    continue
+                try:
+                    self.send_reply(self.prepare_telemetry(sample))
+                except socket.error:
+                    subscription.close()
+
+        threading.Thread(target=forward, name="telemetry-send", daemon=True).start()
+
+    def stop_telemetry_stream(self):
+        """
+        Function name: stop_telemetry_stream
+        Objective: Stop sending the joint samples to the connected client
+        Input: None
+        Output: None
+        """
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+
+    def handle_request(self, request: protocol.Request, started: float) -> dict:
+        """
+        Function name: handle_request
+        Objective: Run one command and return the answer for the client
+        Input: request: protocol.Request, started: float (time.perf_counter() when the command arrived)
+        Output: dict (see prepare_reply)
+        """
+        print(request)
+
+        message = ""
+        piece = 1
+        c = -1
+        winner = 0
+
+        motion_job = None
+
+        if request.command == "readGrid":
+            # The drawing is queued, the answer is sent as soon as the move is chosen
+            if self.motion.full():
+                return self.prepare_reply("busy", "Robot is busy, try again.", piece, -1, 0, request_id=request.id)
+            m, piece, c, message, winner = self.read_grid(started)
+
+            if c is not None:
+                job = self.queue_move(c, piece)
+                if job is None:
+                    return self.prepare_reply("busy", "Robot is busy, try again.", piece, -1, 0, request_id=request.id)
+                motion_job = job.id
+                message += "\nMotion " + str(job.id)
+        elif request.command == "format":
+            # The answer is already sent in the new format
+            self.wire_format, message = self.select_format(self.wire_format, request.arg(1))
+        elif request.command == "subscribe":
+            # subscribe;joints;<samples per second>
+            self.start_telemetry_stream(self.parse_rate(request.arg(2)))
+            message = "Subscribed to joints."
+        elif request.command == "unsubscribe":
+            self.stop_telemetry_stream()
+            message = "Unsubscribed from joints."
+        elif request.command == "stats":
+            message = self.stats(request.arg(1))
+        elif request.command in ("reset", "undo"):
+            message = self.game_command(request.command, request.arg(1))
+        elif request.command == "cancel":
+            message = self.cancel_motion(request.arg(1))
+        else:
+            message = self.run_command(request.command, request.arg(1))
+
+        if c is None:
+            c = -1
+
+        reply = self.prepare_reply("done", message, piece, c, winner, request_id=request.id)
+        if motion_job is not None:
+            reply["motion"] = motion_job
+        return reply
+
+    def game_command(self, command: str, arg1: str) -> str:
+        """
+        Function name: game_command
+        Objective: The game commands: "reset;;" starts a new game, "undo;<moves>;" takes back moves
+                   (2 by default: the robot move and the human move before it)
+        Input: command: str, arg1: str
+        Output: str (the message for the client)
+        """
+        if command == "reset":
+            # The drawings of the old game are no longer needed
+            self.motion.cancel_all()
+            self.game.reset()
+            return "Game reset."
+        count = int(arg1) if protocol.is_number(arg1) else 2
+        undone = self.game.undo(count)
+        return f"Undid {undone} moves. Board: {self.game.board}"
+
+    def command_metric(self, command: str) -> str:
+        """
+        Function name: command_metric
+        Objective: Return the histogram of a command (unknown commands share one)
+        Input: command: str
+        Output: str
+        """
+        return "command." + (command if command in COMMANDS else "other")
+
+    def stats(self, action: str = "") -> str:
+        """
+        Function name: stats
+        Objective: The stats command: "stats;;" returns the metrics and the cache counters as JSON,
+                   "stats;reset;" clears them, "stats;on;" / "stats;off;" switch the measuring
+        Input: action: str ("", "reset", "on" or "off")
+        Output: str (the message for the client)
+        """
+        if action == "reset":
+            metrics.METRICS.reset()
+            return "Stats reset."
+        if action in ("on", "off"):
+            metrics.enable(action == "on")
+            return "Stats " + action + "."
+
+        snapshot = metrics.METRICS.snapshot()
+        snapshot["caches"] = {
+            "items": {"hits": self.items.hits, "misses": self.items.misses, "invalidations": self.items.invalidations},
+            "trajectories": {"hits": self.trajectories.hits, "misses": self.trajectories.misses},
+            "detection": self.detection_cache.stats(),
+        }
+        if self.camera is not None:
+            snapshot["caches"]["camera"] = self.camera.stats()
+        snapshot["game"] = self.game.stats()
+        snapshot["motion"] = self.motion.stats()
+        return json.dumps(snapshot)
+
+    def parse_rate(self, value: str) -> float | None:
+        """
+        Function name: parse_rate
+        Objective: Read the telemetry rate asked by a client (None = the telemetry rate)
+        Input: value: str
+        Output: float | None
+        """
+        try:
+            rate = float(value)
+        except ValueError:
+            return None
+        return rate if rate > 0 else None
+
+    def select_format(self, current: str, requested: str) -> tuple[str, str]:
+        """
+        Function name: select_format
+        Objective: Change the wire format of the answers if the client asked for a known one
+        Input: current: str, requested: str
+        Output: tuple[str, str] (the format, the message for the client)
+        """
+        if requested not in protocol.WIRE_FORMATS:
+            return current, "Unknown format " + requested
+        return requested, "Format set to " + requested
 
     def close(self):
         """
@@ -382,3 +1105,5 @@ class RobotSocket:
         """
         self.conn.close()
         self.sock.close()
+        if self.camera is not None:
+            self.camera.stop()
@@ -0,0 +1,583 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: sim_robodk.py
+Descriere: Acest fișier conține un simulator local al stației RoboDK (pentru teste fără RoboDK)
+-----------------------------------------------------------------------
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+
+from robot_backend import ITEM_TYPE_ANY, ITEM_TYPE_FRAME, ITEM_TYPE_PROGRAM, ITEM_TYPE_ROBOT, ITEM_TYPE_TARGET
+
+INVALID_ITEM = "Invalid item provided: The item identifier provided is not valid or it does not exist."
+
+
+class TargetReachError(Exception):
+    """
+    Class name: TargetReachError
+    Objective: Same meaning as robolink.TargetReachError
+    """
+
+
+class Mat:
+    """
+    Class name: Mat
+    Objective: A 4x4 pose (the part of robodk.Mat used by the server)
+    """
+
+    def __init__(self, rows: list[list[float]]):
+        """
+        Function name: __init__
+        Objective: Initialize the pose
+        Input: rows: list[list[float]]
+        Output: None
+        """
+        self.rows = [list(map(float, row)) for row in rows]
+
+    def __mul__(self, other: "Mat") -> "Mat":
+        """
+        Function name: __mul__
+        Objective: Multiply two poses
+        Input: other: Mat
+        Output: Mat
+        """
+        a, b = self.rows, other.rows
+        return Mat([[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)])
+
+    def __getitem__(self, index: tuple[int, int]) -> float:
+        """
+        Function name: __getitem__
+        Objective: Read one value, pose[i, j]
+        Input: index: tuple[int, int]
+        Output: float
+        """
+        i, j = index
+        return self.rows[i][j]
+
+    def Pos(self) -> list[float]:
+        """
+        Function name: Pos
+        Objective: Return the position of the pose
+        Input: None
+        Output: list[float]
+        """
+        return [self.rows[0][3], self.rows[1][3], self.rows[2][3]]
+
+    def __repr__(self):
+        x, y, z = self.Pos()
+        return f"Mat(x={x:.3f}, y={y:.3f}, z={z:.3f})"
+
+
+class Joints:
+    """
+    Class name: Joints
+    Objective: The robot joints as a 6x1 column (joints[i, 0], like robodk.Mat)
+    """
+
+    def __init__(self, values: list[float]):
+        """
+        Function name: __init__
+        Objective: Initialize the joints
+        Input: values: list[float]
+        Output: None
+        """
+        self.values = list(values)
+
+    def __getitem__(self, index: tuple[int, int]) -> float:
+        """
+        Function name: __getitem__
+        Objective: Read one joint, joints[i, 0]
+        Input: index: tuple[int, int]
+        Output: float
+        """
+        return self.values[index[0]]
+
+    def list(self) -> list[float]:
+        """
+        Function name: list
+        Objective: Return the joints as a list
+        Input: None
+        Output: list[float]
+        """
+        return list(self.values)
+
+
+def transl(x: float, y: float, z: float) -> Mat:
+    """
+    Function name: transl
+    Objective: Return a translation pose (like robodk.transl)
+    Input: x: float, y: float, z: float
+    Output: Mat
+    """
+    return Mat([[1, 0, 0, x], [0, 1, 0, y], [0, 0, 1, z], [0, 0, 0, 1]])
+
+def KUKA_2_Pose(xyzabc: list[float]) -> Mat:
+    """
+    Function name: KUKA_2_Pose
+    Objective: Return the pose of KUKA coordinates, angles in degrees (like robodk.KUKA_2_Pose)
+    Input: xyzabc: list[float]
+    Output: Mat
+    """
+    x, y, z, a, b, c = xyzabc
+    a, b, c = math.radians(a), math.radians(b), math.radians(c)
+    ca, sa = math.cos(a), math.sin(a)
+    cb, sb = math.cos(b), math.sin(b)
+    cc, sc = math.cos(c), math.sin(c)
+    return Mat([
+        [cb * ca, ca * sc * sb - cc * sa, sc * sa + cc * ca * sb, x],
+        [cb * sa, cc * ca + sc * sb * sa, cc * sb * sa - ca * sc, y],
+        [-sb, cb * sc, cc * cb, z],
+        [0, 0, 0, 1],
+    ])
+
+def pose_to_joints(pose: Mat) -> list[float]:
+    """
+    Function name: pose_to_joints
+    Objective: A made up (but repeatable) joint position for a pose
+    Input: pose: Mat
+    Output: list[float]
+    """
+    x, y, z = pose.Pos()
+    return [math.degrees(math.atan2(y, x)), z / 10.0, -z / 10.0, 0.0, 90.0 - x / 10.0, y / 10.0]
+
+
+class SimItem:
+    """
+    Class name: SimItem
+    Objective: A simulated RoboDK item (robot, frame, target or program)
+    """
+
+    def __init__(self, station: "SimRobolink", name: str, item_type: int, pose: Mat | None = None):
+        """
+        Function name: __init__
+        Objective: Initialize the item
+        Input: station: SimRobolink, name: str, item_type: int, pose: Mat | None
+        Output: None
+        """
+        self.station = station
+        self.name = name
+        self.type = item_type
+        self.pose = pose if pose is not None else transl(0, 0, 0)
+        self.deleted = False
+        # Robots
+        self.joints = pose_to_joints(self.pose)
+        self.motion = None
+        # Set by Stop: a robot ends its move where it is, a program runs no more moves
+        self.stop_requested = threading.Event()
+        self.pose_frame = None
+        self.pose_tool = transl(0, 0, 0)
+        # Programs: list of (kind, poses) run by RunProgram
+        self.robot = None
+        self.instructions = []
+        self.runner = None
+
+    def _check(self):
+        """
+        Function name: _check
+        Objective: Raise like RoboDK when the item does not exist
+        Input: None
+        Output: None
+        """
+        self.station._call()
+        if self.deleted or self.type is None:
+            raise Exception(INVALID_ITEM)
+
+    # RoboDK API, same names and arguments as robolink.Item
+
+    def Valid(self, check_deleted: bool = False) -> bool:
+        """
+        Function name: Valid
+        Objective: Check if the item exists (like robolink.Item.Valid)
+        Input: check_deleted: bool (also count an API call, like asking RoboDK)
+        Output: bool
+        """
+        if check_deleted:
+            self.station._call()
+        return self.type is not None and not self.deleted
+
+    def Name(self) -> str:
+        """
+        Function name: Name
+        Objective: Return the name of the item
+        Input: None
+        Output: str
+        """
+        self._check()
+        return self.name
+
+    def Type(self) -> int:
+        """
+        Function name: Type
+        Objective: Return the type of the item (robot_backend.ITEM_TYPE_*)
+        Input: None
+        Output: int
+        """
+        self._check()
+        return self.type
+
+    def Delete(self):
+        """
+        Function name: Delete
+        Objective: Remove the item from the station
+        Input: None
+        Output: None
+        """
+        self._check()
+        self.station._remove(self)
+        self.deleted = True
+
+    def Pose(self) -> Mat:
+        """
+        Function name: Pose
+        Objective: Return the pose of the item (a moving robot keeps its start pose until the move is over)
+        Input: None
+        Output: Mat
+        """
+        self._check()
+        if self.motion is not None:
+            self._update_motion()
+        return self.pose
+
+    def setPose(self, pose: Mat):
+        """
+        Function name: setPose
+        Objective: Set the pose of the item
+        Input: pose: Mat
+        Output: None
+        """
+        self._check()
+        self.pose = pose
+
+    def setPoseFrame(self, frame: "SimItem"):
+        """
+        Function name: setPoseFrame
+        Objective: Set the reference frame of a robot
+        Input: frame: SimItem
+        Output: None
+        """
+        self._check()
+        self.pose_frame = frame
+
+    def PoseTool(self) -> Mat:
+        """
+        Function name: PoseTool
+        Objective: Return the tool pose of a robot
+        Input: None
+        Output: Mat
+        """
+        self._check()
+        return self.pose_tool
+
+    def setPoseTool(self, tool: Mat):
+        """
+        Function name: setPoseTool
+        Objective: Set the tool pose of a robot
+        Input: tool: Mat
+        Output: None
+        """
+        self._check()
+        self.pose_tool = tool
+
+    def Joints(self) -> Joints:
+        """
+        Function name: Joints
+        Objective: Return the joints of a robot, interpolated while it moves
+        Input: None
+        Output: Joints
+        """
+        self._check()
+        if self.motion is not None:
+            self._update_motion()
+        return Joints(self.joints)
+
+    def _update_motion(self):
+        """
+        Function name: _update_motion
+        Objective: Interpolate the joints of a robot that is moving
+        Input: None
+        Output: None
+        """
+        with self.station.lock:
+            if self.motion is None:
+                return
+            start, end, started, duration, target_pose = self.motion
+            progress = 1.0 if duration <= 0 else min(1.0, (time.perf_counter() - started) / duration)
+            self.joints = [a + (b - a) * progress for a, b in zip(start, end)]
+            if progress >= 1.0:
+                self.pose = target_pose
+                self.motion = None
+
+    def _move(self, target):
+        """
+        Function name: _move
+        Objective: Move the robot to a target item, a pose or joints, taking station.move_latency
+        Input: target: SimItem | Mat | list[float]
+        Output: None
+        """
+        self._check()
+        if isinstance(target, SimItem):
+            target._check()
+            pose = target.pose
+        elif isinstance(target, Mat):
+            pose = target
+        else:
+            pose = self.pose
+        if self.station.is_unreachable(pose):
+            raise TargetReachError(f"Target {pose} can not be reached")
+
+        end = pose_to_joints(pose)
+        self.station.counters["moves"] += 1
+        self.stop_requested.clear()
+        with self.station.lock:
+            self.motion = (list(self.joints), end, time.perf_counter(), self.station.move_latency, pose)
+        stopped = self.stop_requested.wait(self.station.move_latency)
+        self._update_motion()
+        if stopped:
+            with self.station.lock:
+                self.motion = None
+
+    def MoveJ(self, target, blocking: bool = True):
+        """
+        Function name: MoveJ
+        Objective: Joint move of a robot, or add a joint move instruction to a program
+        Input: target: SimItem | Mat | list[float], blocking: bool (the simulator always waits)
+        Output: None
+        """
+        if self.type == ITEM_TYPE_PROGRAM:
+            self._check()
+            self.instructions.append(("J", target))
+            return
+        self._move(target)
+
+    def MoveL(self, target, blocking: bool = True):
+        """
+        Function name: MoveL
+        Objective: Linear move of a robot, or add a linear move instruction to a program
+        Input: target: SimItem | Mat | list[float], blocking: bool (the simulator always waits)
+        Output: None
+        """
+        if self.type == ITEM_TYPE_PROGRAM:
+            self._check()
+            self.instructions.append(("L", target))
+            return
+        self._move(target)
+
+    def MoveC(self, target1, target2, blocking: bool = True):
+        """
+        Function name: MoveC
+        Objective: Circular move of a robot through target1 to target2 (simulated as a move to target2),
+               or add a circular move instruction to a program
+        Input: target1: SimItem | Mat | list[float], target2: SimItem | Mat | list[float], blocking: bool
+        Output: None
+        """
+        if self.type == ITEM_TYPE_PROGRAM:
+            self._check()
+            self.instructions.append(("C", target1, target2))
+            return
+        self._move(target2)
+
+    def RunProgram(self, prog_parameters: list | None = None) -> int:
+        """
+        Function name: RunProgram
+        Objective: Start a program without waiting (like RoboDK); station programs just take program_latency
+        Input: prog_parameters: list | None
+        Output: int
+        """
+        self._check()
+        self.stop_requested.clear()
+
+        def run():
+            if not self.instructions:
+                self.stop_requested.wait(self.station.program_latency)
+            for kind, *targets in self.instructions:
+                if self.stop_requested.is_set():
+                    break
+                self.robot._move(targets[-1])
+
+        self.runner = threading.Thread(target=run, daemon=True)
+        self.runner.start()
+        return 0
+
+    def Stop(self):
+        """
+        Function name: Stop
+        Objective: Stop a program (and the move of its robot) or the move of a robot, like robolink.Item.Stop
+        Input: None
+        Output: None
+        """
+        self._check()
+        self.stop_requested.set()
+        if self.type == ITEM_TYPE_PROGRAM and self.robot is not None:
+            self.robot.stop_requested.set()
+
+    def Busy(self) -> int:
+        """
+        Function name: Busy
+        Objective: Check if a program started by RunProgram is still running
+        Input: None
+        Output: int (1 busy, 0 done)
+        """
+        self._check()
+        return int(self.runner is not None and self.runner.is_alive())
+
+    def WaitFinished(self):
+        """
+        Function name: WaitFinished
+        Objective: Wait for the program started by RunProgram
+        Input: None
+        Output: None
+        """
+        self._check()
+        if self.runner is not None:
+            self.runner.join()
+
+    def WaitMove(self, timeout: float = 300):
+        """
+        Function name: WaitMove
+        Objective: Wait for the robot move (the simulated moves already wait)
+        Input: timeout: float (seconds)
+        Output: None
+        """
+        self._check()
+
+    def __repr__(self):
+        return f"SimItem({self.name!r}, type={self.type})"
+
+
+class SimRobolink:
+    """
+    Class name: SimRobolink
+    Objective: A simulated RoboDK station with the items of the Tic-Tac-Toe station
+    """
+
+    def __init__(
+        self,
+        robot: str = "Doosan Robotics A0509",
+        move_latency: float = 0.0,
+        call_latency: float = 0.0,
+        program_latency: float = 0.0,
+        mid_xyz: tuple[float, float, float] = (400.0, 0.0, 300.0),
+        unreachable=None,
+    ):
+        """
+        Function name: __init__
+        Objective: Create the station: robot, "Board" frame, "MID" and "Start" targets, "Prog1" and "test" programs
+        Input: robot: str, move_latency: float (seconds per move), call_latency: float (seconds per API call),
+               program_latency: float (seconds for the station programs), mid_xyz: tuple,
+               unreachable: callable(Mat) -> bool | None (poses that raise TargetReachError)
+        Output: None
+        """
+        self.move_latency = move_latency
+        self.call_latency = call_latency
+        self.program_latency = program_latency
+        self.unreachable = unreachable
+        self.lock = threading.RLock()
+        self.counters = Counter()
+        self.items = []
+
+        self.transl = transl
+        self.KUKA_2_Pose = KUKA_2_Pose
+        self.TargetReachError = TargetReachError
+
+        x, y, z = mid_xyz
+        self._add(robot, ITEM_TYPE_ROBOT, KUKA_2_Pose([x, y, z + 200, 0, 90, 0]))
+        self._add("Board", ITEM_TYPE_FRAME)
+        self._add("MID", ITEM_TYPE_TARGET, KUKA_2_Pose([x, y, z, 0, 90, 0]))
+        self._add("Start", ITEM_TYPE_TARGET, KUKA_2_Pose([x - 100, y, z + 200, 0, 90, 0]))
+        for name in ("Prog1", "test"):
+            program = self._add(name, ITEM_TYPE_PROGRAM)
+            program.robot = self.items[0]
+
+    def _call(self):
+        """
+        Function name: _call
+        Objective: Count an API call and wait like a call to RoboDK would
+        Input: None
+        Output: None
+        """
+        self.counters["calls"] += 1
+        if self.call_latency:
+            time.sleep(self.call_latency)
+
+    def _add(self, name: str, item_type: int, pose: Mat | None = None) -> SimItem:
+        """
+        Function name: _add
+        Objective: Add an item to the station
+        Input: name: str, item_type: int, pose: Mat | None
+        Output: SimItem
+        """
+        item = SimItem(self, name, item_type, pose)
+        with self.lock:
+            self.items.append(item)
+        return item
+
+    def _remove(self, item: SimItem):
+        """
+        Function name: _remove
+        Objective: Remove an item from the station
+        Input: item: SimItem
+        Output: None
+        """
+        with self.lock:
+            self.items = [i for i in self.items if i is not item]
+
+    def is_unreachable(self, pose: Mat) -> bool:
+        """
+        Function name: is_unreachable
+        Objective: Check if a pose can not be reached
+        Input: pose: Mat
+        Output: bool
+        """
+        return self.unreachable is not None and self.unreachable(pose)
+
+    def Item(self, name: str, itemtype: int = ITEM_TYPE_ANY) -> SimItem:
+        """
+        Function name: Item
+        Objective: Find an item by name (an invalid item if there is none, like RoboDK)
+        Input: name: str, itemtype: int
+        Output: SimItem
+        """
+        self._call()
+        self.counters["lookups"] += 1
+        with self.lock:
+            for item in self.items:
+                if item.name == name and (itemtype == ITEM_TYPE_ANY or item.type == itemtype):
+                    return item
+        return SimItem(self, name, None)
+
+    # RoboDK API, same names and arguments as robolink.Robolink
+
+    def AddTarget(self, name: str, itemparent=0, itemrobot=0) -> SimItem:
+        """
+        Function name: AddTarget
+        Objective: Add a target to the station (like robolink.Robolink.AddTarget)
+        Input: name: str, itemparent: SimItem | 0, itemrobot: SimItem | 0
+        Output: SimItem
+        """
+        self._call()
+        return self._add(name, ITEM_TYPE_TARGET)
+
+    def AddProgram(self, name: str, itemrobot=0) -> SimItem:
+        """
+        Function name: AddProgram
+        Objective: Add an empty program to the station, run on itemrobot (default the robot)
+        Input: name: str, itemrobot: SimItem | 0
+        Output: SimItem
+        """
+        self._call()
+        program = self._add(name, ITEM_TYPE_PROGRAM)
+        program.robot = itemrobot if itemrobot else self.items[0]
+        return program
+
+    def connect_again(self) -> "SimRobolink":
+        """
+        Function name: connect_again
+        Objective: A second connection to the same station (the simulator is shared between threads)
+        Input: None
+        Output: SimRobolink
+        """
+        return self
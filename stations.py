@@ -0,0 +1,185 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: stations.py
+Descriere: Acest fișier pornește mai multe stații (robot, tablă, imagine, port) în același proces,
+           cu firele de detecție comune; fiecare robot are motorul și coada RoboDK proprii
+-----------------------------------------------------------------------
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import async_server
+import robot_backend
+import server
+
+# Keys of a station config that are not RobotSocket arguments
+STATION_KEYS = ("name", "backend", "backend_options")
+
+# RobotSocket arguments a station config can set
+SOCKET_KEYS = (
+    "host", "port", "robot", "mid", "start", "board", "target_prefix", "grid_size", "win_length",
+    "move_deadline", "telemetry_rate", "motion_mode", "max_pending_motions", "image_path", "video_source",
+)
+
+
+def load_stations(path: str) -> dict:
+    """
+    Function name: load_stations
+    Objective: Read the station configs from a JSON file:
+               {"workers": 4, "report_interval": 30, "stations": [{"name": "cell1", "port": 65432, ...}, ...]}
+    Input: path: str
+    Output: dict (raises ValueError for an unknown key or a port used twice)
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    ports = set()
+    for i, station in enumerate(config.get("stations", [])):
+        unknown = set(station) - set(STATION_KEYS) - set(SOCKET_KEYS)
+        if unknown:
+            raise ValueError(f"Station {station.get('name', i)}: unknown keys {sorted(unknown)}")
+        port = station.get("port", 65432)
+        if port in ports:
+            raise ValueError(f"Station {station.get('name', i)}: port {port} is used by another station")
+        ports.add(port)
+    return config
+
+
+class Station:
+    """
+    Class name: Station
+    Objective: One robot with its board, image source and port
+    """
+
+    def __init__(self, name: str, robot_socket: server.RobotSocket, async_robot_server: async_server.AsyncRobotServer):
+        """
+        Function name: __init__
+        Objective: Initialize the station
+        Input: name: str, robot_socket: server.RobotSocket, async_robot_server: async_server.AsyncRobotServer
+        Output: None
+        """
+        self.name = name
+        self.robot_socket = robot_socket
+        self.server = async_robot_server
+        self.started = time.perf_counter()
+
+
+class StationManager:
+    """
+    Class name: StationManager
+    Objective: Serve several stations from one process. The stations share the detection threads;
+               every station has its own engine, RoboDK connection, robot queue and motion thread,
+               so a slow robot or a long search does not stall the others
+    """
+
+    def __init__(self, configs: list[dict], workers: int = 4, report_interval: float = 30.0):
+        """
+        Function name: __init__
+        Objective: Create the stations
+        Input: configs: list[dict] (see load_stations), workers: int (detection and search threads for all the stations),
+               report_interval: float (seconds between two throughput reports, 0 = no report)
+        Output: None
+        """
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="work")
+        self.report_interval = report_interval
+        self.stations = []
+        for i, config in enumerate(configs):
+            self.add_station(config.get("name", f"station{i + 1}"), config)
+
+    def add_station(self, name: str, config: dict) -> Station:
+        """
+        Function name: add_station
+        Objective: Connect to the robot of a station and create its server
+        Input: name: str, config: dict
+        Output: Station
+        """
+        options = {key: value for key, value in config.items() if key in SOCKET_KEYS}
+        # One connection per station: the RoboDK calls of the stations do not wait for each other
+        backend = robot_backend.create_backend(config.get("backend"), **config.get("backend_options", {}))
+        # Every station searches with its own N×N engine (the 3x3 solution book is shared by the process)
+        robot_socket = server.RobotSocket(backend=backend, **options)
+        station = Station(name, robot_socket, async_server.AsyncRobotServer(robot_socket, pool=self.pool))
+        self.stations.append(station)
+        return station
+
+    def report(self) -> dict:
+        """
+        Function name: report
+        Objective: Return the throughput of every station
+        Input: None
+        Output: dict (station name -> commands, commands per second, readGrid latency (ms), motions)
+        """
+        report = {}
+        for station in self.stations:
+            elapsed = max(time.perf_counter() - station.started, 1e-9)
+            spans = station.server.metrics.snapshot()["spans"]
+            commands = sum(summary["count"] for summary in spans.values())
+            motion = station.robot_socket.motion.stats()
+            read_grid = spans.get("command.readGrid")
+            report[station.name] = {
+                "port": station.robot_socket.port,
+                "clients": len(station.server.sessions),
+                "commands": commands,
+                "commands_per_s": round(commands / elapsed, 2),
+                "readGrid_ms": {key: round(read_grid[key], 2) for key in ("count", "mean", "p95")} if read_grid else None,
+                "motions": motion["completed"],
+                "motions_per_min": round(motion["completed"] * 60 / elapsed, 2),
+                "motion_pending": len(motion["pending"]),
+                "robot_queue": station.server.robot_queue.qsize() if station.server.robot_queue is not None else 0,
+            }
+        return report
+
+    async def _report_loop(self):
+        """
+        Function name: _report_loop
+        Objective: Print the throughput of the stations every report_interval seconds
+        Input: None
+        Output: None
+        """
+        while True:
+            await asyncio.sleep(self.report_interval)
+            for name, summary in self.report().items():
+                print(f"{name}: {json.dumps(summary)}")
+
+    async def serve(self):
+        """
+        Function name: serve
+        Objective: Serve all the stations forever
+        Input: None
+        Output: None
+        """
+        tasks = [asyncio.create_task(station.server.serve()) for station in self.stations]
+        if self.report_interval > 0:
+            tasks.append(asyncio.create_task(self._report_loop()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.pool.shutdown(wait=False)
+
+
+def main():
+    """
+    Function name: main
+    Objective: Serve the stations of a config file
+    Input: None
+    Output: None
+    """
+    parser = argparse.ArgumentParser(description="Serve several robot stations from one process")
+    parser.add_argument("config", help="JSON file with the stations")
+    args = parser.parse_args()
+
+    config = load_stations(args.config)
+    manager = StationManager(config["stations"], config.get("workers", 4), config.get("report_interval", 30.0))
+    print(f"Serving {len(manager.stations)} stations.")
+    asyncio.run(manager.serve())
+
+
+if __name__ == "__main__":
+    main()
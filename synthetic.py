@@ -0,0 +1,63 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: synthetic.py
+Descriere: Acest fișier generează imagini sintetice cu tabla de joc (pentru teste și benchmark-uri)
+-----------------------------------------------------------------------
+"""
+
+import cv2
+import numpy as np
+
+# Colors (BGR) inside the ranges of detect.py
+RED = (0, 0, 255)
+GREEN = (0, 255, 0)
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+def render_board(board: list[int], width: int = 1280, height: int = 960, grid_size: int = 3, offset: tuple[int, int] = (0, 0),
+                 stroke: int | None = None, noise: int = 0, seed: int = 0) -> np.ndarray:
+    """
+    Function name: render_board
+    Objective: Draw a board like the Unity screenshot: black grid, red X, green O on white
+    Input: board: list[int] (row by row, like detect.convert_matrix), width: int, height: int,
+           grid_size: int, offset: tuple[int, int] (pixels to move the grid from the center),
+           stroke: int | None (thickness of the X and O, None = like the grid lines; 1-2 gives thin, hollow rings),
+           noise: int (scattered red and green pixels in every empty cell), seed: int (for the noise)
+    Output: np.ndarray (BGR image)
+    """
+    img = np.full((height, width, 3), WHITE, dtype=np.uint8)
+
+    cell = int(min(width, height) * 0.8) // grid_size
+    size = cell * grid_size
+    x0 = (width - size) // 2 + offset[0]
+    y0 = (height - size) // 2 + offset[1]
+    thickness = max(2, cell // 20)
+
+    for k in range(1, grid_size):
+        cv2.line(img, (x0 + k * cell, y0), (x0 + k * cell, y0 + size), BLACK, thickness)
+        cv2.line(img, (x0, y0 + k * cell), (x0 + size, y0 + k * cell), BLACK, thickness)
+
+    margin = cell // 4
+    stroke = stroke or thickness
+    rng = np.random.default_rng(seed)
+    for index, value in enumerate(board):
+        row, col = divmod(index, grid_size)
+        left, top = x0 + col * cell, y0 + row * cell
+        if value == 1:
+            cv2.line(img, (left + margin, top + margin), (left + cell - margin, top + cell - margin), RED, stroke)
+            cv2.line(img, (left + cell - margin, top + margin), (left + margin, top + cell - margin), RED, stroke)
+        elif value == 2:
+            cv2.circle(img, (left + cell // 2, top + cell // 2), cell // 2 - margin, GREEN, stroke)
+        elif noise:
+            # 2x2 blocks on a 4 pixel raster: isolated single pixels in the half size image,
+            # many colored pixels but no large contour
+            for color in (RED, GREEN):
+                xs = (left + margin) // 4 * 4 + 4 * rng.integers(0, (cell - 2 * margin) // 4, noise)
+                ys = (top + margin) // 4 * 4 + 4 * rng.integers(0, (cell - 2 * margin) // 4, noise)
+                for dy in (0, 1):
+                    for dx in (0, 1):
+                        img[ys + dy, xs + dx] = color
+
+    return img
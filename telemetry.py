@@ -0,0 +1,196 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: telemetry.py
+Descriere: Acest fișier conține fluxul de telemetrie cu pozițiile articulațiilor robotului
+-----------------------------------------------------------------------
+"""
+
+import threading
+import time
+
+
+class Subscription:
+    """
+    Class name: Subscription
+    Objective: Hold the latest sample for one subscriber (older samples that were not read are dropped)
+    """
+
+    def __init__(self, telemetry, max_rate: float | None = None, notify=None):
+        """
+        Function name: __init__
+        Objective: Initialize the subscription
+        Input: telemetry: JointTelemetry, max_rate: float | None (samples per second for this subscriber),
+               notify: callable | None (called from the sampling thread when a sample is ready)
+        Output: None
+        """
+        self.telemetry = telemetry
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.notify = notify
+        self.latest = None
+        self.last_offer = 0.0
+        self.dropped = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def offer(self, sample: dict):
+        """
+        Function name: offer
+        Objective: Give a new sample to the subscriber, never blocks
+        Input: sample: dict
+        Output: None
+        """
+        if sample["t"] - self.last_offer < self.min_interval:
+            return
+        self.last_offer = sample["t"]
+        with self.lock:
+            if self.latest is not None:
+                # The subscriber did not read the previous sample
+                self.dropped += 1
+            self.latest = sample
+        self.ready.set()
+        if self.notify is not None:
+            self.notify()
+
+    def take(self) -> dict | None:
+        """
+        Function name: take
+        Objective: Return the latest sample (None if there is no new one)
+        Input: None
+        Output: dict | None
+        """
+        with self.lock:
+            sample, self.latest = self.latest, None
+            self.ready.clear()
+        if sample is not None:
+            sample = dict(sample, dropped=self.dropped)
+        return sample
+
+    def get(self, timeout: float | None = None) -> dict | None:
+        """
+        Function name: get
+        Objective: Wait for a new sample and return it (None on timeout or when closed)
+        Input: timeout: float | None
+        Output: dict | None
+        """
+        if not self.ready.wait(timeout) or self.closed:
+            return None
+        return self.take()
+
+    def close(self):
+        """
+        Function name: close
+        Objective: Stop receiving samples
+        Input: None
+        Output: None
+        """
+        self.closed = True
+        self.telemetry.unsubscribe(self)
+        self.ready.set()
+        if self.notify is not None:
+            self.notify()
+
+
+class JointTelemetry:
+    """
+    Class name: JointTelemetry
+    Objective: Sample the robot joints at a fixed rate on its own thread and push them to the subscribers
+    """
+
+    def __init__(self, read_joints, rate: float = 100.0):
+        """
+        Function name: __init__
+        Objective: Initialize the telemetry
+        Input: read_joints: callable returning list[float] (must not share the RoboDK connection
+               used by the commands, see RobotSocket.telemetry_reader), rate: float (samples per second)
+        Output: None
+        """
+        self.read_joints = read_joints
+        self.rate = rate
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.seq = 0
+        self.errors = 0
+
+    def subscribe(self, max_rate: float | None = None, notify=None) -> Subscription:
+        """
+        Function name: subscribe
+        Objective: Add a subscriber, the sampling starts with the first one
+        Input: max_rate: float | None, notify: callable | None
+        Output: Subscription
+        """
+        subscription = Subscription(self, max_rate, notify)
+        with self.lock:
+            self.subscribers = self.subscribers + [subscription]
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Function name: unsubscribe
+        Objective: Remove a subscriber
+        Input: subscription: Subscription
+        Output: None
+        """
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s is not subscription]
+
+    def start(self):
+        """
+        Function name: start
+        Objective: Start the sampling thread (if it is not running)
+        Input: None
+        Output: None
+        """
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Function name: stop
+        Objective: Stop the sampling thread
+        Input: None
+        Output: None
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        """
+        Function name: _run
+        Objective: Sample the joints until stopped
+        Input: None
+        Output: None
+        """
+        period = 1.0 / self.rate
+        next_time = time.perf_counter()
+        while self.running:
+            # Without subscribers there is no need to read the robot
+            subscribers = self.subscribers
+            if subscribers:
+                try:
+                    joints = self.read_joints()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Telemetry error: {e}")
+                else:
+                    self.seq += 1
+                    sample = {"t": time.time(), "seq": self.seq, "joints": joints}
+                    for subscription in subscribers:
+                        subscription.offer(sample)
+
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Too slow for the rate, do not try to catch up
+                next_time = time.perf_counter()
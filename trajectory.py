@@ -0,0 +1,112 @@
+"""
+-----------------------------------------------------------------------
+Priect de diploma: APLICAȚIE BAZATĂ PE INTELIGENȚĂ ARTIFICIALĂ DE TIP TIC TAC TOE SIMULATĂ PE UN ROBOT VIRTUAL
+Nume fișier: trajectory.py
+Descriere: Acest fișier conține traiectoriile pentru desenarea simbolurilor X și O (calculate o singură dată)
+-----------------------------------------------------------------------
+"""
+
+# Symbols, same codes as the board
+X, O = 1, 2
+
+# Segment kinds: linear move to a point, circular move through a point to another one
+LINEAR = "L"
+CIRCULAR = "C"
+
+
+def x_shape(size: float) -> list[tuple]:
+    """
+    Function name: x_shape
+    Objective: Return the segments of an X (offsets from the cell center, like moveRobotInXShape)
+    Input: size: float
+    Output: list[tuple] (kind, offsets)
+    """
+    center = (0.0, 0.0, 0.0)
+    return [
+        (LINEAR, (0.0, -size, -size)),  # Bottom left
+        (LINEAR, center),
+        (LINEAR, (0.0, size, size)),  # Top right
+        (LINEAR, center),
+        (LINEAR, (0.0, -size, size)),  # Top left
+        (LINEAR, center),
+        (LINEAR, (0.0, size, -size)),  # Bottom right
+        (LINEAR, center),
+    ]
+
+def circle_shape(radius: float) -> list[tuple]:
+    """
+    Function name: circle_shape
+    Objective: Return the segments of an O (offsets from the cell center, like moveRobotInCircle):
+               two circular moves
+    Input: radius: float
+    Output: list[tuple] (kind, offsets)
+    """
+    return [
+        (LINEAR, (radius, 0.0, 0.0)),
+        (CIRCULAR, (0.0, radius, 0.0), (-radius, 0.0, 0.0)),
+        (CIRCULAR, (0.0, -radius, 0.0), (radius, 0.0, 0.0)),
+    ]
+
+def compile_segments(center_pose, segments: list[tuple], transl) -> list[tuple]:
+    """
+    Function name: compile_segments
+    Objective: Turn the offsets of a shape into robot poses
+    Input: center_pose: robodk.Mat (pose of the robot at the cell center), segments: list[tuple],
+           transl: callable (robodk.transl)
+    Output: list[tuple] (kind, poses)
+    """
+    return [(kind, *[center_pose * transl(*offset) for offset in offsets]) for kind, *offsets in segments]
+
+
+class TrajectoryCache:
+    """
+    Class name: TrajectoryCache
+    Objective: Keep the compiled drawing of every symbol in every cell until the grid changes
+    """
+
+    def __init__(self):
+        """
+        Function name: __init__
+        Objective: Initialize the cache
+        Input: None
+        Output: None
+        """
+        self.centers = {}
+        self.trajectories = {}
+        self.programs = {}
+        self.layout_version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, build):
+        """
+        Function name: get
+        Objective: Return a compiled trajectory, build it the first time
+        Input: key: tuple (cell, symbol, motion_mode), build: callable returning the trajectory
+        Output: list[tuple]
+        """
+        trajectory = self.trajectories.get(key)
+        if trajectory is None:
+            self.misses += 1
+            trajectory = build()
+            self.trajectories[key] = trajectory
+        else:
+            self.hits += 1
+        return trajectory
+
+    def invalidate(self):
+        """
+        Function name: invalidate
+        Objective: Forget everything (the grid layout changed), deletes the RoboDK programs
+        Input: None
+        Output: None
+        """
+        for program in self.programs.values():
+            try:
+                program.Delete()
+            except Exception as e:
+                print(f"Could not delete program: {e}")
+        self.centers.clear()
+        self.trajectories.clear()
+        self.programs.clear()
+        self.layout_version += 1